@@ -4,9 +4,8 @@
 import os
 import sys
 import json
-import threading
-from datetime import datetime
-from flask import Flask, request, jsonify, send_file, render_template_string
+import time
+from flask import Flask, request, jsonify, send_file, send_from_directory, render_template_string, Response
 from flask_cors import CORS
 
 # 添加父目录到路径，以便导入现有的处理模块
@@ -15,11 +14,81 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # 导入工具模块
 from utils.downloader import ApiDownloader
 from utils.parser import LlmsParser
-from utils.processor import ApiProcessor
+from utils.processor import ApiProcessor, STAGE2_OUTPUTS, DOCS_ZIP_PATTERN
+from utils.pipeline import Pipeline
+from utils.classifier import RuleClassifier
+from utils.formats import SPEC_FORMATS, available_formats, validate_formats
+from utils.shards import SHARD_MODES
+from utils.jobs import JobQueue, QueueFullError, pid_alive
+from utils.jobstore import JobStore
+from utils.resultcache import ResultCache
+from utils.artifacts import ArtifactIndex
+from utils.assets import AssetCache, IMMUTABLE_MAX_AGE
+from utils.workspace import WorkspaceManager
+from utils.store import STORAGE_BACKENDS
+from utils.search import SEARCH_KINDS, FTS5_AVAILABLE
+from utils.events import job_event_stream, ProgressReporter
+from utils.metrics import REGISTRY, QUEUE_DEPTH
+from utils.profiling import StageProfiler, parse_modes, list_profiles, is_profile_name
+from utils.log import get_logger
 
-app = Flask(__name__)
+logger = get_logger('app')
+
+# 静态文件由下面的内存资源缓存提供，不使用Flask默认的static路由
+app = Flask(__name__, static_folder=None)
 CORS(app)
 
+# 文档ZIP压缩配置（可通过环境变量调整）
+DOCS_ZIP_LEVEL = int(os.environ.get('DOCS_ZIP_LEVEL', '6'))
+DOCS_ZIP_STORE_ONLY = os.environ.get('DOCS_ZIP_STORE_ONLY', '0') == '1'
+DOCS_ZIP_WORKERS = int(os.environ.get('DOCS_ZIP_WORKERS', str(os.cpu_count() or 4)))
+
+# 文档ZIP保留策略：每个工作目录最多保留的个数和天数（最新的一个总是保留）
+DOCS_ZIP_KEEP = int(os.environ.get('DOCS_ZIP_KEEP', '3'))
+DOCS_ZIP_MAX_AGE_DAYS = float(os.environ.get('DOCS_ZIP_MAX_AGE_DAYS', '7'))
+
+# 阶段2并行转换进程数（1为串行）
+STAGE2_WORKERS = int(os.environ.get('STAGE2_WORKERS', '1'))
+
+# 阶段3并行合并进程数（1为串行）
+STAGE3_WORKERS = int(os.environ.get('STAGE3_WORKERS', '1'))
+
+# 阶段3内存预算（MB）：超出后合并的中间结果暂存到磁盘，适合超大站点（0为不限制）
+STAGE3_MEMORY_BUDGET = int(float(os.environ.get('STAGE3_MEMORY_BUDGET_MB', '0')) * 1024 * 1024) or None
+
+# 阶段1/2的文档存储：files为01/02目录，sqlite为工作目录中的store.db
+# （STORE_EXPORT_FILES=1时，阶段2和一站式流水线完成后再导出为01/02目录）
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'files')
+if STORAGE_BACKEND not in STORAGE_BACKENDS:
+    raise ValueError(f"STORAGE_BACKEND无效: {STORAGE_BACKEND}")
+STORE_EXPORT_FILES = os.environ.get('STORE_EXPORT_FILES', '0') == '1'
+
+# 全文索引：阶段2逐个文档更新工作目录中的search.db，供/api/search检索（当前SQLite未编译FTS5时关闭）
+SEARCH_INDEX = os.environ.get('SEARCH_INDEX', '1') == '1' and FTS5_AVAILABLE
+SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', '100'))
+
+# 阶段3分类器（CLASSIFIER_RULES指向JSON/YAML规则文件时使用自定义分类）
+classifier = RuleClassifier.from_env()
+
+# 阶段3输出格式（逗号分隔，默认输出当前环境支持的全部格式）
+SPEC_OUTPUT_FORMATS = validate_formats(
+    os.environ.get('SPEC_OUTPUT_FORMATS', ','.join(available_formats())).split(',')
+)
+
+# 阶段3增量合并（只重新合并输入有变化的分类，阶段1清理时保留final目录）
+STAGE3_INCREMENTAL = os.environ.get('STAGE3_INCREMENTAL', '0') == '1'
+
+# 进度事件流：两次推送的最小间隔（秒），期间的进度更新合并为一条
+SSE_MIN_INTERVAL = float(os.environ.get('SSE_MIN_INTERVAL', '0.25'))
+
+# 性能分析（cpu / memory，逗号分隔，留空关闭）：对所有任务生效，单个任务也可在请求中用profile参数开启
+PROFILE_STAGES = parse_modes(os.environ.get('PROFILE_STAGES', ''))
+
+# 分片输出模式（tag / operation，留空则不分片）
+SPEC_SHARD_MODE = os.environ.get('SPEC_SHARD_MODE', '') or None
+if SPEC_SHARD_MODE and SPEC_SHARD_MODE not in SHARD_MODES:
+    raise ValueError(f"SPEC_SHARD_MODE无效: {SPEC_SHARD_MODE}")
+
 # 全局变量
 current_task = None
 task_status = {
@@ -31,8 +100,13 @@ task_status = {
 }
 
 class TaskManager:
-    def __init__(self):
+    def __init__(self, key=None, store=None):
         self.current_task = None
+        # 共享存储：多进程部署时状态写入存储，任一进程都能查询
+        self.key = key
+        self.store = store
+        self.updated_at = 0
+        self._saved_at = 0
         self.status = {
             'stage': 0,
             'status': 'idle',
@@ -42,7 +116,7 @@ class TaskManager:
             'results': {}
         }
     
-    def update_status(self, stage=None, status=None, message=None, progress=None, error=None):
+    def update_status(self, stage=None, status=None, message=None, progress=None, error=None, log=True):
         if stage is not None:
             self.status['stage'] = stage
         if status is not None:
@@ -54,7 +128,32 @@ class TaskManager:
         if error is not None:
             self.status['error'] = error
         
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Stage {self.status['stage']}: {message}")
+        if log:
+            logger.info('任务状态', workspace=self.key, stage=self.status['stage'], message=message)
+        
+        # 逐文件的进度更新按间隔合并写入
+        self.save(force=log or status is not None)
+    
+    def save(self, force=True):
+        self.updated_at = time.time()
+        if self.store is None:
+            return
+        if force or self.updated_at - self._saved_at >= self.store.flush_interval:
+            self._saved_at = self.updated_at
+            self.store.save_state(self.key, self.status, self.updated_at)
+    
+    def sync(self):
+        """载入其他进程写入共享存储的更新状态（在工作目录锁内、执行阶段任务前调用）"""
+        self.status = self.current()
+        self.updated_at = time.time()
+    
+    def current(self):
+        """返回最新状态：共享存储中的状态更新时（由其他进程执行任务）以存储为准"""
+        if self.store is not None:
+            updated_at, status = self.store.load_state(self.key)
+            if status is not None and updated_at > self.updated_at:
+                return status
+        return self.status
     
     def reset(self):
         self.status = {
@@ -65,17 +164,83 @@ class TaskManager:
             'error': None,
             'results': {}
         }
+        self.save()
+
+DATA_DIR = os.environ.get('DATA_DIR', 'data')
+
+# 共享任务状态存储（SQLite）：多进程部署（gunicorn）时各进程通过它共享任务和工作目录状态
+job_store = JobStore(os.environ.get('JOB_STORE', os.path.join(DATA_DIR, 'jobs.db')))
+
+# 结果缓存：同一站点且llms.txt未变化时直接复用最终产物（RESULT_CACHE_TTL=0关闭）
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', '86400'))
+result_cache = ResultCache(
+    os.path.join(DATA_DIR, 'cache'),
+    ttl=RESULT_CACHE_TTL,
+    max_entries=int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', '50')),
+    max_bytes=int(os.environ.get('RESULT_CACHE_MAX_MB', '2048')) * 1024 * 1024
+) if RESULT_CACHE_TTL > 0 else None
+
+# 工作目录：每次抓取使用独立的目录和任务状态，未指定时使用默认工作目录data/
+# 超过WORKSPACE_TTL_HOURS小时未使用的工作目录在后台回收（0为不回收）
+WORKSPACE_TTL_HOURS = float(os.environ.get('WORKSPACE_TTL_HOURS', '72'))
+workspaces = WorkspaceManager(
+    DATA_DIR,
+    state_factory=lambda workspace_id: TaskManager(key=workspace_id, store=job_store),
+    max_age=WORKSPACE_TTL_HOURS * 3600 if WORKSPACE_TTL_HOURS > 0 else None
+)
+task_manager = workspaces.default.state
+
+# 后台任务队列：阶段接口只负责入队，耗时处理在工作线程中执行
+# 不同工作目录的任务可并行，同一工作目录内的任务串行
+job_queue = JobQueue(
+    max_workers=int(os.environ.get('JOB_WORKERS', '4')),
+    max_pending=int(os.environ.get('JOB_MAX_PENDING', '20')),
+    store=job_store
+)
+
+# 指标：队列深度在采集时统计；多进程部署时各进程在任务结束后把指标快照写入任务状态库，
+# /metrics合并所有存活进程的快照输出
+METRICS_STATE_PREFIX = 'metrics:'
+QUEUE_DEPTH.set_function(lambda: {
+    (state,): count for state, count in job_queue.queue_depth().items() if state != 'workers'
+})
+
+def publish_metrics():
+    """保存本进程的指标快照（失败不影响任务）"""
+    try:
+        job_store.save_state(f'{METRICS_STATE_PREFIX}{os.getpid()}', REGISTRY.snapshot(include_live=False))
+    except Exception as e:
+        logger.error('保存指标快照失败', error=str(e))
 
-task_manager = TaskManager()
+# 静态资源缓存：启动时载入index.html和static/，开发模式（FLASK_DEBUG=1）下每次请求重新载入
+assets = AssetCache(os.path.dirname(os.path.abspath(__file__))).load()
+
+def send_asset(asset, immutable=False):
+    """发送内存中的静态资源：ETag、304、Range，客户端支持时发送预压缩版本"""
+    data, encoding, etag = asset.negotiate(lambda enc: request.accept_encodings[enc] > 0)
+    response = Response(data, mimetype=asset.mimetype)
+    response.set_etag(etag)
+    if immutable:
+        # 带内容哈希的URL，内容变化时URL也会变化
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response.make_conditional(request, accept_ranges=True)
 
 @app.route('/')
 def index():
     """返回主页面"""
-    try:
-        with open('index.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return """
+    if app.debug:
+        assets.load()
+    if assets.index is not None:
+        return send_asset(assets.index)
+    
+    return """
         <!DOCTYPE html>
         <html>
         <head><title>Apifox抓取工具</title></head>
@@ -86,274 +251,788 @@ def index():
         </html>
         """
 
+def get_workspace():
+    """从请求参数或JSON请求体中取工作目录（workspace），未指定时为默认工作目录"""
+    workspace_id = request.args.get('workspace')
+    if workspace_id is None and request.is_json:
+        workspace_id = (request.get_json(silent=True) or {}).get('workspace')
+    return workspaces.get(workspace_id)
+
+def workspace_not_found():
+    return jsonify({'error': '工作目录不存在'}), 404
+
 @app.route('/api/status')
 def get_status():
     """获取当前任务状态"""
-    return jsonify(task_manager.status)
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    return jsonify(workspace.state.current())
 
-@app.route('/api/stage1', methods=['POST'])
-def stage1_download():
-    """阶段1: 下载llms.txt和MD文件"""
+@app.route('/api/workspaces', methods=['GET', 'POST'])
+def workspace_list():
+    """列出或新建工作目录"""
+    if request.method == 'POST':
+        workspace = workspaces.create()
+        return jsonify({'success': True, **workspace.to_dict()}), 201
+    return jsonify({'workspaces': [workspace.to_dict() for workspace in workspaces.list()]})
+
+@app.route('/api/workspaces/<workspace_id>', methods=['GET', 'DELETE'])
+def workspace_detail(workspace_id):
+    """获取或删除工作目录"""
+    workspace = workspaces.get(workspace_id)
+    if workspace is None:
+        return workspace_not_found()
+    
+    if request.method == 'DELETE':
+        try:
+            workspaces.remove(workspace_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'success': True, 'message': '工作目录已删除'})
+    
+    return jsonify(workspace.to_dict())
+
+def report(job, workspace, **kwargs):
+    """同时更新工作目录的任务状态和后台任务进度"""
+    workspace.state.update_status(**kwargs)
+    job.update(message=kwargs.get('message'), progress=kwargs.get('progress'), stage=kwargs.get('stage'))
+
+def progress_reporter(job, workspace, start, end, label):
+    """生成逐文件的进度回调（不逐条打印日志）"""
+    return ProgressReporter(
+        lambda **kwargs: report(job, workspace, log=False, **kwargs),
+        start, end, label
+    )
+
+def workspace_store(workspace):
+    """工作目录的文档存储（未启用SQLite存储时为None）"""
+    return workspace.open_store() if STORAGE_BACKEND == 'sqlite' else None
+
+def workspace_search_index(workspace):
+    """工作目录的全文索引（未启用时为None）"""
+    return workspace.open_search_index() if SEARCH_INDEX else None
+
+def docs_zip_options():
+    """阶段2文档ZIP的压缩和保留配置"""
+    return {
+        'zip_compression_level': DOCS_ZIP_LEVEL,
+        'zip_store_only': DOCS_ZIP_STORE_ONLY,
+        'zip_workers': DOCS_ZIP_WORKERS,
+        'zip_keep': DOCS_ZIP_KEEP,
+        'zip_max_age': DOCS_ZIP_MAX_AGE_DAYS * 86400 if DOCS_ZIP_MAX_AGE_DAYS > 0 else None
+    }
+
+def cache_variant():
+    """影响最终产物的配置，作为结果缓存键的一部分"""
+    return json.dumps({
+        'formats': SPEC_OUTPUT_FORMATS,
+        'shard_mode': SPEC_SHARD_MODE,
+        'default': classifier.default,
+        'rules': classifier.rules
+    }, ensure_ascii=False, sort_keys=True)
+
+def read_fingerprint(workspace):
+    """读取阶段1记录的缓存键（命中缓存时同时记录缓存的各阶段结果）"""
+    try:
+        with open(os.path.join(workspace.stage1_dir, 'fingerprint.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_fingerprint(workspace, fingerprint):
+    os.makedirs(workspace.stage1_dir, exist_ok=True)
+    with open(os.path.join(workspace.stage1_dir, 'fingerprint.json'), 'w', encoding='utf-8') as f:
+        json.dump(fingerprint, f, ensure_ascii=False, indent=2)
+
+def restore_cached_result(job, workspace, cache_key, api_url):
+    """命中结果缓存时把最终产物复制到工作目录，返回阶段1结果；未命中返回None"""
+    import shutil
+    # 先恢复到构建目录旁的临时目录，再整体替换final目录
+    restore_dir = os.path.join(workspace.build_dir, 'cached')
+    shutil.rmtree(restore_dir, ignore_errors=True)
+    meta = result_cache.restore(cache_key, restore_dir)
+    if meta is None:
+        shutil.rmtree(restore_dir, ignore_errors=True)
+        return None
+    
+    ArtifactIndex(restore_dir, store=workspace_store(workspace)).rebuild()
+    workspace.commit_build(restore_dir)
+    results = meta['results']
+    results['stage3']['final_file'] = os.path.join(workspace.final_dir, results['stage3']['final_file'])
+    workspace.state.status['results'] = results
+    write_fingerprint(workspace, {'key': cache_key, 'url': api_url, 'cached': True, 'results': results})
+    
+    report(job, workspace, status='completed', message='命中结果缓存，直接使用已生成的文件', progress=100)
+    logger.info('命中结果缓存', key=cache_key, url=meta.get('url'))
+    return dict(results['stage1'], success=True, cached=True, results=results)
+
+def skip_cached_stage(job, workspace, stage, fingerprint):
+    """阶段1已命中结果缓存时跳过阶段2/3"""
+    result = fingerprint['results'][f'stage{stage}']
+    report(job, workspace, stage=stage, status='completed', message=f'命中结果缓存，跳过阶段{stage}', progress=100)
+    return dict(result, success=True, cached=True)
+
+def save_cached_result(workspace, fingerprint):
+    """阶段3完成后把最终产物写入结果缓存（失败不影响本次处理）"""
+    try:
+        results = json.loads(json.dumps(workspace.state.status['results'], default=str))
+        results['stage3']['final_file'] = os.path.relpath(results['stage3']['final_file'], workspace.final_dir)
+        result_cache.put(fingerprint['key'], workspace.final_dir, {'url': fingerprint['url'], 'results': results})
+        logger.info('已写入结果缓存', key=fingerprint['key'])
+    except Exception as e:
+        logger.error('写入结果缓存失败', error=str(e))
+
+def run_stage1(job, workspace, api_url, profiler):
+    """阶段1: 下载llms.txt和MD文件（在后台任务中执行）"""
+    with workspace.lock, profiler.stage('stage1'):
+        return _run_stage1(job, workspace, api_url)
+
+def _run_stage1(job, workspace, api_url):
+    task_manager = workspace.state
+    task_manager.sync()
     try:
-        data = request.get_json()
-        api_url = data.get('url')
-        
-        if not api_url:
-            return jsonify({'error': '缺少URL参数'}), 400
-        
         # 清理旧数据目录
-        task_manager.update_status(stage=1, status='running', message='清理旧数据...', progress=0)
-        cleanup_old_data()
+        report(job, workspace, stage=1, status='running', message='清理旧数据...', progress=0)
+        cleanup_old_data(workspace, keep_final=STAGE3_INCREMENTAL)
         
-        task_manager.update_status(message='开始下载数据...', progress=5)
+        report(job, workspace, message='开始下载数据...', progress=5)
         
         # 创建下载器实例
-        downloader = ApiDownloader(base_url=api_url, output_dir='data/01')
+        downloader = ApiDownloader(base_url=api_url, workspace_root=workspace.root, store=workspace_store(workspace))
         
         # 下载llms.txt
-        task_manager.update_status(message='下载llms.txt...', progress=10)
+        report(job, workspace, message='下载llms.txt...', progress=10)
         llms_content = downloader.download_llms_txt()
         
+        # 结果缓存：站点和llms.txt都未变化时直接复用之前的最终产物
+        if result_cache is not None:
+            cache_key = result_cache.fingerprint(api_url, llms_content, cache_variant())
+            cached = restore_cached_result(job, workspace, cache_key, api_url)
+            if cached is not None:
+                return cached
+            write_fingerprint(workspace, {'key': cache_key, 'url': api_url, 'cached': False})
+        
         # 解析API文档链接
-        task_manager.update_status(message='解析API文档链接...', progress=30)
+        report(job, workspace, message='解析API文档链接...', progress=30)
         parser = LlmsParser(api_url)
-        
-        # 添加调试信息
-        print(f"DEBUG: llms_content长度: {len(llms_content)}")
-        print(f"DEBUG: llms_content前200字符: {llms_content[:200]}")
-        
         api_links = parser.parse_llms_content(llms_content)
         
-        print(f"DEBUG: 解析结果: {api_links}")
-        print(f"DEBUG: 解析结果类型: {type(api_links)}")
-        if api_links:
-            print(f"DEBUG: 链接数量: {len(api_links)}")
-        
         # 保存解析出的链接到url.txt文件
         if api_links:
-            url_file_path = os.path.join('data/01', 'url.txt')
-            with open(url_file_path, 'w', encoding='utf-8') as f:
-                f.write("# 解析出的API文档链接\n\n")
-                for i, link in enumerate(api_links, 1):
-                    f.write(f"{i}. {link['title']}\n")
-                    f.write(f"   URL: {link['url']}\n")
-                    f.write(f"   完整URL: {link['full_url']}\n\n")
+            url_file_path = os.path.join(workspace.stage1_dir, 'url.txt')
+            parser.save_url_list(api_links, url_file_path)
             
-            task_manager.update_status(message=f'解析完成，保存了{len(api_links)}个链接到url.txt', progress=40)
-            print(f"链接已保存到: {url_file_path}")
+            report(job, workspace, message=f'解析完成，保存了{len(api_links)}个链接到url.txt', progress=40)
+            logger.info('链接已保存', path=url_file_path)
         else:
-            task_manager.update_status(message='解析失败，未找到API文档链接', progress=40)
-            print("警告: 未解析出任何链接")
+            report(job, workspace, message='解析失败，未找到API文档链接', progress=40)
+            logger.warning('未解析出任何链接', url=api_url)
         
         # 批量下载MD文件
         if api_links:
-            task_manager.update_status(message=f'下载{len(api_links)}个MD文件...', progress=50)
-            downloaded_files = downloader.download_md_files(api_links)
+            report(job, workspace, message=f'下载{len(api_links)}个MD文件...', progress=50)
+            downloaded_files = downloader.download_md_files(
+                api_links,
+                progress_callback=progress_reporter(job, workspace, 50, 99, '下载MD文件')
+            )
         else:
             downloaded_files = []
         
-        task_manager.update_status(
-            status='completed', 
-            message=f'下载完成: {len(downloaded_files)}个文件', 
-            progress=100
-        )
-        
         task_manager.status['results']['stage1'] = {
             'downloaded_files': len(downloaded_files),
             'api_links': len(api_links)
         }
         
-        return jsonify({
+        report(
+            job,
+            workspace,
+            status='completed',
+            message=f'下载完成: {len(downloaded_files)}个文件',
+            progress=100
+        )
+        
+        return {
             'success': True,
             'downloaded_files': len(downloaded_files),
             'api_links': len(api_links)
-        })
+        }
         
     except Exception as e:
         task_manager.update_status(status='error', error=str(e))
-        return jsonify({'error': str(e)}), 500
+        raise
 
-@app.route('/api/stage2', methods=['POST'])
-def stage2_process():
-    """阶段2: MD清洗和YAML转换"""
+def run_stage2(job, workspace, profiler):
+    """阶段2: MD清洗和YAML转换（在后台任务中执行）"""
+    with workspace.lock, profiler.stage('stage2'):
+        return _run_stage2(job, workspace)
+
+def _run_stage2(job, workspace):
+    task_manager = workspace.state
+    task_manager.sync()
     try:
-        task_manager.update_status(stage=2, status='running', message='开始数据清洗...', progress=0)
+        fingerprint = read_fingerprint(workspace)
+        if fingerprint and fingerprint.get('cached'):
+            return skip_cached_stage(job, workspace, 2, fingerprint)
+        
+        report(job, workspace, stage=2, status='running', message='开始数据清洗...', progress=0)
         
-        # 创建数据处理器
+        # 创建数据处理器（沿用上次的合并结果，阶段3完成前final目录仍提供旧结果；纯文档目录重新生成）
         processor = ApiProcessor(
-            base_dir='data'
+            base_dir=workspace.root,
+            final_dir=workspace.ensure_build(skip=('md',)),
+            convert_workers=STAGE2_WORKERS,
+            store=workspace_store(workspace),
+            search_index=workspace_search_index(workspace),
+            **docs_zip_options()
         )
         
         # 处理MD文件并转换为YAML
-        task_manager.update_status(message='处理MD文件并转换为YAML...', progress=20)
-        stage2_result = processor.stage2_clean_and_convert()
+        report(job, workspace, message='处理MD文件并转换为YAML...', progress=20)
+        stage2_result = processor.stage2_clean_and_convert(
+            progress_callback=progress_reporter(job, workspace, 20, 90, '处理MD文件')
+        )
+        if STORE_EXPORT_FILES:
+            processor.export_files()
         
         if stage2_result and 'processed' in stage2_result:
             processed_count = stage2_result['processed']
             valid_count = stage2_result['valid']
+            
+            # 纯文档和文档ZIP立即发布，不等阶段3
+            workspace.commit_build()
             docs_zip = stage2_result.get('docs_zip')
+            if docs_zip:
+                docs_zip = os.path.join(workspace.final_dir, os.path.basename(docs_zip))
             
             message = f'处理完成: {processed_count}个文件，有效{valid_count}个'
             if docs_zip:
                 message += f'，文档ZIP: {docs_zip}'
             
-            task_manager.update_status(
-                status='completed',
-                message=message,
-                progress=100
-            )
-            
             task_manager.status['results']['stage2'] = {
                 'processed_files': processed_count,
                 'valid_files': valid_count,
                 'docs_zip': docs_zip
             }
+            
+            report(
+                job,
+                workspace,
+                status='completed',
+                message=message,
+                progress=100
+            )
         else:
             raise Exception("阶段2处理失败")
         
-        return jsonify({
+        return {
             'success': True,
             'processed_files': processed_count,
             'valid_files': valid_count
-        })
+        }
         
     except Exception as e:
         task_manager.update_status(status='error', error=str(e))
-        return jsonify({'error': str(e)}), 500
+        raise
 
-@app.route('/api/stage3', methods=['POST'])
-def stage3_merge():
-    """阶段3: 最终YAML合并"""
+def run_stage3(job, workspace, profiler):
+    """阶段3: 最终YAML合并（在后台任务中执行）"""
+    with workspace.lock, profiler.stage('stage3'):
+        return _run_stage3(job, workspace)
+
+def _run_stage3(job, workspace):
+    task_manager = workspace.state
+    task_manager.sync()
     try:
-        task_manager.update_status(stage=3, status='running', message='开始合并YAML文件...', progress=0)
+        fingerprint = read_fingerprint(workspace)
+        if fingerprint and fingerprint.get('cached'):
+            return skip_cached_stage(job, workspace, 3, fingerprint)
+        
+        report(job, workspace, stage=3, status='running', message='开始合并YAML文件...', progress=0)
         
-        # 创建数据处理器
+        # 创建数据处理器（增量合并时沿用上次的全部结果，否则只沿用阶段2的产物，旧分类和分片不保留）
         processor = ApiProcessor(
-            base_dir='data'
+            base_dir=workspace.root,
+            final_dir=workspace.ensure_build(only=None if STAGE3_INCREMENTAL else STAGE2_OUTPUTS),
+            merge_workers=STAGE3_WORKERS,
+            memory_budget=STAGE3_MEMORY_BUDGET,
+            store=workspace_store(workspace),
+            classifier=classifier,
+            output_formats=SPEC_OUTPUT_FORMATS,
+            shard_mode=SPEC_SHARD_MODE,
+            incremental=STAGE3_INCREMENTAL
         )
         
         # 合并所有YAML文件
-        task_manager.update_status(message='合并YAML文件...', progress=30)
-        result = processor.stage3_merge_final()
+        report(job, workspace, message='合并YAML文件...', progress=30)
+        result = processor.stage3_merge_final(
+            progress_callback=progress_reporter(job, workspace, 30, 99, '合并分类')
+        )
         
         if result and 'merged_files' in result:
             merged_count = result['merged_files']
-            final_file = result.get('final_file', 'data/final/merged_apis.yml')
             
-            task_manager.update_status(
-                status='completed',
-                message=f'合并完成: {merged_count}个文件',
-                progress=100
-            )
+            # 新结果整体替换final目录
+            workspace.commit_build()
+            final_file = os.path.join(workspace.final_dir,
+                                      os.path.basename(result.get('final_file') or 'merged_apis.yml'))
             
             task_manager.status['results']['stage3'] = {
                 'merged_files': merged_count,
                 'final_file': final_file
             }
             
-            return jsonify({
+            if result_cache is not None and fingerprint:
+                save_cached_result(workspace, fingerprint)
+            
+            report(
+                job,
+                workspace,
+                status='completed',
+                message=f'合并完成: {merged_count}个文件',
+                progress=100
+            )
+            
+            return {
                 'success': True,
                 'merged_files': merged_count,
                 'final_file': final_file
-            })
+            }
         else:
             raise Exception("阶段3处理失败")
         
     except Exception as e:
         task_manager.update_status(status='error', error=str(e))
-        return jsonify({'error': str(e)}), 500
+        raise
+
+def run_pipeline(job, workspace, api_url, profiler):
+    """一站式执行三个阶段（在后台任务中执行），性能分析在流水线内按下载转换和合并两段进行"""
+    with workspace.lock:
+        return _run_pipeline(job, workspace, api_url, profiler)
+
+def _run_pipeline(job, workspace, api_url, profiler):
+    task_manager = workspace.state
+    task_manager.sync()
+    try:
+        report(job, workspace, stage=1, status='running', message='清理旧数据...', progress=0)
+        cleanup_old_data(workspace, keep_final=STAGE3_INCREMENTAL)
+
+        pipeline = Pipeline(
+            api_url,
+            workspace.root,
+            processor_options={
+                **docs_zip_options(),
+                # 非增量模式只沿用旧的文档ZIP（交给保留策略清理），其余产物全部重新生成
+                'final_dir': workspace.ensure_build(only=None if STAGE3_INCREMENTAL else (DOCS_ZIP_PATTERN,)),
+                'convert_workers': STAGE2_WORKERS,
+                'merge_workers': STAGE3_WORKERS,
+                'memory_budget': STAGE3_MEMORY_BUDGET,
+                'store': workspace_store(workspace),
+                'search_index': workspace_search_index(workspace),
+                'classifier': classifier,
+                'output_formats': SPEC_OUTPUT_FORMATS,
+                'shard_mode': SPEC_SHARD_MODE,
+                'incremental': STAGE3_INCREMENTAL
+            },
+            report=lambda **kwargs: report(job, workspace, **kwargs),
+            profiler=profiler
+        )
+
+        llms_content = pipeline.fetch_index()
+
+        fingerprint = None
+        if result_cache is not None:
+            cache_key = result_cache.fingerprint(api_url, llms_content, cache_variant())
+            cached = restore_cached_result(job, workspace, cache_key, api_url)
+            if cached is not None:
+                return {'success': True, 'cached': True, 'results': cached['results']}
+            fingerprint = {'key': cache_key, 'url': api_url, 'cached': False}
+            write_fingerprint(workspace, fingerprint)
+
+        results = pipeline.run()
+        workspace.commit_build()
+        if STORE_EXPORT_FILES:
+            pipeline.processor.export_files()
+        # 构建目录中的路径替换为发布后的final目录
+        for stage, key in (('stage2', 'docs_zip'), ('stage3', 'final_file')):
+            if results[stage].get(key):
+                results[stage][key] = os.path.join(workspace.final_dir, os.path.basename(results[stage][key]))
+        task_manager.status['results'] = results
+
+        if fingerprint:
+            save_cached_result(workspace, fingerprint)
+
+        report(
+            job,
+            workspace,
+            stage=3,
+            status='completed',
+            message=f"全部完成: 下载{results['stage1']['downloaded_files']}个文件，"
+                    f"合并{results['stage3']['merged_files']}个文件",
+            progress=100
+        )
+
+        return {'success': True, 'cached': False, 'results': results}
+
+    except Exception as e:
+        task_manager.update_status(status='error', error=str(e))
+        raise
+
+def enqueue_job(kind, func, *args, params=None):
+    """提交后台任务（在请求指定的工作目录中执行），立即返回202和任务ID
+    
+    请求体中的profile（true / "cpu" / "memory" / "cpu,memory"）为本任务开启性能分析，
+    结果写入工作目录的profiles目录，通过 /api/profiles 下载。
+    """
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        profile_modes = parse_modes(data['profile']) if 'profile' in data else PROFILE_STAGES
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    profiler = StageProfiler(workspace.profile_dir, profile_modes)
+    
+    params = dict(params or {}, workspace=workspace.id)
+    if profile_modes:
+        params['profile'] = ','.join(profile_modes)
+    
+    def run(job, *run_args):
+        try:
+            return func(job, *run_args, profiler=profiler)
+        finally:
+            publish_metrics()
+    
+    try:
+        job = job_queue.submit(kind, run, workspace, *args, params=params)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '10'}
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'workspace': workspace.id,
+        'status': job.status,
+        'status_url': f'/api/jobs/{job.id}'
+    }), 202
+
+@app.route('/api/stage1', methods=['POST'])
+def stage1_download():
+    """阶段1: 下载llms.txt和MD文件"""
+    data = request.get_json(silent=True) or {}
+    api_url = data.get('url')
+    
+    if not api_url:
+        return jsonify({'error': '缺少URL参数'}), 400
+    
+    return enqueue_job('stage1', run_stage1, api_url, params={'url': api_url})
+
+@app.route('/api/stage2', methods=['POST'])
+def stage2_process():
+    """阶段2: MD清洗和YAML转换"""
+    return enqueue_job('stage2', run_stage2)
+
+@app.route('/api/stage3', methods=['POST'])
+def stage3_merge():
+    """阶段3: 最终YAML合并"""
+    return enqueue_job('stage3', run_stage3)
+
+@app.route('/api/pipeline', methods=['POST'])
+def pipeline_run():
+    """一站式执行: 下载、转换和合并在一个任务中完成"""
+    data = request.get_json(silent=True) or {}
+    api_url = data.get('url')
+
+    if not api_url:
+        return jsonify({'error': '缺少URL参数'}), 400
+
+    return enqueue_job('pipeline', run_pipeline, api_url, params={'url': api_url})
+
+@app.route('/api/jobs')
+def list_jobs():
+    """列出最近的后台任务"""
+    return jsonify({
+        'jobs': [job.to_dict() for job in job_queue.list()],
+        'queue': job_queue.queue_depth()
+    })
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """获取后台任务状态、进度和结果"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus指标（文本格式），吞吐量用rate(apifox_documents_total[5m])计算"""
+    others = []
+    for key, _, snapshot in job_store.list_states(METRICS_STATE_PREFIX):
+        pid = int(key[len(METRICS_STATE_PREFIX):])
+        if pid == os.getpid():
+            continue
+        if not pid_alive(pid):
+            job_store.delete_state(key)
+            continue
+        others.append(snapshot)
+    
+    return Response(REGISTRY.render(others), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/cache', methods=['GET', 'DELETE'])
+def result_cache_info():
+    """查看或清空结果缓存"""
+    if result_cache is None:
+        return jsonify({'error': '结果缓存未启用'}), 404
+    if request.method == 'DELETE':
+        result_cache.clear()
+        return jsonify({'success': True, 'message': '结果缓存已清空'})
+    return jsonify(result_cache.stats())
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """以Server-Sent Events推送后台任务进度，任务结束时发送done事件"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    return Response(
+        job_event_stream(job, min_interval=SSE_MIN_INTERVAL),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def artifact_index(workspace):
+    """工作目录final目录的产物索引（旧目录没有索引时补建）"""
+    index = ArtifactIndex(workspace.final_dir)
+    if index.load() is None and os.path.isdir(workspace.final_dir):
+        index.rebuild()
+    return index
+
+def send_artifact(workspace, name, download_name=None):
+    """按产物索引发送文件：强ETag、304、Range请求，客户端支持时发送预压缩版本
+
+    产物不存在时返回None。
+    """
+    index = artifact_index(workspace)
+    entry = index.lookup(name)
+    if entry is None:
+        return None
+    
+    path, encoding, etag = index.negotiate(entry, lambda enc: request.accept_encodings[enc] > 0)
+    response = send_file(
+        path,
+        mimetype=entry['mimetype'],
+        as_attachment=True,
+        download_name=download_name or entry['name'],
+        etag=etag,
+        conditional=True
+    )
+    # 每次都向服务器确认，未变化时返回304
+    response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 @app.route('/api/download/complete.yaml')
 def download_complete_yaml():
     """下载最终的完整YAML文件"""
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    
     try:
-        # 查找final目录中的YAML文件
-        final_dir = 'data/final'
-        if os.path.exists(final_dir):
-            yml_files = [f for f in os.listdir(final_dir) if f.endswith('.yml') or f.endswith('.yaml')]
-            if yml_files:
-                final_file = os.path.join(final_dir, yml_files[0])
-                return send_file(
-                    final_file,
-                    as_attachment=True,
-                    download_name='apifox_complete_api.yaml',
-                    mimetype='text/yaml'
-                )
+        # 优先返回阶段3生成的统一文档apiall.yaml
+        response = send_artifact(workspace, 'complete.yaml', download_name='apifox_complete_api.yaml')
+        if response is not None:
+            return response
         
         return jsonify({'error': '文件不存在，请先完成处理流程'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/download/complete.<any(json, msgpack, cbor):fmt>')
+def download_complete_spec(fmt):
+    """下载统一文档的JSON/MessagePack/CBOR版本"""
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    
+    try:
+        ext = SPEC_FORMATS[fmt][0]
+        response = send_artifact(workspace, f'complete.{ext}', download_name=f'apifox_complete_api.{ext}')
+        if response is not None:
+            return response
+        
+        return jsonify({'error': '文件不存在，请先完成处理流程（或未启用该输出格式）'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/shards/index.json')
+def shard_index():
+    """获取分片索引（operationId / path -> 分片ID）"""
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    
+    shard_dir = os.path.join(workspace.final_dir, 'shards')
+    if not os.path.exists(os.path.join(shard_dir, 'index.json')):
+        return jsonify({'error': '分片不存在，请先完成处理流程（或未启用分片输出）'}), 404
+    return send_from_directory(shard_dir, 'index.json', mimetype='application/json')
+
+@app.route('/api/shards/<shard_id>')
+def get_shard(shard_id):
+    """获取单个分片（仅包含该分片的接口及其引用的components）"""
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    
+    shard_dir = os.path.join(workspace.final_dir, 'shards')
+    if shard_id.endswith('.json'):
+        shard_id = shard_id[:-len('.json')]
+    if not os.path.exists(os.path.join(shard_dir, f'{shard_id}.json')):
+        return jsonify({'error': '分片不存在'}), 404
+    return send_from_directory(shard_dir, f'{shard_id}.json', mimetype='application/json')
+
 @app.route('/api/download/docs.zip')
 def download_docs_zip():
-    """下载文档ZIP文件"""
+    """下载文档ZIP文件（?stream=1 时直接从阶段1源文件流式打包）"""
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    
     try:
-        # 查找final目录中的ZIP文件
-        final_dir = 'data/final'
-        if os.path.exists(final_dir):
-            zip_files = [f for f in os.listdir(final_dir) if f.endswith('.zip')]
-            if zip_files:
-                # 获取最新的ZIP文件
-                zip_files.sort(reverse=True)  # 按文件名倒序排列，获取最新的
-                final_file = os.path.join(final_dir, zip_files[0])
-                return send_file(
-                    final_file,
-                    as_attachment=True,
-                    download_name='apifox_docs.zip',
-                    mimetype='application/zip'
+        # 阶段2生成的最新ZIP文件
+        stream = request.args.get('stream') == '1'
+        if not stream:
+            response = send_artifact(workspace, 'docs.zip', download_name='apifox_docs.zip')
+            if response is not None:
+                return response
+        
+        # 没有预生成的ZIP（或要求流式）时，边压缩边输出，不落临时文件
+        store = workspace_store(workspace)
+        if store is not None or os.path.exists(os.path.join(workspace.stage1_dir, 'md')):
+            level = request.args.get('level', type=int)
+            processor = ApiProcessor(
+                base_dir=workspace.root,
+                store=store,
+                zip_compression_level=DOCS_ZIP_LEVEL if level is None else level,
+                zip_store_only=DOCS_ZIP_STORE_ONLY or request.args.get('store') == '1',
+                zip_workers=DOCS_ZIP_WORKERS
+            )
+            builder = processor.build_docs_zip()
+            if len(builder):
+                return Response(
+                    builder.iter_chunks(),
+                    mimetype='application/zip',
+                    headers={'Content-Disposition': 'attachment; filename=apifox_docs.zip'}
                 )
         
+        if stream:
+            # 命中结果缓存时没有阶段1源文件（已在清理旧数据时删除），改为发送缓存恢复的ZIP
+            response = send_artifact(workspace, 'docs.zip', download_name='apifox_docs.zip')
+            if response is not None:
+                return response
+        
         return jsonify({'error': 'ZIP文件不存在，请先完成处理流程'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/search')
+def search():
+    """全文检索接口和文档：q为关键词（空格分隔，全部命中），type为operation/document，limit为每类条数"""
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'error': '缺少检索关键词q'}), 400
+    kind = request.args.get('type') or None
+    if kind is not None and kind not in SEARCH_KINDS:
+        return jsonify({'error': f"type无效（可选: {', '.join(SEARCH_KINDS)}）"}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), SEARCH_MAX_LIMIT)
+    
+    if not SEARCH_INDEX or not os.path.exists(workspace.search_path):
+        return jsonify({'error': '全文索引不存在，请先完成处理流程（或未启用全文索引）'}), 404
+    
+    started = time.perf_counter()
+    results = workspace.open_search_index().search(query, kind=kind, limit=limit)
+    return jsonify({
+        'query': query,
+        **results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+@app.route('/api/profiles')
+def profile_list():
+    """列出工作目录中的性能分析文件（.prof可用pstats/snakeviz打开，.tracemalloc可用tracemalloc.Snapshot.load载入）"""
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    return jsonify({'workspace': workspace.id, 'profiles': list_profiles(workspace.profile_dir)})
+
+@app.route('/api/profiles/<filename>')
+def download_profile(filename):
+    """下载性能分析文件"""
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    if not is_profile_name(filename) or not os.path.isfile(os.path.join(workspace.profile_dir, filename)):
+        return jsonify({'error': '文件不存在'}), 404
+    
+    if filename.endswith('.txt'):
+        return send_from_directory(os.path.abspath(workspace.profile_dir), filename,
+                                   mimetype='text/plain; charset=utf-8')
+    return send_from_directory(os.path.abspath(workspace.profile_dir), filename, as_attachment=True)
+
 @app.route('/api/reset', methods=['POST'])
 def reset_task():
     """重置任务状态"""
-    task_manager.reset()
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    
+    workspace.state.reset()
     return jsonify({'success': True, 'message': '任务状态已重置'})
 
 @app.route('/api/download/<filename>', methods=['GET'])
 def download_file(filename):
     """下载生成的文件"""
+    workspace = get_workspace()
+    if workspace is None:
+        return workspace_not_found()
+    
     try:
         # 检查文件类型
-        if filename.endswith('.yml'):
-            # YAML文件在final目录
-            file_path = os.path.join('data', 'final', filename)
-            if not os.path.exists(file_path):
-                # 尝试查找实际的YAML文件
-                final_dir = os.path.join('data', 'final')
-                if os.path.exists(final_dir):
-                    yml_files = [f for f in os.listdir(final_dir) if f.endswith('.yml')]
-                    if yml_files:
-                        file_path = os.path.join(final_dir, yml_files[0])
-                        filename = yml_files[0]
-                    else:
-                        return jsonify({'error': '文件不存在，请先完成处理流程'}), 404
-                else:
-                    return jsonify({'error': '文件不存在，请先完成处理流程'}), 404
-            
-            return send_file(file_path, as_attachment=True, download_name=filename)
-            
-        elif filename.endswith('.zip'):
-            # ZIP文件在final目录
-            file_path = os.path.join('data', 'final', filename)
-            if not os.path.exists(file_path):
-                return jsonify({'error': '文件不存在，请先完成处理流程'}), 404
-            
-            return send_file(file_path, as_attachment=True, download_name=filename)
-        
-        else:
+        if not filename.endswith(('.yml', '.json', '.msgpack', '.cbor', '.zip')):
             return jsonify({'error': '不支持的文件类型'}), 400
+        
+        response = send_artifact(workspace, filename)
+        if response is None and filename.endswith('.yml'):
+            # 尝试查找实际的YAML文件
+            response = send_artifact(workspace, '*.yml')
+        if response is not None:
+            return response
+        
+        return jsonify({'error': '文件不存在，请先完成处理流程'}), 404
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/static/<path:filename>')
 def static_files(filename):
-    """提供静态文件服务"""
-    return send_file(f'static/{filename}')
+    """提供静态文件服务（带内容哈希的路径可永久缓存）"""
+    asset, immutable = assets.get(filename)
+    if asset is not None:
+        return send_asset(asset, immutable=immutable)
+    
+    # 启动后新增的文件
+    return send_from_directory(assets.static_dir, filename)
 
 @app.errorhandler(404)
 def not_found(error):
@@ -363,15 +1042,13 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'error': '服务器内部错误'}), 500
 
-def cleanup_old_data():
-    """清理旧数据目录"""
-    import shutil
+def cleanup_old_data(workspace, keep_final=False):
+    """开始新一轮抓取：旧数据在后台删除，final目录保留到新结果生成为止（keep_final=True时供增量合并使用）"""
     try:
-        if os.path.exists('data'):
-            shutil.rmtree('data')
-            print("已清理旧数据目录")
+        workspace.clean(keep_final=keep_final)
+        logger.info('已清理旧数据目录', root=workspace.root, keep_final=keep_final)
     except Exception as e:
-        print(f"清理数据目录失败: {str(e)}")
+        logger.error('清理数据目录失败', root=workspace.root, error=str(e))
 
 def create_directories():
     """创建必要的目录"""
@@ -381,6 +1058,7 @@ def create_directories():
         'data/02/yml',
         'data/final',
         'data/final/md',
+        'data/jobs',
         'static/css',
         'static/js',
         'templates',
@@ -390,7 +1068,7 @@ def create_directories():
     for directory in directories:
         os.makedirs(directory, exist_ok=True)
     
-    print("目录结构创建完成")
+    logger.info('目录结构创建完成')
 
 if __name__ == '__main__':
     print("=" * 50)
@@ -405,10 +1083,10 @@ if __name__ == '__main__':
     print("按 Ctrl+C 停止服务器")
     print("=" * 50)
     
-    # 启动Flask应用
+    # 启动Flask开发服务器（生产环境使用: gunicorn -c gunicorn.conf.py wsgi:app）
     app.run(
         host='0.0.0.0',
         port=5000,
-        debug=True,
+        debug=os.environ.get('FLASK_DEBUG', '0') == '1',
         threaded=True
     )
\ No newline at end of file
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试
+
+包含以下模块：
+- corpus: 合成语料生成器
+- bench: 各阶段耗时和内存峰值的测量，以及与基准结果的比较
+"""
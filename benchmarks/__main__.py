@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""python -m benchmarks: 运行基准测试"""
+
+import sys
+
+from .bench import main
+
+if __name__ == '__main__':
+    sys.exit(main())
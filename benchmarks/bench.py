@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+端到端基准测试 - 在合成语料上测量解析、阶段2转换和阶段3合并的耗时和内存峰值
+
+用法（在项目根目录执行）：
+    python -m benchmarks --sizes 100,1000,10000 --save benchmarks/baseline.json
+    python -m benchmarks --sizes 100,1000,10000 --baseline benchmarks/baseline.json
+
+每个阶段先计时运行repeat次取最小值，再在tracemalloc下运行一次记录Python内存分配峰值
+（--no-memory可跳过），两者分开测量以免tracemalloc的开销影响计时。
+与基准文件比较时，耗时或内存峰值超过阈值的阶段会被标记为回归，此时退出码为1。
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+from utils.parser import LlmsParser
+from utils.processor import ApiProcessor
+from utils.formats import available_formats, validate_formats
+from utils.log import setup_logging
+
+from .corpus import BASE_URL, generate_corpus
+
+# 可选依赖：resource（进程RSS峰值，Windows下不可用）
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_SIZES = (100, 1000, 10000)
+STAGES = ('parse', 'convert', 'merge')
+
+# 基准耗时低于该值（秒）的阶段不判断耗时回归（计时误差占比过大）
+MIN_SECONDS = 0.05
+
+
+class Benchmark:
+    """在一份语料上依次运行各阶段"""
+
+    def __init__(self, root, convert_workers=1, merge_workers=1, output_formats=('yaml',), memory_budget=None):
+        self.root = root
+        self.convert_workers = convert_workers
+        self.merge_workers = merge_workers
+        self.memory_budget = memory_budget
+        self.output_formats = validate_formats(output_formats)
+        with open(os.path.join(root, '01', 'llms.txt'), 'r', encoding='utf-8') as f:
+            self.llms_content = f.read()
+
+    def _processor(self):
+        return ApiProcessor(base_dir=self.root, convert_workers=self.convert_workers,
+                            merge_workers=self.merge_workers, output_formats=self.output_formats,
+                            memory_budget=self.memory_budget)
+
+    def parse(self):
+        return len(LlmsParser(BASE_URL).parse_llms_content(self.llms_content))
+
+    def convert(self):
+        return self._processor().stage2_clean_and_convert()['valid']
+
+    def merge(self):
+        return self._processor().stage3_merge_final()['merged_files']
+
+
+def _measure(func, repeat, memory):
+    """返回 {'seconds': 最短耗时, 'peak_bytes': tracemalloc峰值（未测量时为None）}"""
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'seconds': round(min(seconds), 6), 'peak_bytes': peak}
+
+
+def run_size(documents, workdir, seed=0, repeat=1, memory=True, keep=False, **options):
+    """生成documents篇文档的语料并测量各阶段，返回该规模的结果"""
+    root = tempfile.mkdtemp(prefix=f'bench-{documents}-', dir=workdir)
+    try:
+        start = time.perf_counter()
+        corpus = generate_corpus(root, documents, seed=seed)
+        generate_seconds = time.perf_counter() - start
+
+        benchmark = Benchmark(root, **options)
+        stages = {}
+        for stage in STAGES:
+            stages[stage] = _measure(getattr(benchmark, stage), repeat, memory)
+            stages[stage]['docs_per_second'] = round(documents / stages[stage]['seconds'], 1) \
+                if stages[stage]['seconds'] else None
+            print(f"  {documents:>6} {stage:<8} {stages[stage]['seconds']:>10.3f}s"
+                  f"  {_format_bytes(stages[stage]['peak_bytes']):>10}", file=sys.stderr)
+
+        return {
+            'documents': documents,
+            'corpus': dict(corpus, generate_seconds=round(generate_seconds, 3)),
+            'stages': stages
+        }
+    finally:
+        if keep:
+            print(f"  语料目录已保留: {root}", file=sys.stderr)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """与基准结果比较，返回回归列表 [{'documents', 'stage', 'metric', 'baseline', 'current', 'ratio'}]"""
+    baseline_sizes = {str(item['documents']): item for item in baseline.get('results', [])}
+    regressions = []
+    for item in results:
+        previous = baseline_sizes.get(str(item['documents']))
+        if previous is None:
+            continue
+        for stage, current in item['stages'].items():
+            before = previous['stages'].get(stage)
+            if not before:
+                continue
+            checks = [('seconds', threshold), ('peak_bytes', memory_threshold)]
+            for metric, limit in checks:
+                old, new = before.get(metric), current.get(metric)
+                if not old or new is None:
+                    continue
+                if metric == 'seconds' and old < MIN_SECONDS:
+                    continue
+                ratio = new / old
+                if ratio > 1 + limit:
+                    regressions.append({'documents': item['documents'], 'stage': stage, 'metric': metric,
+                                        'baseline': old, 'current': new, 'ratio': round(ratio, 3)})
+    return regressions
+
+
+def _format_bytes(value):
+    if value is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB'):
+        if value < 1024:
+            return f'{value:.0f}{unit}'
+        value /= 1024
+    return f'{value:.1f}GB'
+
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'created_at': datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def _sizes(value):
+    sizes = [int(size) for size in value.split(',') if size.strip()]
+    if not sizes or any(size < 1 for size in sizes):
+        raise argparse.ArgumentTypeError(f"文档数应为正整数: {value}")
+    return sizes
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='在合成语料上测量解析、转换和合并的耗时与内存峰值')
+    parser.add_argument('--sizes', type=_sizes, default=list(DEFAULT_SIZES),
+                        help=f"语料文档数，逗号分隔（默认: {','.join(map(str, DEFAULT_SIZES))}，最大建议50000）")
+    parser.add_argument('--seed', type=int, default=0, help='语料随机种子（默认: 0）')
+    parser.add_argument('--repeat', type=int, default=1, help='每个阶段的计时次数，取最小值（默认: 1）')
+    parser.add_argument('--no-memory', action='store_true', help='不测量内存峰值')
+    parser.add_argument('--stage2-workers', type=int, default=1, help='阶段2并行转换进程数（默认: 1）')
+    parser.add_argument('--stage3-workers', type=int, default=1, help='阶段3并行合并进程数（默认: 1）')
+    parser.add_argument('--memory-budget', type=int, default=None, metavar='MB',
+                        help='阶段3内存预算（MB），超出后暂存到磁盘（默认不限制）')
+    parser.add_argument('--formats', default='yaml',
+                        help=f"阶段3输出格式，逗号分隔（默认: yaml，可选: {','.join(available_formats())}）")
+    parser.add_argument('--workdir', default=None, help='语料生成目录（默认: 系统临时目录）')
+    parser.add_argument('--keep', action='store_true', help='保留生成的语料和输出')
+    parser.add_argument('--save', metavar='PATH', help='把本次结果保存为基准文件')
+    parser.add_argument('--baseline', metavar='PATH', help='与基准文件比较，超过阈值时标记为回归')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='耗时回归阈值（默认: 0.25，即慢25%%以上）')
+    parser.add_argument('--memory-threshold', type=float, default=0.10,
+                        help='内存峰值回归阈值（默认: 0.10）')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # 逐文件日志会影响计时，基准测试只输出警告以上的日志
+    setup_logging(level='WARNING', stream=sys.stderr)
+
+    options = {
+        'convert_workers': args.stage2_workers,
+        'merge_workers': args.stage3_workers,
+        'memory_budget': args.memory_budget * 1024 * 1024 if args.memory_budget else None,
+        'output_formats': [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    }
+
+    results = []
+    for documents in args.sizes:
+        results.append(run_size(documents, args.workdir, seed=args.seed, repeat=args.repeat,
+                                memory=not args.no_memory, keep=args.keep, **options))
+
+    report = {
+        'environment': _environment(),
+        'options': dict(options, seed=args.seed, repeat=args.repeat, memory=not args.no_memory),
+        'results': results
+    }
+    if resource is not None:
+        # ru_maxrss在Linux上以KB为单位（包含语料生成和子进程以外的全部内存）
+        report['environment']['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('options') != report['options']:
+            print(f"警告: 基准文件的测试参数不同: {baseline.get('options')}", file=sys.stderr)
+        report['regressions'] = compare(results, baseline, args.threshold, args.memory_threshold)
+        for item in report['regressions']:
+            print(f"回归: {item['documents']}篇 {item['stage']} {item['metric']} "
+                  f"{item['baseline']} -> {item['current']}（x{item['ratio']}）", file=sys.stderr)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write('\n')
+    return 1 if report.get('regressions') else 0
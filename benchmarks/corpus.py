@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成语料生成器 - 生成Apifox文档站点形式的 llms.txt 和MD文件（内嵌OpenAPI YAML）
+
+生成结果与阶段1的输出目录结构一致（<root>/01/llms.txt、<root>/01/md/*.md），
+可直接交给 ApiProcessor 执行阶段2和阶段3。同一参数（文档数、seed）生成的语料完全相同。
+"""
+
+import os
+import random
+
+from utils.formats import dump_yaml
+
+BASE_URL = 'https://bench.apifox.cn'
+
+# 接口所属领域：路径前缀 -> 标题关键词（覆盖默认分类规则中的各个分类，以及未命中规则的领域）
+DOMAINS = [
+    ('/v1/chat', 'chat'),
+    ('/v1/images', 'image'),
+    ('/v1/audio', 'audio'),
+    ('/v1/embeddings', 'embed'),
+    ('/v1/models', 'model'),
+    ('/v1/files', 'file'),
+    ('/v1/users', '用户'),
+    ('/v1/orders', '订单'),
+]
+
+ACTIONS = ['创建', '查询', '更新', '删除', '列表', '详情', '导出', '统计']
+
+FIELD_TYPES = [
+    {'type': 'string'},
+    {'type': 'integer', 'format': 'int64'},
+    {'type': 'number'},
+    {'type': 'boolean'},
+    {'type': 'string', 'format': 'date-time'},
+    {'type': 'array', 'items': {'type': 'string'}},
+]
+
+# 纯文档（不含YAML）和跨分类共享path的文档所占比例
+DOCS_ONLY_RATIO = 0.05
+SHARED_PATH_RATIO = 0.02
+
+
+def _schema(rng, name, fields):
+    properties = {}
+    for i in range(fields):
+        properties[f'{name}_field_{i}'] = dict(rng.choice(FIELD_TYPES), description=f'{name} 字段 {i}')
+    return {'type': 'object', 'properties': properties, 'required': list(properties)[:2]}
+
+
+def _openapi(rng, index, path, method, title, fields):
+    """单个接口文档：一个path、一个方法，请求体和响应体引用components中的schema"""
+    request_name = f'Request{index}'
+    response_name = f'Response{index}'
+    operation = {
+        'summary': title,
+        'deprecated': False,
+        'description': f'{title}的说明。' * rng.randint(1, 4),
+        'tags': [title.split(' ')[0]],
+        'parameters': [
+            {'name': 'Authorization', 'in': 'header', 'required': True, 'schema': {'type': 'string'}},
+            {'name': 'page', 'in': 'query', 'required': False, 'schema': {'type': 'integer'}},
+        ],
+        'responses': {
+            '200': {
+                'description': '成功',
+                'content': {'application/json': {'schema': {'$ref': f'#/components/schemas/{response_name}'}}}
+            }
+        }
+    }
+    if method in ('post', 'put'):
+        operation['requestBody'] = {
+            'content': {'application/json': {'schema': {'$ref': f'#/components/schemas/{request_name}'}}}
+        }
+    return {
+        'openapi': '3.0.1',
+        'info': {'title': title, 'description': '', 'version': '1.0.0'},
+        'tags': [],
+        'paths': {path: {method: operation}},
+        'components': {
+            'schemas': {
+                request_name: _schema(rng, 'request', fields),
+                response_name: _schema(rng, 'response', fields),
+            },
+            'securitySchemes': {}
+        },
+        'servers': [{'url': BASE_URL, 'description': '正式环境'}]
+    }
+
+
+def _api_markdown(title, spec):
+    return (f"# {title}\n\n"
+            f"## OpenAPI Specification\n\n"
+            f"```yaml\n{dump_yaml(spec)}```\n")
+
+
+def _docs_markdown(rng, title):
+    paragraphs = [f"{title}的使用说明，第{i + 1}段。" * rng.randint(2, 8) for i in range(rng.randint(2, 6))]
+    return f"# {title}\n\n" + '\n\n'.join(paragraphs) + '\n'
+
+
+def generate_corpus(root, documents, seed=0, fields=6):
+    """在 <root>/01 下生成包含documents篇文档的语料，返回 {'api': 接口文档数, 'docs': 纯文档数, 'bytes': 总字节数}
+
+    fields为每个schema的字段数，用于调节单篇文档的大小。
+    """
+    rng = random.Random(seed)
+    stage1_dir = os.path.join(root, '01')
+    md_dir = os.path.join(stage1_dir, 'md')
+    os.makedirs(md_dir, exist_ok=True)
+
+    docs_lines = []
+    api_lines = []
+    stats = {'api': 0, 'docs': 0, 'bytes': 0}
+
+    for index in range(documents):
+        doc_id = f'{1000000 + index}e{seed}'
+        url = f'{BASE_URL}/{doc_id}.md'
+
+        if rng.random() < DOCS_ONLY_RATIO:
+            title = f'使用指南 {index}'
+            content = _docs_markdown(rng, title)
+            docs_lines.append(f'- [{title}]({url}): 文档')
+            stats['docs'] += 1
+        else:
+            # 相邻两篇文档共用一个path（不同方法），少量文档使用跨分类共享的path
+            prefix, keyword = DOMAINS[(index // 2) % len(DOMAINS)]
+            title = f'{keyword} {rng.choice(ACTIONS)} {index}'
+            if rng.random() < SHARED_PATH_RATIO:
+                path, method = f'/v1/shared/resource{index % 20}', rng.choice(['get', 'post', 'put', 'delete'])
+            else:
+                path, method = f'{prefix}/resource{index // 2}', ('get', 'post')[index % 2]
+            content = _api_markdown(title, _openapi(rng, index, path, method, title, fields))
+            api_lines.append(f'- [{title}]({url}): 接口')
+            stats['api'] += 1
+
+        # 文件名与下载器生成的格式一致：<文档ID>_<标题>.md
+        filename = f"{doc_id}_{title.replace(' ', '_')}.md"
+        data = content.encode('utf-8')
+        with open(os.path.join(md_dir, filename), 'wb') as f:
+            f.write(data)
+        stats['bytes'] += len(data)
+
+    llms_content = ('# Bench\n\n> 合成语料\n\n## Docs\n' + '\n'.join(docs_lines) +
+                    '\n\n## API Docs\n' + '\n'.join(api_lines) + '\n')
+    with open(os.path.join(stage1_dir, 'llms.txt'), 'w', encoding='utf-8') as f:
+        f.write(llms_content)
+    stats['bytes'] += len(llms_content.encode('utf-8'))
+
+    return stats
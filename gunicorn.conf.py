@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+# gunicorn配置（生产环境）: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# 多个预先fork的工作进程各自处理请求并执行后台任务，
+# 任务和工作目录状态通过SQLite共享存储（JOB_STORE）在进程间共享。
+
+import os
+import multiprocessing
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# 工作进程数（默认CPU核数）
+workers = int(os.environ.get('WEB_CONCURRENCY', str(multiprocessing.cpu_count())))
+
+# 线程工作模式：SSE进度流和文件下载会长时间占用连接
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', '8'))
+
+# 不预加载应用：每个工作进程在fork之后再创建自己的任务线程池
+preload_app = False
+
+timeout = 120
+# 重启/停止时给正在执行的阶段任务留出完成时间
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', '300'))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info')
@@ -1,6 +1,7 @@
 // 全局变量
 let isProcessing = false;
 let currentStage = 0;
+let workspaceId = null;
 let processResults = {
     stage1: {},
     stage2: {},
@@ -70,92 +71,130 @@ async function processApiDocuments(apiUrl) {
     addLog('开始处理API文档...', 'info');
     addLog(`目标URL: ${apiUrl}`, 'info');
     
-    // 阶段1: 下载原始数据
-    const stage1Result = await executeStage(1, '下载llms.txt和MD文件', async () => {
-        const response = await fetch('/api/stage1', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ url: apiUrl })
-        });
-        
-        if (!response.ok) {
-            throw new Error(`阶段1失败: ${response.statusText}`);
-        }
-        
-        const result = await response.json();
-        addLog(`下载完成: ${result.downloaded_files} 个文件`, 'success');
-        return result;
-    });
-    processResults.stage1 = stage1Result;
+    // 每次抓取使用独立的工作目录，避免与其他用户的任务互相覆盖
+    const wsResponse = await fetch('/api/workspaces', { method: 'POST' });
+    if (!wsResponse.ok) {
+        throw new Error(`创建工作目录失败: ${wsResponse.statusText}`);
+    }
+    workspaceId = (await wsResponse.json()).workspace_id;
+    addLog(`工作目录: ${workspaceId}`, 'info');
     
-    // 阶段2: 数据清洗和转换
-    const stage2Result = await executeStage(2, '清洗MD文件并转换为YAML', async () => {
-        const response = await fetch('/api/stage2', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            }
-        });
-        
-        if (!response.ok) {
-            throw new Error(`阶段2失败: ${response.statusText}`);
-        }
-        
-        const result = await response.json();
-        addLog(`转换完成: ${result.processed_files} 个文件`, 'success');
-        return result;
+    // 三个阶段在一个后台任务中执行（下载和转换重叠进行）
+    const response = await fetch('/api/pipeline', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ url: apiUrl, workspace: workspaceId })
     });
-    processResults.stage2 = stage2Result;
     
-    // 阶段3: 最终合并
-    const stage3Result = await executeStage(3, '合并所有YAML文件', async () => {
-        const response = await fetch('/api/stage3', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            }
-        });
-        
-        if (!response.ok) {
-            throw new Error(`阶段3失败: ${response.statusText}`);
-        }
-        
-        const result = await response.json();
-        addLog(`合并完成: ${result.merged_files} 个分类文件`, 'success');
-        return result;
-    });
-    processResults.stage3 = stage3Result;
+    if (!response.ok) {
+        throw new Error(`提交任务失败: ${response.statusText}`);
+    }
+    
+    const job = await response.json();
+    currentStage = 1;
+    updateStageStatus(1, 'active', '处理中...');
+    addLog('开始下载并转换MD文件...', 'info');
+    
+    let result;
+    try {
+        result = await waitForJob(job.job_id, updatePipelineProgress);
+    } catch (error) {
+        updateStageStatus(currentStage, 'error', '失败');
+        addLog(`阶段${currentStage}失败: ${error.message}`, 'error');
+        throw error;
+    }
+    
+    processResults = result.results;
+    for (const stageNum of [1, 2, 3]) {
+        updateStageProgress(stageNum, 100);
+        updateStageStatus(stageNum, 'completed', result.cached ? '已缓存' : '完成');
+    }
+    
+    if (result.cached) {
+        // 命中结果缓存时服务端已恢复最终产物
+        addLog('命中结果缓存，直接使用已生成的文件', 'success');
+    } else {
+        addLog(`下载完成: ${processResults.stage1.downloaded_files} 个文件`, 'success');
+        addLog(`转换完成: ${processResults.stage2.processed_files} 个文件`, 'success');
+        addLog(`合并完成: ${processResults.stage3.merged_files} 个分类文件`, 'success');
+    }
     
     // 显示最终结果
     showResult();
     addLog('所有处理完成！', 'success');
 }
 
-// 执行单个阶段
-async function executeStage(stageNum, description, asyncFunction) {
-    currentStage = stageNum;
+// 一站式任务的整体进度区间（与服务端Pipeline.STAGE_RANGES一致）
+const PIPELINE_STAGE_RANGES = { 1: [0, 70], 2: [70, 80], 3: [80, 100] };
+
+// 按任务当前阶段更新各阶段状态和进度条
+function updatePipelineProgress(job) {
+    const stageNum = job.stage || 1;
+    if (stageNum !== currentStage) {
+        for (let i = currentStage; i < stageNum; i++) {
+            updateStageProgress(i, 100);
+            updateStageStatus(i, 'completed', '完成');
+        }
+        currentStage = stageNum;
+        updateStageStatus(stageNum, 'active', '处理中...');
+    }
     
-    // 更新阶段状态
-    updateStageStatus(stageNum, 'active', '处理中...');
-    addLog(`开始${description}...`, 'info');
+    const [start, end] = PIPELINE_STAGE_RANGES[stageNum];
+    const percentage = ((job.progress || 0) - start) * 100 / (end - start);
+    updateStageProgress(stageNum, Math.min(100, Math.max(10, percentage)));
+}
+
+// 等待后台任务完成，期间通过onUpdate同步进度（优先使用SSE事件流，不支持时轮询）
+function waitForJob(jobId, onUpdate) {
+    if (!window.EventSource) {
+        return pollJob(jobId, onUpdate);
+    }
     
-    try {
-        // 模拟进度更新
-        updateStageProgress(stageNum, 10);
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/api/jobs/${jobId}/events`);
         
-        const result = await asyncFunction();
+        source.addEventListener('progress', event => {
+            onUpdate(JSON.parse(event.data));
+        });
         
-        // 完成进度
-        updateStageProgress(stageNum, 100);
-        updateStageStatus(stageNum, 'completed', '完成');
+        source.addEventListener('done', event => {
+            source.close();
+            const job = JSON.parse(event.data);
+            if (job.status === 'completed') {
+                resolve(job.result);
+            } else {
+                reject(new Error(job.error || '任务执行失败'));
+            }
+        });
         
-        return result;
-    } catch (error) {
-        updateStageStatus(stageNum, 'error', '失败');
-        addLog(`${description}失败: ${error.message}`, 'error');
-        throw error;
+        // 连接中断时改为轮询
+        source.onerror = () => {
+            source.close();
+            pollJob(jobId, onUpdate).then(resolve, reject);
+        };
+    });
+}
+
+// 轮询后台任务直到完成
+async function pollJob(jobId, onUpdate) {
+    while (true) {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        if (!response.ok) {
+            throw new Error(`查询任务状态失败: ${response.statusText}`);
+        }
+        
+        const job = await response.json();
+        if (job.status === 'completed') {
+            return job.result;
+        }
+        if (job.status === 'error') {
+            throw new Error(job.error || '任务执行失败');
+        }
+        
+        onUpdate(job);
+        await new Promise(resolve => setTimeout(resolve, 1000));
     }
 }
 
@@ -230,8 +269,8 @@ function showResult() {
     const downloadYamlLink = document.getElementById('downloadYamlLink');
     const downloadZipLink = document.getElementById('downloadZipLink');
     
-    downloadYamlLink.href = '/api/download/complete.yaml';
-    downloadZipLink.href = '/api/download/docs.zip';
+    downloadYamlLink.href = `/api/download/complete.yaml?workspace=${workspaceId}`;
+    downloadZipLink.href = `/api/download/docs.zip?workspace=${workspaceId}`;
     
     // 添加点击事件处理
     downloadYamlLink.addEventListener('click', handleDownload);
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import gzip
+import json
+import shutil
+import hashlib
+import threading
+
+# 可选依赖：zstandard（zstd预压缩，缺失时只生成gzip版本）
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARTIFACT_INDEX_FILE = '.artifacts.json'
+COMPRESSED_DIR = '.compressed'
+
+ARTIFACT_MIMETYPES = {
+    '.yaml': 'text/yaml',
+    '.yml': 'text/yaml',
+    '.json': 'application/json',
+    '.msgpack': 'application/msgpack',
+    '.cbor': 'application/cbor',
+    '.zip': 'application/zip'
+}
+
+# 预压缩格式: Content-Encoding -> 文件后缀（按优先级排列）
+ENCODING_SUFFIXES = {
+    'zstd': '.zst',
+    'gzip': '.gz'
+}
+
+# 已压缩的格式不再预压缩
+_INCOMPRESSIBLE = ('.zip',)
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def available_encodings():
+    return [encoding for encoding in ENCODING_SUFFIXES if encoding != 'zstd' or zstandard is not None]
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _compress(source, target, encoding):
+    tmp_path = f"{target}.tmp"
+    with open(source, 'rb') as src, open(tmp_path, 'wb') as dst:
+        if encoding == 'gzip':
+            with gzip.GzipFile(fileobj=dst, mode='wb', compresslevel=9, mtime=0) as gz:
+                shutil.copyfileobj(src, gz, _CHUNK_SIZE)
+        else:
+            zstandard.ZstdCompressor(level=12).copy_stream(src, dst)
+    os.replace(tmp_path, target)
+
+
+class ArtifactIndex:
+    """产物索引 - 记录final目录中各产物的大小、ETag和预压缩版本
+
+    索引在产物生成后重建（未变化的文件沿用上次的摘要和压缩结果），
+    下载接口直接查索引，不再每次列目录。读取时按索引文件的修改时间缓存，
+    其他进程重建索引后自动重新载入。传入store（ArtifactStore）时重建后同步更新其产物表。
+    """
+
+    _memo = {}
+    _memo_lock = threading.Lock()
+
+    def __init__(self, final_dir, encodings=None, min_compress_size=1024, store=None):
+        self.final_dir = final_dir
+        self.store = store
+        self.encodings = available_encodings() if encodings is None else list(encodings)
+        self.min_compress_size = min_compress_size
+        self.index_path = os.path.join(final_dir, ARTIFACT_INDEX_FILE)
+        self.compressed_dir = os.path.join(final_dir, COMPRESSED_DIR)
+
+    def rebuild(self):
+        """扫描final目录重建索引，返回索引内容"""
+        previous = self.load() or {'artifacts': {}}
+        artifacts = {}
+
+        names = []
+        if os.path.isdir(self.final_dir):
+            names = sorted(name for name in os.listdir(self.final_dir)
+                           if not name.startswith('.') and not name.endswith('.tmp')
+                           and os.path.splitext(name)[1] in ARTIFACT_MIMETYPES
+                           and os.path.isfile(os.path.join(self.final_dir, name)))
+
+        for name in names:
+            artifacts[name] = self._index_file(name, previous['artifacts'].get(name))
+
+        self._remove_stale_variants(artifacts)
+
+        index = {'artifacts': artifacts, 'aliases': self._aliases(names)}
+        os.makedirs(self.final_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+        if self.store is not None:
+            self.store.replace_artifacts(artifacts.values())
+        return index
+
+    def _index_file(self, name, previous):
+        path = os.path.join(self.final_dir, name)
+        stat = os.stat(path)
+
+        if previous and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+            entry = dict(previous)
+        else:
+            entry = {
+                'name': name,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'etag': _file_digest(path)[:32],
+                'mimetype': ARTIFACT_MIMETYPES[os.path.splitext(name)[1]],
+                'variants': {}
+            }
+
+        entry['variants'] = {encoding: variant for encoding, variant in entry['variants'].items()
+                             if encoding in self.encodings
+                             and os.path.exists(os.path.join(self.compressed_dir, variant['file']))}
+
+        if stat.st_size >= self.min_compress_size and not name.endswith(_INCOMPRESSIBLE):
+            for encoding in self.encodings:
+                if encoding not in entry['variants']:
+                    self._add_variant(entry, path, encoding)
+
+        return entry
+
+    def _add_variant(self, entry, path, encoding):
+        os.makedirs(self.compressed_dir, exist_ok=True)
+        variant_file = entry['name'] + ENCODING_SUFFIXES[encoding]
+        variant_path = os.path.join(self.compressed_dir, variant_file)
+        _compress(path, variant_path, encoding)
+
+        size = os.path.getsize(variant_path)
+        # 压缩收益不足10%时不保留压缩版本
+        if size >= entry['size'] * 0.9:
+            os.remove(variant_path)
+            return
+
+        entry['variants'][encoding] = {
+            'file': variant_file,
+            'size': size,
+            'etag': f"{entry['etag']}-{encoding}"
+        }
+
+    def _remove_stale_variants(self, artifacts):
+        if not os.path.isdir(self.compressed_dir):
+            return
+        keep = {variant['file'] for entry in artifacts.values() for variant in entry['variants'].values()}
+        for name in os.listdir(self.compressed_dir):
+            if name not in keep:
+                os.remove(os.path.join(self.compressed_dir, name))
+
+    @staticmethod
+    def _aliases(names):
+        """固定下载名到实际文件的映射"""
+        aliases = {}
+        yaml_files = [name for name in names if name.endswith(('.yml', '.yaml'))]
+        if 'apiall.yaml' in names:
+            aliases['complete.yaml'] = 'apiall.yaml'
+        elif yaml_files:
+            aliases['complete.yaml'] = yaml_files[0]
+        if yaml_files:
+            aliases['*.yml'] = yaml_files[0]
+
+        for ext in ('json', 'msgpack', 'cbor'):
+            if f'apiall.{ext}' in names:
+                aliases[f'complete.{ext}'] = f'apiall.{ext}'
+
+        # 文件名带时间戳，取最新的
+        zip_files = sorted((name for name in names if name.endswith('.zip')), reverse=True)
+        if zip_files:
+            aliases['docs.zip'] = zip_files[0]
+        return aliases
+
+    def load(self):
+        """读取索引（按文件修改时间缓存），不存在时返回None"""
+        try:
+            mtime_ns = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._memo_lock:
+            cached = self._memo.get(self.index_path)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        with self._memo_lock:
+            self._memo[self.index_path] = (mtime_ns, index)
+        return index
+
+    def lookup(self, name):
+        """按文件名或别名查找产物"""
+        index = self.load()
+        if index is None:
+            return None
+        name = index['aliases'].get(name, name)
+        return index['artifacts'].get(name)
+
+    def negotiate(self, entry, accepts):
+        """按客户端可接受的编码选择文件，返回 (路径, Content-Encoding, ETag)
+
+        accepts(encoding)返回该编码是否可接受。
+        """
+        for encoding in ENCODING_SUFFIXES:
+            variant = entry['variants'].get(encoding)
+            if variant and accepts(encoding):
+                return os.path.join(self.compressed_dir, variant['file']), encoding, variant['etag']
+        return os.path.join(self.final_dir, entry['name']), None, entry['etag']
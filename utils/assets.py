@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+import threading
+
+from .log import get_logger
+
+# 可选依赖：zstandard（zstd预压缩，缺失时只生成gzip版本）
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+log = get_logger('assets')
+
+# 带内容哈希的URL可以永久缓存
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+# index.html中引用本地静态文件的属性：href="static/..." / src="/static/..."
+_STATIC_REF_PATTERN = re.compile(r'''((?:href|src)\s*=\s*["'])/?static/([^"'?#]+)(["'])''')
+
+
+class Asset:
+    """内存中的静态资源及其预压缩版本"""
+
+    def __init__(self, name, data, mimetype, min_compress_size=512):
+        self.name = name
+        self.data = data
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(data).hexdigest()
+        self.etag = self.digest[:32]
+        self.variants = {}
+
+        if len(data) >= min_compress_size and mimetype.startswith(_COMPRESSIBLE_TYPES):
+            candidates = []
+            if zstandard is not None:
+                candidates.append(('zstd', zstandard.ZstdCompressor(level=19).compress(data)))
+            candidates.append(('gzip', gzip.compress(data, compresslevel=9, mtime=0)))
+            for encoding, compressed in candidates:
+                if len(compressed) < len(data) * 0.9:
+                    self.variants[encoding] = (compressed, f"{self.etag}-{encoding}")
+
+    def negotiate(self, accepts):
+        """按客户端可接受的编码返回 (内容, Content-Encoding, ETag)"""
+        for encoding, (data, etag) in self.variants.items():
+            if accepts(encoding):
+                return data, encoding, etag
+        return self.data, None, self.etag
+
+
+class AssetCache:
+    """静态资源缓存 - 启动时载入index.html和static/下的全部文件
+
+    每个静态文件同时以原路径和带内容哈希的路径（如 js/app.3f2a9c1b.js）提供，
+    index.html中的引用改写为带哈希的路径，浏览器可以永久缓存；index.html本身每次校验ETag。
+    """
+
+    def __init__(self, root_dir='.', static_dir='static', index_file='index.html'):
+        self.root_dir = root_dir
+        self.static_dir = os.path.join(root_dir, static_dir)
+        self.index_path = os.path.join(root_dir, index_file)
+        self.index = None
+        self._assets = {}
+        self._hashed_names = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """（重新）载入全部静态资源"""
+        assets = {}
+        hashed_names = {}
+
+        for root, _, files in os.walk(self.static_dir):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.static_dir).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    data = f.read()
+
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                asset = Asset(name, data, mimetype)
+                base, ext = os.path.splitext(name)
+                hashed_name = f"{base}.{asset.digest[:8]}{ext}"
+
+                assets[name] = asset
+                assets[hashed_name] = asset
+                hashed_names[name] = hashed_name
+
+        index = None
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                html = f.read()
+
+            def rewrite(match):
+                name = hashed_names.get(match.group(2), match.group(2))
+                return f"{match.group(1)}/static/{name}{match.group(3)}"
+
+            html = _STATIC_REF_PATTERN.sub(rewrite, html)
+            index = Asset('index.html', html.encode('utf-8'), 'text/html')
+
+        with self._lock:
+            self._assets = assets
+            self._hashed_names = hashed_names
+            self.index = index
+
+        log.info('静态资源已载入', files=len(hashed_names))
+        return self
+
+    def get(self, name):
+        """按原路径或带哈希的路径获取资源，返回 (资源, 是否为带哈希的路径)"""
+        with self._lock:
+            asset = self._assets.get(name)
+        return asset, asset is not None and name != asset.name
+
+    def url_for(self, name):
+        """静态文件带内容哈希的URL"""
+        with self._lock:
+            return f"/static/{self._hashed_names.get(name, name)}"
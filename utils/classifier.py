@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+
+import yaml
+
+# 默认分类规则：paths匹配接口路径，keywords匹配文件名（文件名中包含文档标题）
+DEFAULT_RULES = [
+    {
+        'category': '聊天模型',
+        'paths': ['/chat'],
+        'keywords': ['chat', '列出可用模型', '聊天接口', '聊天补全', 'Claude', 'Gemini', 'GPTs']
+    },
+    {
+        'category': '图像处理',
+        'paths': ['/image', '/vision'],
+        'keywords': ['image', 'vision', '图片生成', '图片编辑', '图片分析', 'DALL-E', 'Midjourney']
+    },
+    {
+        'category': '音频处理',
+        'paths': ['/audio', '/speech'],
+        'keywords': ['audio', 'speech', '语音合成', '语音识别', '音频转换', 'TTS', 'STT']
+    },
+    {
+        'category': '向量嵌入',
+        'paths': ['/embed'],
+        'keywords': ['embed', '文本嵌入', '向量搜索', 'Embedding']
+    },
+    {
+        'category': '模型管理',
+        'paths': ['/model'],
+        'keywords': ['model', '模型列表', '模型信息', '模型配置']
+    },
+    {
+        'category': '文件处理',
+        'paths': ['/file'],
+        'keywords': ['file', '文件上传', '文件下载', '文件分析']
+    }
+]
+
+
+def _compile_keywords(keyword_priority):
+    """把关键词表编译成一个交替正则
+
+    放在零宽先行断言中，每个位置都尝试匹配（命中的关键词可以重叠）；
+    交替按规则顺序排列，同一位置命中多个关键词时取优先级最高的。
+    """
+    if not keyword_priority:
+        return None
+    keywords = sorted(keyword_priority, key=keyword_priority.get)
+    return re.compile('(?=(' + '|'.join(re.escape(keyword) for keyword in keywords) + '))')
+
+
+class RuleClassifier:
+    """基于规则表的API分类器 - 规则一次性编译成单个正则，结果按文档摘要缓存
+
+    匹配顺序与原逻辑一致：先逐个检查接口路径，再检查文件名；
+    同一处命中多条规则时，以规则表中靠前的规则为准。
+    """
+
+    def __init__(self, rules=None, default='default', cache_size=10000):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.default = default
+        self.cache_size = cache_size
+
+        self._path_priority = {}
+        self._name_priority = {}
+        for priority, rule in enumerate(self.rules):
+            if not rule.get('category'):
+                raise ValueError(f"分类规则缺少category: {rule}")
+            for keyword in rule.get('paths', []):
+                self._path_priority.setdefault(keyword.lower(), priority)
+            for keyword in rule.get('keywords', []):
+                self._name_priority.setdefault(keyword.lower(), priority)
+
+        self._path_pattern = _compile_keywords(self._path_priority)
+        self._name_pattern = _compile_keywords(self._name_priority)
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_path, **kwargs):
+        """从JSON/YAML配置文件加载规则
+
+        配置格式: {"default": "其他", "rules": [{"category": "...", "paths": [...], "keywords": [...]}]}
+        """
+        with open(config_path, 'r', encoding='utf-8') as f:
+            if config_path.endswith('.json'):
+                config = json.load(f)
+            else:
+                config = yaml.safe_load(f)
+
+        if isinstance(config, list):
+            config = {'rules': config}
+
+        kwargs.setdefault('default', config.get('default', 'default'))
+        return cls(rules=config.get('rules', []), **kwargs)
+
+    @classmethod
+    def from_env(cls, env_var='CLASSIFIER_RULES', **kwargs):
+        """环境变量指定配置文件时从文件加载，否则使用默认规则"""
+        config_path = os.environ.get(env_var)
+        if config_path:
+            return cls.from_config(config_path, **kwargs)
+        return cls(**kwargs)
+
+    def _best_match(self, pattern, priority_table, text):
+        """返回文本中命中的最高优先级规则序号"""
+        best = None
+        for keyword in pattern.findall(text.lower()):
+            priority = priority_table[keyword]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return best
+
+    def classify(self, paths, filename, digest=None):
+        """根据接口路径和文件名返回分类名"""
+        if digest is not None:
+            with self._lock:
+                cached = self._cache.get(digest)
+                if cached is not None:
+                    self._cache.move_to_end(digest)
+                    return cached
+
+        category = self._classify(paths, filename)
+
+        if digest is not None:
+            with self._lock:
+                self._cache[digest] = category
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return category
+
+    def _classify(self, paths, filename):
+        # 根据路径特征分类
+        if self._path_pattern is not None:
+            for path in paths:
+                priority = self._best_match(self._path_pattern, self._path_priority, path)
+                if priority is not None:
+                    return self.rules[priority]['category']
+
+        # 根据文件名分类
+        if self._name_pattern is not None and filename:
+            priority = self._best_match(self._name_pattern, self._name_priority, filename)
+            if priority is not None:
+                return self.rules[priority]['category']
+
+        return self.default
+
+    def keyword_mapping(self):
+        """返回 分类名 -> 文件名关键词 的映射"""
+        mapping = {}
+        for rule in self.rules:
+            mapping.setdefault(rule['category'], []).extend(rule.get('keywords', []))
+        return mapping
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_lock', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令行执行抓取流水线（不启动Web服务）
+
+用法：
+    python -m utils https://xxx.apifox.cn --output data/cli --stage2-workers 4 --stage3-workers 4
+
+结果写入 <output>/final，成功时以JSON输出各阶段结果，失败时返回非0退出码。
+"""
+
+import os
+import sys
+import json
+import argparse
+
+from .pipeline import Pipeline
+from .processor import DOCS_ZIP_PATTERN
+from .classifier import RuleClassifier
+from .formats import available_formats, validate_formats
+from .shards import SHARD_MODES
+from .store import STORAGE_BACKENDS
+from .search import FTS5_AVAILABLE
+from .profiling import StageProfiler, parse_modes
+from .workspace import Workspace, sweep_trash, wait_for_deletions
+from .log import setup_logging, get_logger
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"应为正整数: {value}")
+    return number
+
+
+def _formats(value):
+    try:
+        return validate_formats([fmt.strip() for fmt in value.split(',') if fmt.strip()])
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _profile_modes(value):
+    try:
+        return parse_modes(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser():
+    cpu_count = os.cpu_count() or 4
+    parser = argparse.ArgumentParser(
+        prog='python -m utils',
+        description='下载Apifox文档站点的llms.txt和MD文件，转换并合并为OpenAPI文档'
+    )
+    parser.add_argument('url', help='文档站点地址，如 https://xxx.apifox.cn')
+    parser.add_argument('-o', '--output', default='data',
+                        help='工作目录，结果写入其中的final目录（默认: data）')
+    parser.add_argument('--download-workers', type=_positive_int, default=5,
+                        help='并发下载数（默认: 5）')
+    parser.add_argument('--stage2-workers', type=_positive_int, default=1,
+                        help='阶段2并行转换进程数（默认: 1，串行）')
+    parser.add_argument('--stage3-workers', type=_positive_int, default=1,
+                        help='阶段3并行合并进程数（默认: 1，串行）')
+    parser.add_argument('--memory-budget', type=_positive_int, default=None, metavar='MB',
+                        help='阶段3内存预算（MB），超出后中间结果暂存到磁盘，此时串行合并（默认不限制）')
+    parser.add_argument('--storage', choices=STORAGE_BACKENDS, default='files',
+                        help='阶段1/2的文档存储：files为01/02目录，sqlite为 <output>/store.db（默认: files）')
+    parser.add_argument('--export-files', action='store_true',
+                        help='使用sqlite存储时，完成后把文档导出为01/02目录')
+    parser.add_argument('--search-index', action='store_true',
+                        help='转换时更新全文索引 <output>/search.db（需要SQLite FTS5）')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量合并：沿用上次结果，只重新合并输入有变化的分类')
+    parser.add_argument('--formats', type=_formats, default=available_formats(),
+                        help=f"输出格式，逗号分隔（默认: {','.join(available_formats())}）")
+    parser.add_argument('--shard-mode', choices=SHARD_MODES, default=None,
+                        help='分片输出模式（默认不分片）')
+    parser.add_argument('--classifier-rules', default=None,
+                        help='分类规则文件（JSON/YAML），默认使用CLASSIFIER_RULES环境变量或内置规则')
+    parser.add_argument('--zip-level', type=int, default=6, choices=range(0, 10), metavar='0-9',
+                        help='文档ZIP压缩级别（默认: 6）')
+    parser.add_argument('--zip-store', action='store_true', help='文档ZIP只存储不压缩')
+    parser.add_argument('--zip-workers', type=_positive_int, default=cpu_count,
+                        help=f'文档ZIP并行压缩线程数（默认: {cpu_count}）')
+    parser.add_argument('--profile', type=_profile_modes, default=(), metavar='cpu,memory',
+                        help='性能分析，结果写入 <output>/profiles（默认关闭）')
+    parser.add_argument('--log-level', default=None, help='日志级别（默认: LOG_LEVEL环境变量或INFO）')
+    parser.add_argument('--log-format', choices=('text', 'json'), default=None,
+                        help='日志格式（默认: LOG_FORMAT环境变量或text）')
+    return parser
+
+
+def run(args):
+    """按命令行参数执行流水线，返回各阶段结果"""
+    log = get_logger('cli')
+
+    if args.classifier_rules:
+        classifier = RuleClassifier.from_config(args.classifier_rules)
+    else:
+        classifier = RuleClassifier.from_env()
+
+    workspace = Workspace('cli', args.output)
+    workspace.ensure_dirs()
+    sweep_trash(workspace.trash_dir)
+
+    # 与Web服务共用同一目录时，通过目录锁串行执行
+    with workspace.lock:
+        workspace.clean(keep_final=args.incremental)
+
+        pipeline = Pipeline(
+            args.url,
+            workspace.root,
+            processor_options={
+                # 非增量模式只沿用旧的文档ZIP（交给保留策略清理），其余产物全部重新生成
+                'final_dir': workspace.ensure_build(only=None if args.incremental else (DOCS_ZIP_PATTERN,)),
+                'convert_workers': args.stage2_workers,
+                'merge_workers': args.stage3_workers,
+                'memory_budget': args.memory_budget * 1024 * 1024 if args.memory_budget else None,
+                'store': workspace.open_store() if args.storage == 'sqlite' else None,
+                'search_index': workspace.open_search_index() if args.search_index else None,
+                'classifier': classifier,
+                'output_formats': args.formats,
+                'shard_mode': args.shard_mode,
+                'incremental': args.incremental,
+                'zip_compression_level': args.zip_level,
+                'zip_store_only': args.zip_store,
+                'zip_workers': args.zip_workers
+            },
+            download_workers=args.download_workers,
+            report=_report,
+            profiler=StageProfiler(workspace.profile_dir, args.profile)
+        )
+
+        results = pipeline.run()
+        workspace.commit_build()
+        if args.export_files:
+            results['stage2']['exported'] = pipeline.processor.export_files()
+
+    # 构建目录中的路径替换为发布后的final目录
+    for stage, key in (('stage2', 'docs_zip'), ('stage3', 'final_file')):
+        if results[stage].get(key):
+            results[stage][key] = os.path.join(workspace.final_dir, os.path.basename(results[stage][key]))
+    log.info('全部完成', downloaded=results['stage1']['downloaded_files'],
+             merged=results['stage3']['merged_files'], final_file=results['stage3']['final_file'])
+    return results
+
+
+def _report(message=None, log=True, **kwargs):
+    """流水线进度：逐文件的进度（log=False）不输出"""
+    if log and message:
+        get_logger('cli').info(message)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.search_index and not FTS5_AVAILABLE:
+        parser.error('当前SQLite未编译FTS5，无法建立全文索引')
+    setup_logging(level=args.log_level and args.log_level.upper(), fmt=args.log_format, stream=sys.stderr)
+
+    try:
+        results = run(args)
+    except KeyboardInterrupt:
+        get_logger('cli').warning('已中断')
+        return 130
+    except Exception as e:
+        get_logger('cli').exception('执行失败', error=str(e))
+        return 1
+    finally:
+        # 旧目录在后台删除，退出前等待删除完成
+        wait_for_deletions()
+
+    json.dump(results, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    sys.stdout.write('\n')
+    return 0
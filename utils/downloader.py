@@ -9,13 +9,36 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, urlparse
 import re
 
+from .metrics import STAGE_SECONDS, DOCUMENTS, FETCHED_BYTES, FAILURES
+from .profiling import profiled
+from .log import get_logger
+
+log = get_logger('downloader')
+
+
+def _failure_reason(error):
+    """下载失败原因（用于失败计数的标签，取值有限）"""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return f"http_{error.response.status_code}"
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'timeout'
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return 'connection'
+    if isinstance(error, requests.exceptions.RequestException):
+        return 'request'
+    return 'error'
+
+
 class ApiDownloader:
     """API文档下载器"""
     
-    def __init__(self, base_url, output_dir='data/01', max_workers=5):
+    def __init__(self, base_url, output_dir='data/01', max_workers=5, workspace_root=None, store=None):
         self.base_url = base_url.rstrip('/')
-        self.output_dir = output_dir
+        # 指定工作目录时输出到 <workspace_root>/01
+        self.output_dir = os.path.join(workspace_root, '01') if workspace_root else output_dir
         self.max_workers = max_workers
+        # 文档存储（ArtifactStore）：指定时MD文件写入存储而不是 <output_dir>/md
+        self.store = store
         self.session = requests.Session()
         
         # 设置请求头
@@ -31,31 +54,32 @@ class ApiDownloader:
         # 创建输出目录
         os.makedirs(os.path.join(self.output_dir, 'md'), exist_ok=True)
         
-        print(f"下载器初始化完成 - 基础URL: {self.base_url}")
-        print(f"输出目录: {self.output_dir}")
-        print(f"最大并发数: {self.max_workers}")
+        log.info('下载器初始化完成', base_url=self.base_url, output_dir=self.output_dir,
+                 max_workers=self.max_workers)
     
     def download_llms_txt(self):
         """下载llms.txt文件"""
         llms_url = f"{self.base_url}/llms.txt"
         output_file = os.path.join(self.output_dir, 'llms.txt')
         
-        print(f"开始下载llms.txt: {llms_url}")
+        log.info('开始下载llms.txt', url=llms_url)
         
         try:
             response = self.session.get(llms_url, timeout=30)
             response.raise_for_status()
+            FETCHED_BYTES.inc(len(response.content), kind='llms')
             
             # 保存文件
             with open(output_file, 'w', encoding='utf-8') as f:
                 f.write(response.text)
             
-            print(f"llms.txt下载成功: {len(response.text)} 字符")
+            log.info('llms.txt下载成功', chars=len(response.text))
             return response.text
             
         except requests.exceptions.RequestException as e:
+            FAILURES.inc(stage='download', reason=_failure_reason(e))
             error_msg = f"下载llms.txt失败: {str(e)}"
-            print(error_msg)
+            log.error('下载llms.txt失败', url=llms_url, error=str(e))
             raise Exception(error_msg)
     
     def download_single_md(self, url, filename=None):
@@ -76,25 +100,31 @@ class ApiDownloader:
             else:
                 full_url = url
             
-            print(f"下载: {filename} <- {full_url}")
+            log.sample('下载MD文件', filename=filename, url=full_url)
             
             response = self.session.get(full_url, timeout=30)
             response.raise_for_status()
+            FETCHED_BYTES.inc(len(response.content), kind='md')
             
             # 保存文件
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(response.text)
+            if self.store is not None:
+                self.store.put_raw(filename, response.text, full_url)
+            else:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(response.text)
             
+            DOCUMENTS.inc(operation='downloaded')
             return {
                 'filename': filename,
                 'url': full_url,
                 'size': len(response.text),
+                'content': response.text,
                 'success': True
             }
             
         except requests.exceptions.RequestException as e:
-            error_msg = f"下载失败 {filename}: {str(e)}"
-            print(error_msg)
+            FAILURES.inc(stage='download', reason=_failure_reason(e))
+            log.warning('下载失败', filename=filename, error=str(e))
             return {
                 'filename': filename,
                 'url': full_url if 'full_url' in locals() else url,
@@ -102,8 +132,8 @@ class ApiDownloader:
                 'success': False
             }
         except Exception as e:
-            error_msg = f"处理文件失败 {filename}: {str(e)}"
-            print(error_msg)
+            FAILURES.inc(stage='download', reason=_failure_reason(e))
+            log.warning('处理文件失败', filename=filename, error=str(e))
             return {
                 'filename': filename,
                 'url': url,
@@ -111,14 +141,31 @@ class ApiDownloader:
                 'success': False
             }
     
+    @STAGE_SECONDS.timed(stage='download')
     def download_md_files(self, api_links, progress_callback=None):
         """批量下载MD文件"""
-        print(f"开始批量下载 {len(api_links)} 个MD文件...")
+        log.info('开始批量下载MD文件', total=len(api_links))
         
         downloaded_files = []
         failed_files = []
         
+        for result in self.iter_md_files(api_links, progress_callback):
+            # 批量下载只返回统计信息，文件内容已写入磁盘
+            result.pop('content', None)
+            if result['success']:
+                downloaded_files.append(result)
+            else:
+                failed_files.append(result)
+        
+        # 失败的文件在下载时已逐个记录
+        log.info('下载完成', succeeded=len(downloaded_files), failed=len(failed_files))
+        
+        return downloaded_files
+    
+    def iter_md_files(self, api_links, progress_callback=None):
+        """并发下载MD文件，按完成顺序逐个产出结果（成功时包含文件内容content）"""
         # 使用线程池并发下载
+        download = profiled(self.download_single_md)
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             # 提交所有下载任务
             future_to_link = {}
@@ -129,7 +176,7 @@ class ApiDownloader:
                 # 生成安全的文件名
                 safe_filename = self._generate_safe_filename(title, url)
                 
-                future = executor.submit(self.download_single_md, url, safe_filename)
+                future = executor.submit(download, url, safe_filename)
                 future_to_link[future] = link_info
             
             # 收集结果
@@ -139,29 +186,17 @@ class ApiDownloader:
                 completed += 1
                 
                 if result['success']:
-                    downloaded_files.append(result)
-                    print(f"✓ [{completed}/{len(api_links)}] {result['filename']} ({result['size']} 字符)")
-                else:
-                    failed_files.append(result)
-                    print(f"✗ [{completed}/{len(api_links)}] {result['filename']} - {result['error']}")
+                    log.sample('下载进度', completed=completed, total=len(api_links),
+                               filename=result['filename'], chars=result['size'])
                 
                 # 调用进度回调
                 if progress_callback:
                     progress_callback(completed, len(api_links))
                 
+                yield result
+                
                 # 添加小延迟避免过于频繁的请求
                 time.sleep(0.1)
-        
-        print(f"\n下载完成统计:")
-        print(f"成功: {len(downloaded_files)} 个文件")
-        print(f"失败: {len(failed_files)} 个文件")
-        
-        if failed_files:
-            print("\n失败的文件:")
-            for failed in failed_files:
-                print(f"  - {failed['filename']}: {failed['error']}")
-        
-        return downloaded_files
     
     def _generate_safe_filename(self, title, url):
         """生成安全的文件名"""
@@ -189,18 +224,23 @@ class ApiDownloader:
         """验证下载的文件"""
         md_dir = os.path.join(self.output_dir, 'md')
         
-        if not os.path.exists(md_dir):
+        if self.store is not None:
+            files = self.store.document_names()
+        elif not os.path.exists(md_dir):
             return {'total': 0, 'valid': 0, 'invalid': []}
-        
-        files = [f for f in os.listdir(md_dir) if f.endswith('.md')]
+        else:
+            files = [f for f in os.listdir(md_dir) if f.endswith('.md')]
         valid_files = []
         invalid_files = []
         
         for filename in files:
             filepath = os.path.join(md_dir, filename)
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                if self.store is not None:
+                    content = self.store.read_raw(filename)
+                else:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        content = f.read()
                 
                 # 简单验证：检查是否包含基本的markdown内容
                 if len(content) > 100 and ('```' in content or '#' in content):
@@ -217,15 +257,10 @@ class ApiDownloader:
             'invalid': invalid_files
         }
         
-        print(f"\n文件验证结果:")
-        print(f"总文件数: {result['total']}")
-        print(f"有效文件: {result['valid']}")
-        print(f"无效文件: {len(result['invalid'])}")
-        
-        if result['invalid']:
-            print("无效文件列表:")
-            for invalid in result['invalid']:
-                print(f"  - {invalid}")
+        log.info('文件验证结果', total=result['total'], valid=result['valid'],
+                 invalid=len(result['invalid']))
+        for invalid in result['invalid']:
+            log.warning('无效文件', filename=invalid)
         
         return result
     
@@ -240,7 +275,11 @@ class ApiDownloader:
             'total_size': 0
         }
         
-        if os.path.exists(md_dir):
+        if self.store is not None:
+            counts = self.store.counts()
+            stats['md_files_count'] = counts['stage1']['md_files']
+            stats['total_size'] = counts['stage1']['md_bytes']
+        elif os.path.exists(md_dir):
             md_files = [f for f in os.listdir(md_dir) if f.endswith('.md')]
             stats['md_files_count'] = len(md_files)
             
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+from .merger import ComponentRegistry, rewrite_refs
+from .formats import STREAM_SINKS, SPEC_FORMATS
+from .log import get_logger
+
+log = get_logger('emitter')
+
+
+class StreamingSpecWriter:
+    """统一OpenAPI文档的流式写入器 - 按接口逐条写出，不在内存中保留整份文档
+
+    YAML中同一个path只能出现一次，因此跨分类共享的path（deferred_paths）
+    先缓存，在close()时合并后统一写出；其余path收到即写入磁盘。
+    output_path为YAML文件路径，其他格式使用相同文件名、不同扩展名。
+    传入shard_writer时，每个path同时交给分片输出。
+    mapping_factory用于创建存放组件、缓存path和已写出path的映射（默认为dict），
+    deferred_paths可以是集合或以path为键的映射。
+    """
+
+    def __init__(self, output_path, header, deferred_paths=None, formats=('yaml',), shard_writer=None,
+                 mapping_factory=None):
+        new_mapping = mapping_factory or dict
+        self.output_path = output_path
+        self.shard_writer = shard_writer
+        self.header = header
+        self.deferred_paths = deferred_paths if deferred_paths is not None else set()
+        self.registry = ComponentRegistry(mapping_factory)
+        self.path_count = 0
+        self.operation_count = 0
+
+        self._deferred = new_mapping()
+        self._written_paths = new_mapping()
+
+        output_base = os.path.splitext(output_path)[0]
+        self._sinks = {}
+        try:
+            for fmt in formats:
+                sink_path = output_path if fmt == 'yaml' else f"{output_base}.{SPEC_FORMATS[fmt][0]}"
+                self._sinks[fmt] = STREAM_SINKS[fmt](sink_path)
+                self._sinks[fmt].write_header(self.header)
+        except Exception:
+            self.abort()
+            raise
+
+    def add_document(self, document, source=None):
+        """写入一个已合并的文档（通常是一个分类），返回写入的path数量"""
+        ref_map = self.registry.register(document.get('components'), source)
+        paths = document.get('paths') or {}
+
+        for path, methods in paths.items():
+            self.write_path(path, rewrite_refs(methods, ref_map))
+
+        return len(paths)
+
+    def write_path(self, path, methods):
+        """写入单个path下的所有操作"""
+        if path in self._written_paths:
+            # 未预先声明的重复path已经写出，只能忽略并提示
+            log.warning('统一文档中重复的path已忽略', path=path)
+            return
+
+        if path in self.deferred_paths:
+            # 共享path先缓存，关闭时合并写出
+            deferred = self._deferred.get(path) or {}
+            deferred.update(methods or {})
+            self._deferred[path] = deferred
+            return
+
+        self._emit_path(path, methods)
+
+    def _emit_path(self, path, methods):
+        for sink in self._sinks.values():
+            sink.write_path(path, methods)
+        if self.shard_writer is not None:
+            self.shard_writer.write_path(path, methods, self.registry.components)
+
+        self._written_paths[path] = True
+        self.path_count += 1
+        if isinstance(methods, dict):
+            self.operation_count += len(methods)
+
+    def close(self):
+        """写出缓存的共享path和components，并原子替换目标文件"""
+        try:
+            for path, methods in self._deferred.items():
+                self._emit_path(path, methods)
+            self._deferred.clear()
+
+            for sink in self._sinks.values():
+                sink.write_tail(self.registry.components)
+
+            shards = None
+            if self.shard_writer is not None:
+                shards = self.shard_writer.close(self.registry.components)
+        except Exception:
+            self.abort()
+            raise
+
+        for sink in self._sinks.values():
+            sink.close()
+
+        return {
+            'shards': shards,
+            'output_file': self.output_path,
+            'output_files': {fmt: sink.output_path for fmt, sink in self._sinks.items()},
+            'path_count': self.path_count,
+            'operation_count': self.operation_count,
+            'conflicts': self.registry.conflicts
+        }
+
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        for sink in self._sinks.values():
+            sink.abort()
+        if self.shard_writer is not None:
+            self.shard_writer.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        return False
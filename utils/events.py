@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import time
+
+
+def format_sse(data, event=None, event_id=None):
+    """编码一条Server-Sent Events消息"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    lines.extend(f"data: {line}" for line in payload.splitlines())
+    return '\n'.join(lines) + '\n\n'
+
+
+def job_event_stream(job, min_interval=0.25, heartbeat=15.0):
+    """把后台任务的状态变化转成SSE事件流
+
+    两次推送之间至少间隔min_interval秒，期间的多次更新合并为一条（只推送最新状态），
+    任务结束时一定推送最终状态；长时间无变化时发送注释行保持连接。
+    """
+    version = -1
+    yield 'retry: 2000\n\n'
+
+    while True:
+        current = job.wait_for_update(version, timeout=heartbeat)
+        if current == version:
+            yield ': keep-alive\n\n'
+            continue
+
+        state = job.to_dict()
+        version = state['version']
+        # 按同一份快照判断是否结束（快照之后任务才结束时，下一轮再推送最终状态）
+        if state['status'] in ('completed', 'error'):
+            yield format_sse(state, event='done', event_id=version)
+            return
+
+        yield format_sse(state, event='progress', event_id=version)
+        time.sleep(min_interval)
+
+
+class ProgressReporter:
+    """把阶段内的 (已完成数, 总数) 回调映射到任务进度区间 [start, end]"""
+
+    def __init__(self, update, start, end, label):
+        self.update = update
+        self.start = start
+        self.end = end
+        self.label = label
+
+    def __call__(self, done, total):
+        if not total:
+            return
+        progress = self.start + (self.end - self.start) * done // total
+        self.update(message=f"{self.label} {done}/{total}", progress=progress)
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import struct
+import datetime
+
+import yaml
+
+from .metrics import YAML_SECONDS
+
+# 可选依赖：orjson（快速JSON编码），msgpack（MessagePack编码）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# 支持的输出格式: 格式名 -> (扩展名, MIME类型)
+SPEC_FORMATS = {
+    'yaml': ('yaml', 'text/yaml'),
+    'json': ('json', 'application/json'),
+    'msgpack': ('msgpack', 'application/msgpack'),
+    'cbor': ('cbor', 'application/cbor')
+}
+
+
+class NoAliasDumper(yaml.Dumper):
+    """不生成锚点/别名的Dumper（合并后共享的对象需要原样展开）"""
+
+    def ignore_aliases(self, data):
+        return True
+
+
+def dump_yaml(data, stream=None):
+    """按项目统一格式输出YAML"""
+    with YAML_SECONDS.time(operation='dump'):
+        return yaml.dump(data, stream, Dumper=NoAliasDumper, default_flow_style=False,
+                         allow_unicode=True, sort_keys=False)
+
+
+def load_yaml(content):
+    """解析YAML文本（记录解析耗时）"""
+    with YAML_SECONDS.time(operation='parse'):
+        return yaml.safe_load(content)
+
+
+def available_formats():
+    """返回当前环境可用的输出格式"""
+    return [fmt for fmt in SPEC_FORMATS if fmt != 'msgpack' or msgpack is not None]
+
+
+def validate_formats(formats):
+    """校验输出格式列表，YAML始终输出"""
+    result = ['yaml']
+    for fmt in formats or ():
+        fmt = fmt.strip().lower()
+        if not fmt or fmt in result:
+            continue
+        if fmt not in SPEC_FORMATS:
+            raise ValueError(f"不支持的输出格式: {fmt}")
+        if fmt == 'msgpack' and msgpack is None:
+            raise ValueError("输出msgpack格式需要安装msgpack")
+        result.append(fmt)
+    return result
+
+
+def _json_default(obj):
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps_json(data):
+    """编码为JSON字节串（优先使用orjson）"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'),
+                      default=_json_default).encode('utf-8')
+
+
+def _plain(obj):
+    """转换为二进制编码通用的数据：键统一为字符串，日期转ISO字符串"""
+    if isinstance(obj, dict):
+        return {key if isinstance(key, str) else _plain_key(key): _plain(value)
+                for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(item) for item in obj]
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    return obj
+
+
+def _plain_key(key):
+    if isinstance(key, bool):
+        return 'true' if key else 'false'
+    if key is None:
+        return 'null'
+    return str(key)
+
+
+_TAGGED_KEYS = ('__date__', '__datetime__', '__items__')
+
+
+def _tag(obj):
+    """把JSON无法原样表示的值（非字符串键、日期）转成带标记的对象"""
+    if isinstance(obj, dict):
+        if all(isinstance(key, str) for key in obj) \
+                and not (len(obj) == 1 and next(iter(obj)) in _TAGGED_KEYS):
+            return {key: _tag(value) for key, value in obj.items()}
+        return {'__items__': [[_tag(key), _tag(value)] for key, value in obj.items()]}
+    if isinstance(obj, (list, tuple)):
+        return [_tag(item) for item in obj]
+    if isinstance(obj, datetime.datetime):
+        return {'__datetime__': obj.isoformat()}
+    if isinstance(obj, datetime.date):
+        return {'__date__': obj.isoformat()}
+    return obj
+
+
+def _untag(obj):
+    if isinstance(obj, dict):
+        if len(obj) == 1:
+            key, value = next(iter(obj.items()))
+            if key == '__items__':
+                return {_untag(k): _untag(v) for k, v in value}
+            if key == '__datetime__':
+                return datetime.datetime.fromisoformat(value)
+            if key == '__date__':
+                return datetime.date.fromisoformat(value)
+        return {key: _untag(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_untag(item) for item in obj]
+    return obj
+
+
+def dumps_tagged_json(data):
+    """编码为可无损还原的JSON字节串（保留非字符串键和日期类型，用于内部缓存）
+
+    包含其他JSON无法表示的类型时抛出TypeError。
+    """
+    return json.dumps(_tag(data), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads_tagged_json(raw):
+    """解析dumps_tagged_json的输出"""
+    return _untag(json.loads(raw))
+
+
+def dumps_msgpack(data):
+    """编码为MessagePack字节串"""
+    if msgpack is None:
+        raise RuntimeError("输出msgpack格式需要安装msgpack")
+    return msgpack.packb(_plain(data), use_bin_type=True, default=_json_default)
+
+
+def _cbor_head(major, value):
+    if value < 24:
+        return bytes([(major << 5) | value])
+    if value < 0x100:
+        return bytes([(major << 5) | 24, value])
+    if value < 0x10000:
+        return bytes([(major << 5) | 25]) + struct.pack('>H', value)
+    if value < 0x100000000:
+        return bytes([(major << 5) | 26]) + struct.pack('>I', value)
+    return bytes([(major << 5) | 27]) + struct.pack('>Q', value)
+
+
+def _cbor_encode(obj, out):
+    if isinstance(obj, str):
+        data = obj.encode('utf-8')
+        out.append(_cbor_head(3, len(data)))
+        out.append(data)
+    elif obj is True:
+        out.append(b'\xf5')
+    elif obj is False:
+        out.append(b'\xf4')
+    elif obj is None:
+        out.append(b'\xf6')
+    elif isinstance(obj, int):
+        if 0 <= obj < 2 ** 64:
+            out.append(_cbor_head(0, obj))
+        elif -2 ** 64 <= obj < 0:
+            out.append(_cbor_head(1, -1 - obj))
+        else:
+            _cbor_encode(str(obj), out)
+    elif isinstance(obj, float):
+        out.append(b'\xfb' + struct.pack('>d', obj))
+    elif isinstance(obj, dict):
+        out.append(_cbor_head(5, len(obj)))
+        for key, value in obj.items():
+            _cbor_encode(key if isinstance(key, str) else _plain_key(key), out)
+            _cbor_encode(value, out)
+    elif isinstance(obj, (list, tuple)):
+        out.append(_cbor_head(4, len(obj)))
+        for item in obj:
+            _cbor_encode(item, out)
+    elif isinstance(obj, bytes):
+        out.append(_cbor_head(2, len(obj)))
+        out.append(obj)
+    else:
+        _cbor_encode(_json_default(obj), out)
+
+
+def dumps_cbor(data):
+    """编码为CBOR字节串（RFC 8949，内置实现，无需额外依赖）"""
+    out = []
+    _cbor_encode(data, out)
+    return b''.join(out)
+
+
+def write_spec(data, output_base, fmt):
+    """按格式写出规范文档，output_base不含扩展名，返回文件路径"""
+    ext = SPEC_FORMATS[fmt][0]
+    # YAML分类文件沿用原有的.yml扩展名
+    output_path = f"{output_base}.yml" if fmt == 'yaml' else f"{output_base}.{ext}"
+
+    if fmt == 'yaml':
+        with open(output_path, 'w', encoding='utf-8') as f:
+            dump_yaml(data, f)
+        return output_path
+
+    if fmt == 'json':
+        payload = dumps_json(data)
+    elif fmt == 'msgpack':
+        payload = dumps_msgpack(data)
+    else:
+        payload = dumps_cbor(data)
+
+    with open(output_path, 'wb') as f:
+        f.write(payload)
+    return output_path
+
+
+# ---------------------------------------------------------------------------
+# 流式输出：供StreamingSpecWriter按path逐条写出统一文档
+# components的各部分可以是dict以外的映射（如磁盘映射），此时逐个组件写出
+# ---------------------------------------------------------------------------
+
+def _plain_components(components):
+    return all(isinstance(items, dict) for items in components.values())
+
+
+def _yaml_key(key):
+    """YAML映射键（不含冒号）"""
+    return dump_yaml({key: None})[:-len(': null\n')]
+
+
+def _indent(chunk, prefix):
+    return ''.join(f'{prefix}{line}' if line.strip() else line for line in chunk.splitlines(True))
+
+
+def _msgpack_map_head(count):
+    if count < 16:
+        return bytes([0x80 | count])
+    if count < 0x10000:
+        return b'\xde' + struct.pack('>H', count)
+    return b'\xdf' + struct.pack('>I', count)
+
+
+def _cbor_map_head(count):
+    return _cbor_head(5, count)
+
+
+# 二进制格式的 (编码函数, 定长map头)
+_BINARY_ENCODERS = {
+    'msgpack': (dumps_msgpack, _msgpack_map_head),
+    'cbor': (dumps_cbor, _cbor_map_head)
+}
+
+
+def _iter_binary_map(mapping, fmt, depth):
+    """逐项编码映射，前depth层逐项展开（可以是磁盘映射），字节与整体编码时相同"""
+    dumps, map_head = _BINARY_ENCODERS[fmt]
+    yield map_head(len(mapping))
+    for key, value in mapping.items():
+        yield dumps(key if isinstance(key, str) else _plain_key(key))
+        if depth > 1 and hasattr(value, 'items'):
+            yield from _iter_binary_map(value, fmt, depth - 1)
+        else:
+            yield dumps(value)
+
+
+class YamlSink:
+    """YAML流式输出"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.tmp_path = f"{output_path}.tmp"
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+        self._paths_started = False
+
+    def write_header(self, header):
+        dump_yaml(header, self._file)
+
+    def write_path(self, path, methods):
+        if not self._paths_started:
+            self._file.write('paths:\n')
+            self._paths_started = True
+
+        # 作为paths的子项整体缩进两格
+        self._file.write(_indent(dump_yaml({path: methods}), '  '))
+
+    def write_tail(self, components):
+        if not self._paths_started:
+            self._file.write('paths: {}\n')
+        if not components:
+            return
+        if _plain_components(components):
+            dump_yaml({'components': components}, self._file)
+            return
+
+        self._file.write('components:\n')
+        for section, items in components.items():
+            if not items:
+                self._file.write(f'  {_yaml_key(section)}: {{}}\n')
+                continue
+            self._file.write(f'  {_yaml_key(section)}:\n')
+            for name, item in items.items():
+                self._file.write(_indent(dump_yaml({name: item}), '    '))
+
+    def close(self):
+        self._file.close()
+        os.replace(self.tmp_path, self.output_path)
+
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class _BinarySink(YamlSink):
+    """二进制流式输出的公共部分"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.tmp_path = f"{output_path}.tmp"
+        self._file = open(self.tmp_path, 'wb')
+        self._path_count = 0
+
+
+class JsonSink(_BinarySink):
+    """JSON流式输出"""
+
+    def write_header(self, header):
+        # 去掉头部对象的右括号，接着写paths
+        head = dumps_json(header)[:-1]
+        self._file.write(head + (b',' if len(head) > 1 else b'') + b'"paths":{')
+
+    def write_path(self, path, methods):
+        if self._path_count:
+            self._file.write(b',')
+        self._file.write(dumps_json(path) + b':' + dumps_json(methods))
+        self._path_count += 1
+
+    def write_tail(self, components):
+        self._file.write(b'}')
+        if components and _plain_components(components):
+            self._file.write(b',"components":' + dumps_json(components))
+        elif components:
+            self._file.write(b',"components":{')
+            for index, (section, items) in enumerate(components.items()):
+                self._file.write((b',' if index else b'') + dumps_json(section) + b':{')
+                for item_index, (name, item) in enumerate(items.items()):
+                    self._file.write((b',' if item_index else b'') + dumps_json(name) + b':' + dumps_json(item))
+                self._file.write(b'}')
+            self._file.write(b'}')
+        self._file.write(b'}')
+
+
+class CborSink(_BinarySink):
+    """CBOR流式输出（使用不定长map，无需预先知道path数量）"""
+
+    def write_header(self, header):
+        self._file.write(b'\xbf')
+        for key, value in header.items():
+            self._file.write(dumps_cbor(key) + dumps_cbor(value))
+        self._file.write(dumps_cbor('paths') + b'\xbf')
+
+    def write_path(self, path, methods):
+        self._file.write(dumps_cbor(path) + dumps_cbor(methods))
+
+    def write_tail(self, components):
+        self._file.write(b'\xff')
+        if components:
+            # 组件数量已知，使用定长map（与整体编码相同）
+            self._file.write(dumps_cbor('components'))
+            self._file.writelines(_iter_binary_map(components, 'cbor', depth=2))
+        self._file.write(b'\xff')
+
+
+class MsgpackSink(_BinarySink):
+    """MessagePack流式输出（先写map32占位，结束时回填数量）"""
+
+    def __init__(self, output_path):
+        if msgpack is None:
+            raise RuntimeError("输出msgpack格式需要安装msgpack")
+        super().__init__(output_path)
+        self._header_size = 0
+        self._paths_offset = None
+
+    def write_header(self, header):
+        self._header_size = len(header)
+        # 顶层map数量在结束时回填
+        self._file.write(b'\xdf' + struct.pack('>I', 0))
+        for key, value in header.items():
+            self._file.write(dumps_msgpack(key) + dumps_msgpack(value))
+        self._file.write(dumps_msgpack('paths'))
+        self._paths_offset = self._file.tell()
+        self._file.write(b'\xdf' + struct.pack('>I', 0))
+
+    def write_path(self, path, methods):
+        self._file.write(dumps_msgpack(path) + dumps_msgpack(methods))
+        self._path_count += 1
+
+    def write_tail(self, components):
+        top_count = self._header_size + 1
+        if components:
+            # 组件数量已知，使用最短的map头（与整体编码相同）
+            self._file.write(dumps_msgpack('components'))
+            self._file.writelines(_iter_binary_map(components, 'msgpack', depth=2))
+            top_count += 1
+
+        self._file.seek(self._paths_offset + 1)
+        self._file.write(struct.pack('>I', self._path_count))
+        self._file.seek(1)
+        self._file.write(struct.pack('>I', top_count))
+        self._file.seek(0, os.SEEK_END)
+
+
+STREAM_SINKS = {
+    'yaml': YamlSink,
+    'json': JsonSink,
+    'msgpack': MsgpackSink,
+    'cbor': CborSink
+}
+
+
+def write_spec_stream(data, output_base, fmt):
+    """与write_spec相同，但按path和组件逐条写出（paths和components的各部分可以是磁盘映射）"""
+    ext = SPEC_FORMATS[fmt][0]
+    output_path = f"{output_base}.yml" if fmt == 'yaml' else f"{output_base}.{ext}"
+
+    if fmt in _BINARY_ENCODERS:
+        # 各层数量都已知：逐项写出定长map，文件与write_spec完全相同
+        with open(output_path, 'wb') as f:
+            f.writelines(_iter_binary_map(data, fmt, depth=3))
+        return output_path
+
+    header = {key: value for key, value in data.items() if key not in ('paths', 'components')}
+    sink = STREAM_SINKS[fmt](output_path)
+    try:
+        sink.write_header(header)
+        for path, methods in (data.get('paths') or {}).items():
+            sink.write_path(path, methods)
+        sink.write_tail(data.get('components'))
+    except Exception:
+        sink.abort()
+        raise
+    sink.close()
+    return output_path
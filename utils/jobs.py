@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import uuid
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from .log import get_logger
+
+log = get_logger('jobs')
+
+
+class QueueFullError(Exception):
+    """任务队列已满"""
+
+
+class Job:
+    """后台任务 - 记录状态、进度和结果"""
+
+    def __init__(self, kind, params=None, store=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params or {}
+        self.status = 'queued'
+        self.stage = None
+        self.progress = 0
+        self.message = '排队中...'
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat(timespec='seconds')
+        self.started_at = None
+        self.finished_at = None
+        # 每次状态变化递增，供事件流等待新进度
+        self.version = 0
+        self._lock = threading.Condition()
+        # 共享存储（多进程部署时其他进程从存储读取状态），记录执行任务的进程
+        self.store = store
+        self.owner_pid = os.getpid()
+        self._saved_at = 0
+
+    def update(self, status=None, message=None, progress=None, result=None, error=None, stage=None):
+        """更新任务状态（工作线程中调用）"""
+        with self._lock:
+            if status is not None:
+                self.status = status
+            if stage is not None:
+                self.stage = stage
+            if message is not None:
+                self.message = message
+            if progress is not None:
+                self.progress = progress
+            if result is not None:
+                self.result = result
+            if error is not None:
+                self.error = error
+            self.version += 1
+            self._lock.notify_all()
+
+        # 只有进度变化时按间隔合并写入，状态和结果变化立即写入
+        if self.store is not None:
+            force = status is not None or result is not None or error is not None or stage is not None
+            if force or time.monotonic() - self._saved_at >= self.store.flush_interval:
+                self.save()
+
+    def save(self):
+        """写入共享存储"""
+        self._saved_at = time.monotonic()
+        self.store.save_job(self.to_dict())
+
+    def wait_for_update(self, version, timeout=None):
+        """等待状态版本超过version（或超时），返回当前版本"""
+        with self._lock:
+            self._lock.wait_for(lambda: self.version > version, timeout=timeout)
+            return self.version
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'error')
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'version': self.version,
+                'kind': self.kind,
+                'params': self.params,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': self.progress,
+                'message': self.message,
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'owner_pid': self.owner_pid
+            }
+
+
+class StoredJob:
+    """其他进程中执行的任务 - 从共享存储读取状态（只读）"""
+
+    def __init__(self, store, state, poll_interval=0.5):
+        self.store = store
+        self.id = state['job_id']
+        self.poll_interval = poll_interval
+        self._state = state
+        self._loaded_at = time.monotonic()
+
+    def _refresh(self):
+        if time.monotonic() - self._loaded_at >= self.poll_interval:
+            state = self.store.load_job(self.id)
+            if state is not None:
+                self._state = state
+            self._loaded_at = time.monotonic()
+        if self._state['status'] in ('queued', 'running') and not pid_alive(self._state.get('owner_pid')):
+            # 执行任务的进程已退出（重启或崩溃），任务不会再有进展
+            self._state = dict(self._state, status='error', error='执行任务的进程已退出',
+                               version=self._state['version'] + 1)
+            self.store.save_job(self._state)
+        return self._state
+
+    @property
+    def status(self):
+        return self._state['status']
+
+    @property
+    def created_at(self):
+        return self._state['created_at']
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'error')
+
+    def wait_for_update(self, version, timeout=None):
+        """轮询存储直到状态版本超过version（或超时）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._refresh()['version']
+            if current > version or (deadline is not None and time.monotonic() >= deadline):
+                return current
+            time.sleep(self.poll_interval)
+
+    def to_dict(self):
+        return dict(self._refresh())
+
+
+def pid_alive(pid):
+    if not pid:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class JobQueue:
+    """后台任务队列 - 固定大小的工作线程池，排队任务数有上限"""
+
+    def __init__(self, max_workers=2, max_pending=20, history_size=200, store=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, func, *args, params=None, **kwargs):
+        """提交任务，func的第一个参数为Job对象，返回值作为任务结果"""
+        with self._lock:
+            if self._pending_count() >= self.max_pending:
+                raise QueueFullError(f"任务队列已满（{self.max_pending}个排队中），请稍后重试")
+
+            job = Job(kind, params, store=self.store)
+            self._jobs[job.id] = job
+            self._prune()
+
+        if self.store is not None:
+            job.save()
+            self.store.prune_jobs(self.history_size)
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        job.started_at = datetime.now().isoformat(timespec='seconds')
+        job.update(status='running', message='执行中...')
+        try:
+            result = func(job, *args, **kwargs)
+            job.finished_at = datetime.now().isoformat(timespec='seconds')
+            job.update(status='completed', progress=100, result=result)
+        except Exception as e:
+            log.exception('后台任务失败', job_id=job.id, kind=job.kind, error=str(e))
+            job.finished_at = datetime.now().isoformat(timespec='seconds')
+            job.update(status='error', error=str(e))
+
+    def get(self, job_id):
+        """获取任务，本进程没有时从共享存储查找"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            state = self.store.load_job(job_id)
+            if state is not None:
+                job = StoredJob(self.store, state)
+        return job
+
+    def list(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if self.store is not None:
+            local_ids = {job.id for job in jobs}
+            jobs.extend(StoredJob(self.store, state)
+                        for state in self.store.list_jobs(self.history_size)
+                        if state['job_id'] not in local_ids)
+            jobs.sort(key=lambda job: job.created_at)
+        return jobs
+
+    def _pending_count(self):
+        return sum(1 for job in self._jobs.values() if job.status == 'queued')
+
+    def queue_depth(self):
+        """排队中和执行中的任务数"""
+        if self.store is not None:
+            # 多进程部署时统计所有进程的任务
+            counts = self.store.count_jobs()
+            return {'queued': counts.get('queued', 0), 'running': counts.get('running', 0),
+                    'workers': self.max_workers}
+
+        with self._lock:
+            queued = self._pending_count()
+            running = sum(1 for job in self._jobs.values() if job.status == 'running')
+        return {'queued': queued, 'running': running, 'workers': self.max_workers}
+
+    def _prune(self):
+        """只保留最近的已完成任务记录"""
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job.id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+
+class JobStore:
+    """共享任务状态存储（SQLite）- 多进程部署时任一进程都能查询任务和工作目录状态
+
+    每个线程使用独立连接，数据库开启WAL以支持多进程并发读写。
+    """
+
+    def __init__(self, db_path, flush_interval=0.5):
+        self.db_path = db_path
+        # 进度类更新的最小写入间隔（秒），状态变化和结果总是立即写入
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            data TEXT NOT NULL
+        )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at)')
+        conn.execute('''CREATE TABLE IF NOT EXISTS states (
+            key TEXT PRIMARY KEY,
+            updated_at REAL NOT NULL,
+            data TEXT NOT NULL
+        )''')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def save_job(self, state):
+        """保存任务状态（state为Job.to_dict()的结果）"""
+        self._connect().execute(
+            'INSERT OR REPLACE INTO jobs (id, status, created_at, data) VALUES (?, ?, ?, ?)',
+            (state['job_id'], state['status'], state['created_at'],
+             json.dumps(state, ensure_ascii=False, default=str))
+        )
+
+    def load_job(self, job_id):
+        row = self._connect().execute('SELECT data FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_jobs(self, limit=200):
+        rows = self._connect().execute(
+            'SELECT data FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def count_jobs(self):
+        """按状态统计任务数"""
+        rows = self._connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return dict(rows)
+
+    def prune_jobs(self, history_size):
+        """只保留最近的已完成任务记录"""
+        self._connect().execute(
+            '''DELETE FROM jobs WHERE status IN ('completed', 'error') AND id NOT IN (
+                SELECT id FROM jobs WHERE status IN ('completed', 'error')
+                ORDER BY created_at DESC LIMIT ?)''',
+            (history_size,)
+        )
+
+    def save_state(self, key, data, updated_at=None):
+        """保存工作目录的任务状态"""
+        self._connect().execute(
+            'INSERT OR REPLACE INTO states (key, updated_at, data) VALUES (?, ?, ?)',
+            (key, updated_at or time.time(), json.dumps(data, ensure_ascii=False, default=str))
+        )
+
+    def load_state(self, key):
+        """返回 (updated_at, data)，不存在时返回 (None, None)"""
+        row = self._connect().execute(
+            'SELECT updated_at, data FROM states WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        return row[0], json.loads(row[1])
+
+    def list_states(self, prefix):
+        """返回键以prefix开头的全部状态 [(key, updated_at, data)]"""
+        rows = self._connect().execute(
+            'SELECT key, updated_at, data FROM states WHERE substr(key, 1, ?) = ?',
+            (len(prefix), prefix)
+        ).fetchall()
+        return [(key, updated_at, json.loads(data)) for key, updated_at, data in rows]
+
+    def delete_state(self, key):
+        self._connect().execute('DELETE FROM states WHERE key = ?', (key,))
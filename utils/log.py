@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import itertools
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# 日志级别（DEBUG时输出逐文件日志）、格式（text / json）和逐文件日志的采样间隔
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+LOG_SAMPLE_EVERY = max(1, int(os.environ.get('LOG_SAMPLE_EVERY', '100')))
+
+_ROOT_LOGGER = 'apifox'
+
+_setup_lock = threading.Lock()
+_listener = None
+_loggers = {}
+
+
+class TextFormatter(logging.Formatter):
+    """文本格式：时间 级别 模块: 消息 key=value ..."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s', '%Y-%m-%d %H:%M:%S')
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON格式：每条日志一行，附加字段与消息同级"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """只在调用线程中合成消息文本，时间、字段和异常的格式化都在后台线程中完成"""
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _formatter(fmt):
+    return JsonFormatter() if fmt == 'json' else TextFormatter()
+
+
+def _direct_handler(stream, fmt):
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(_formatter(fmt))
+    return handler
+
+
+def setup_logging(level=None, fmt=None, stream=None):
+    """配置日志：调用方只把日志记录放入队列，由后台线程统一写出
+
+    重复调用时按新参数重新配置。子进程（fork）中改为直接写出。
+    """
+    global _listener
+
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+
+        fmt = fmt or LOG_FORMAT
+        log_queue = queue.SimpleQueue()
+        _listener = QueueListener(log_queue, _direct_handler(stream, fmt))
+        _listener.start()
+
+        root = logging.getLogger(_ROOT_LOGGER)
+        root.handlers[:] = [_QueueHandler(log_queue)]
+        root.setLevel(level or LOG_LEVEL)
+        root.propagate = False
+
+        def after_fork():
+            # 后台写出线程不会随fork复制到子进程
+            root.handlers[:] = [_direct_handler(stream, fmt)]
+
+        root._apifox_after_fork = after_fork
+    return root
+
+
+def _after_fork_in_child():
+    global _listener
+    _listener = None
+    after_fork = getattr(logging.getLogger(_ROOT_LOGGER), '_apifox_after_fork', None)
+    if after_fork is not None:
+        after_fork()
+
+
+def _shutdown():
+    # 退出前写出队列中剩余的日志
+    if _listener is not None:
+        _listener.stop()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(_shutdown)
+
+
+class Logger:
+    """结构化日志：log.info('下载完成', filename=..., size=...)，字段单独输出便于检索"""
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(f'{_ROOT_LOGGER}.{name}')
+        self._counters = {}
+
+    def _log(self, level, msg, fields, exc_info=False):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, msg, extra={'fields': fields}, exc_info=exc_info, stacklevel=3)
+
+    def is_enabled_for(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def debug(self, msg, **fields):
+        self._log(logging.DEBUG, msg, fields)
+
+    def info(self, msg, **fields):
+        self._log(logging.INFO, msg, fields)
+
+    def warning(self, msg, **fields):
+        self._log(logging.WARNING, msg, fields)
+
+    def error(self, msg, **fields):
+        self._log(logging.ERROR, msg, fields)
+
+    def exception(self, msg, **fields):
+        """ERROR级别，附带当前异常的堆栈"""
+        self._log(logging.ERROR, msg, fields, exc_info=True)
+
+    def sample(self, msg, **fields):
+        """逐文件日志：DEBUG级别，同一消息每LOG_SAMPLE_EVERY条只输出一条
+
+        msg应为固定文本（文件名等放在字段中），未开启DEBUG时几乎没有开销。
+        """
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return
+        counter = self._counters.get(msg)
+        if counter is None:
+            counter = self._counters.setdefault(msg, itertools.count())
+        if next(counter) % LOG_SAMPLE_EVERY:
+            return
+        if LOG_SAMPLE_EVERY > 1:
+            fields['sampled'] = f'1/{LOG_SAMPLE_EVERY}'
+        self._log(logging.DEBUG, msg, fields)
+
+
+def get_logger(name):
+    """按模块名获取日志（首次使用时按环境变量配置日志输出）"""
+    with _setup_lock:
+        configured = _listener is not None
+    if not configured:
+        setup_logging()
+
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers.setdefault(name, Logger(name))
+    return logger
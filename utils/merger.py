@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import hashlib
+from collections.abc import Mapping
+
+def content_digest(obj):
+    """计算对象的结构摘要（键顺序无关）"""
+    canonical = json.dumps(obj, sort_keys=True, ensure_ascii=False,
+                           separators=(',', ':'), default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def component_ref(section, name):
+    """生成components引用路径"""
+    return f'#/components/{section}/{name}'
+
+
+def rewrite_refs(obj, ref_map):
+    """按映射表重写对象中的$ref，未变化的子树原样返回（不复制）"""
+    if not ref_map:
+        return obj
+
+    if isinstance(obj, dict):
+        changed = False
+        result = {}
+        for key, value in obj.items():
+            if key == '$ref' and isinstance(value, str) and value in ref_map:
+                new_value = ref_map[value]
+            else:
+                new_value = rewrite_refs(value, ref_map)
+            if new_value is not value:
+                changed = True
+            result[key] = new_value
+        return result if changed else obj
+
+    if isinstance(obj, list):
+        items = [rewrite_refs(item, ref_map) for item in obj]
+        if any(new is not old for new, old in zip(items, obj)):
+            return items
+        return obj
+
+    return obj
+
+
+def collect_refs(obj, refs=None):
+    """收集对象中出现的所有$ref"""
+    if refs is None:
+        refs = set()
+
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key == '$ref' and isinstance(value, str):
+                refs.add(value)
+            else:
+                collect_refs(value, refs)
+    elif isinstance(obj, list):
+        for item in obj:
+            collect_refs(item, refs)
+
+    return refs
+
+
+class ComponentRegistry:
+    """components注册表 - 结构相同的组件只保留一份，同名不同内容的组件自动改名
+
+    mapping_factory用于创建存放组件的映射（默认为dict，内存预算模式下为磁盘映射）。
+    """
+
+    def __init__(self, mapping_factory=None):
+        self._new_mapping = mapping_factory or dict
+        self.components = {}
+        self._names_by_digest = self._new_mapping()
+        self.conflicts = []
+        self.stats = {'registered': 0, 'deduplicated': 0, 'renamed': 0}
+
+    def _resolve(self, section, name, digest, pending):
+        """确定组件在合并结果中的名称（不修改注册表）"""
+        existing = self._names_by_digest.get((section, digest))
+        if existing is not None:
+            return existing, 'deduplicated'
+
+        for pending_name, pending_digest in pending.get(section, {}).items():
+            if pending_digest == digest:
+                return pending_name, 'deduplicated'
+
+        section_items = self.components.get(section, {})
+        if name not in section_items and name not in pending.get(section, {}):
+            return name, 'registered'
+
+        # 同名不同内容：以内容摘要作为后缀改名
+        candidate = f'{name}_{digest[:8]}'
+        suffix = 8
+        while candidate in section_items or candidate in pending.get(section, {}):
+            suffix += 1
+            candidate = f'{name}_{digest[:suffix]}'
+        return candidate, 'renamed'
+
+    def register(self, components, source=None):
+        """注册一个文档的components，返回需要在该文档中重写的引用映射"""
+        if not isinstance(components, Mapping):
+            return {}
+
+        local = {}
+        for section, items in components.items():
+            if isinstance(items, Mapping) and items:
+                local[section] = items
+
+        ref_map = {}
+        # 组件之间可能互相引用，重写引用后摘要会变化，迭代到映射稳定为止
+        # （决定只记录名称和摘要，组件内容在最后写入时再重写一次，避免同时持有全部组件）
+        for _ in range(len(local.get('schemas', {})) + 2):
+            decisions = {}
+            pending = {}
+            new_map = {}
+            for section, items in local.items():
+                for name, item in items.items():
+                    item = rewrite_refs(item, ref_map)
+                    digest = content_digest(item)
+                    target, action = self._resolve(section, name, digest, pending)
+                    if action != 'deduplicated':
+                        pending.setdefault(section, {})[target] = digest
+                    decisions[(section, name)] = (target, action, digest)
+                    if target != name:
+                        new_map[component_ref(section, name)] = component_ref(section, target)
+            if new_map == ref_map:
+                break
+            ref_map = new_map
+
+        for (section, name), (target, action, digest) in decisions.items():
+            if action == 'deduplicated':
+                self.stats['deduplicated'] += 1
+                continue
+
+            section_items = self.components.get(section)
+            if section_items is None:
+                section_items = self.components[section] = self._new_mapping()
+            section_items[target] = rewrite_refs(local[section][name], ref_map)
+            self._names_by_digest[(section, digest)] = target
+            self.stats[action] += 1
+
+            if action == 'renamed':
+                self.conflicts.append({
+                    'type': 'component',
+                    'section': section,
+                    'name': name,
+                    'renamed_to': target,
+                    'source': source
+                })
+
+        return ref_map
+
+
+class SpecMerger:
+    """OpenAPI文档合并器 - 同时合并paths和components，并重写引用
+
+    mapping_factory用于创建存放paths和组件的映射（默认为dict）。映射中取出的值可能是副本，
+    因此修改后总是重新赋值。
+    """
+
+    def __init__(self, registry=None, mapping_factory=None):
+        new_mapping = mapping_factory or dict
+        self.registry = registry or ComponentRegistry(mapping_factory)
+        self.paths = new_mapping()
+        self.conflicts = self.registry.conflicts
+        self._operation_sources = new_mapping()
+        self._operation_digests = new_mapping()
+        self.document_count = 0
+
+    def add_document(self, document, source=None):
+        """合并单个OpenAPI文档，返回本次合并的路径数量"""
+        if not isinstance(document, dict):
+            return 0
+
+        ref_map = self.registry.register(document.get('components'), source)
+        paths = document.get('paths') or {}
+
+        for path, methods in paths.items():
+            methods = rewrite_refs(methods, ref_map)
+            merged_methods = self.paths.get(path)
+            if merged_methods is None:
+                self.paths[path] = dict(methods) if isinstance(methods, dict) else methods
+                if isinstance(methods, dict):
+                    for method in methods:
+                        self._operation_sources[(path, method)] = source
+                continue
+
+            if not isinstance(methods, dict) or not isinstance(merged_methods, dict):
+                continue
+
+            # 合并HTTP方法，内容不同的重复接口以后出现的为准并记录冲突
+            for method, details in methods.items():
+                key = (path, method)
+                existing = merged_methods.get(method)
+                if existing is not None and existing is not details:
+                    old_digest = self._operation_digests.get(key) or content_digest(existing)
+                    new_digest = content_digest(details)
+                    if old_digest != new_digest:
+                        self.conflicts.append({
+                            'type': 'operation',
+                            'path': path,
+                            'method': method,
+                            'sources': [self._operation_sources.get(key), source]
+                        })
+                    self._operation_digests[key] = new_digest
+                merged_methods[method] = details
+                self._operation_sources[key] = source
+            self.paths[path] = merged_methods
+
+        self.document_count += 1
+        return len(paths)
+
+    def build(self, base=None):
+        """生成合并后的完整文档"""
+        merged = dict(base or {})
+        merged['paths'] = self.paths
+        if self.registry.components:
+            merged['components'] = self.registry.components
+        return merged
+
+    def summary(self):
+        """合并统计信息"""
+        stats = dict(self.registry.stats)
+        stats.update({
+            'documents': self.document_count,
+            'paths': len(self.paths),
+            'conflicts': len(self.conflicts)
+        })
+        return stats
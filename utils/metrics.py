@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import math
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+# 耗时类指标的默认分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    """指标基类 - 按标签值分别计数，线程安全"""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), self._copy(value)] for key, value in self._values.items()]
+        return {'type': self.type, 'help': self.documentation, 'labelnames': list(self.labelnames),
+                'values': values}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(_Metric):
+    """只增不减的计数器（吞吐量用rate()计算）"""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的当前值；设置了取值函数时在采集时计算"""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """function()返回 {标签值元组: 数值}（无标签时可直接返回数值）"""
+        self._function = function
+
+    def snapshot(self):
+        if self._function is None:
+            return super().snapshot()
+        values = self._function()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return {'type': self.type, 'help': self.documentation, 'labelnames': list(self.labelnames),
+                'values': [[list(key), value] for key, value in values.items()], 'live': True}
+
+
+class Histogram(_Metric):
+    """分桶统计（耗时等），值为 [各桶计数..., 总和, 次数]"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """记录代码块耗时（异常退出时同样记录）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels):
+        """记录函数耗时的装饰器"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _copy(value):
+        return list(value)
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot['buckets'] = [_format_value(bound) for bound in self.buckets]
+        return snapshot
+
+
+class MetricsRegistry:
+    """指标注册表 - 按Prometheus文本格式输出
+
+    多进程部署时各进程的快照（snapshot()）可以合并输出：计数器和分桶按标签相加，
+    采集时计算的指标（Gauge.set_function）只取本进程的值。
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标已注册: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self, include_live=True):
+        """所有指标的当前值（可JSON序列化）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snapshot = {}
+        for metric in metrics:
+            data = metric.snapshot()
+            if include_live or not data.get('live'):
+                snapshot[metric.name] = data
+        return snapshot
+
+    @staticmethod
+    def merge(snapshots):
+        """合并多个快照：同名指标按标签值相加"""
+        merged = {}
+        for snapshot in snapshots:
+            for name, data in snapshot.items():
+                target = merged.get(name)
+                if target is None:
+                    merged[name] = dict(data, values=[[list(key), value] for key, value in data['values']])
+                    continue
+                index = {tuple(key): i for i, (key, _) in enumerate(target['values'])}
+                for key, value in data['values']:
+                    i = index.get(tuple(key))
+                    if i is None:
+                        target['values'].append([list(key), value])
+                    elif data['type'] == 'histogram':
+                        current = target['values'][i][1]
+                        target['values'][i][1] = [a + b for a, b in zip(current, value)]
+                    else:
+                        target['values'][i][1] += value
+        return merged
+
+    def render(self, others=()):
+        """输出Prometheus文本格式，others为其他进程的快照"""
+        merged = self.merge([self.snapshot()] + list(others))
+        lines = []
+        for name in sorted(merged):
+            data = merged[name]
+            lines.append(f"# HELP {name} {data['help']}")
+            lines.append(f"# TYPE {name} {data['type']}")
+            labelnames = data['labelnames']
+            for labelvalues, value in sorted(data['values']):
+                if data['type'] != 'histogram':
+                    lines.append(f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(data['buckets'], value):
+                    cumulative += count
+                    labels = _format_labels(labelnames, labelvalues, [('le', bound)])
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = _format_labels(labelnames, labelvalues)
+                lines.append(f"{name}_sum{labels} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{labels} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# ---------------------------------------------------------------------------
+# 抓取流程的指标（由下载器、解析器和处理器记录）
+# ---------------------------------------------------------------------------
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'apifox_stage_duration_seconds', '各阶段耗时（秒）', ['stage'],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+)
+DOCUMENTS = REGISTRY.counter(
+    'apifox_documents_total', '处理的文档数（operation: downloaded/converted/merged）', ['operation']
+)
+LINKS = REGISTRY.counter('apifox_links_parsed_total', '从llms.txt解析出的文档链接数')
+FETCHED_BYTES = REGISTRY.counter('apifox_fetched_bytes_total', '下载的字节数（kind: llms/md）', ['kind'])
+YAML_SECONDS = REGISTRY.histogram(
+    'apifox_yaml_seconds', 'YAML解析和输出耗时（秒，operation: parse/dump）', ['operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+FAILURES = REGISTRY.counter('apifox_failures_total', '失败次数（按阶段和原因）', ['stage', 'reason'])
+QUEUE_DEPTH = REGISTRY.gauge('apifox_job_queue_depth', '后台任务数（state: queued/running）', ['state'])
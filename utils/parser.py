@@ -5,6 +5,11 @@ import re
 import os
 from urllib.parse import urljoin, urlparse
 
+from .metrics import LINKS, FAILURES
+from .log import get_logger
+
+log = get_logger('parser')
+
 class LlmsParser:
     """llms.txt文件解析器"""
     
@@ -13,7 +18,7 @@ class LlmsParser:
         
     def parse_llms_content(self, content):
         """解析llms.txt内容，提取所有MD文档链接（包括Docs和API Docs部分）"""
-        print("开始解析llms.txt内容...")
+        log.debug('开始解析llms.txt内容', chars=len(content))
         
         # 按行分割内容
         lines = content.strip().split('\n')
@@ -28,7 +33,7 @@ class LlmsParser:
             # 检查是否是新的部分标题
             if line.startswith('## '):
                 current_section = line[3:].strip()  # 去掉"## "
-                print(f"找到部分: {current_section}")
+                log.debug('找到部分', section=current_section)
                 continue
             
             # 提取当前行的链接
@@ -39,7 +44,10 @@ class LlmsParser:
                     link_info['section'] = current_section
                     all_links.append(link_info)
         
-        print(f"解析完成，找到 {len(all_links)} 个文档链接")
+        log.info('解析完成', links=len(all_links))
+        LINKS.inc(len(all_links))
+        if not all_links:
+            FAILURES.inc(stage='parse', reason='no_links')
         
         # 按部分统计
         section_counts = {}
@@ -47,16 +55,12 @@ class LlmsParser:
             section = link.get('section', 'Unknown')
             section_counts[section] = section_counts.get(section, 0) + 1
         
-        print("各部分链接统计:")
         for section, count in section_counts.items():
-            print(f"  - {section}: {count} 个链接")
+            log.info('部分链接统计', section=section, links=count)
         
-        # 打印前几个链接作为示例
-        if all_links:
-            print("前5个链接示例:")
-            for i, link in enumerate(all_links[:5]):
-                section = link.get('section', 'Unknown')
-                print(f"  {i+1}. [{section}] {link['title']} -> {link['url']}")
+        # 前几个链接作为示例
+        for link in all_links[:5]:
+            log.debug('链接示例', section=link.get('section', 'Unknown'), title=link['title'], url=link['url'])
         
         return all_links
     
@@ -182,7 +186,7 @@ class LlmsParser:
             if include:
                 filtered_links.append(link)
         
-        print(f"过滤后剩余 {len(filtered_links)} 个链接")
+        log.info('链接过滤完成', remaining=len(filtered_links))
         return filtered_links
     
     def validate_links(self, api_links):
@@ -219,12 +223,10 @@ class LlmsParser:
             
             valid_links.append(link)
         
-        print(f"链接验证完成: 有效 {len(valid_links)}, 无效 {len(invalid_links)}")
+        log.info('链接验证完成', valid=len(valid_links), invalid=len(invalid_links))
         
-        if invalid_links:
-            print("无效链接:")
-            for invalid in invalid_links[:5]:  # 只显示前5个
-                print(f"  - {invalid['link'].get('title', 'N/A')}: {invalid['reason']}")
+        for invalid in invalid_links[:5]:  # 只显示前5个
+            log.warning('无效链接', title=invalid['link'].get('title', 'N/A'), reason=invalid['reason'])
         
         return valid_links, invalid_links
     
@@ -253,12 +255,21 @@ class LlmsParser:
             
             groups[category].append(link)
         
-        print(f"链接分组完成: {len(groups)} 个分组")
+        log.info('链接分组完成', groups=len(groups))
         for category, links in groups.items():
-            print(f"  - {category}: {len(links)} 个链接")
+            log.debug('链接分组', category=category, links=len(links))
         
         return groups
     
+    def save_url_list(self, api_links, output_file):
+        """保存解析出的链接列表（url.txt）"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("# 解析出的API文档链接\n\n")
+            for i, link in enumerate(api_links, 1):
+                f.write(f"{i}. {link['title']}\n")
+                f.write(f"   URL: {link['url']}\n")
+                f.write(f"   完整URL: {link['full_url']}\n\n")
+    
     def export_links_summary(self, api_links, output_file):
         """导出链接摘要到文件"""
         try:
@@ -278,11 +289,11 @@ class LlmsParser:
                     
                     f.write("\n")
             
-            print(f"链接摘要已导出到: {output_file}")
+            log.info('链接摘要已导出', output_file=output_file)
             return True
             
         except Exception as e:
-            print(f"导出链接摘要失败: {str(e)}")
+            log.error('导出链接摘要失败', output_file=output_file, error=str(e))
             return False
 
 if __name__ == "__main__":
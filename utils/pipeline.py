@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .downloader import ApiDownloader
+from .parser import LlmsParser
+from .processor import ApiProcessor
+from .metrics import STAGE_SECONDS
+from .profiling import StageProfiler, profiled
+from .log import get_logger
+
+log = get_logger('pipeline')
+
+
+class Pipeline:
+    """一站式流水线 - 在一个任务中完成下载、转换和合并
+
+    与分三次调用阶段接口相比：
+    - 下载和转换重叠进行，每个MD文件下载完成后立即在转换线程中提取并解析YAML
+      （处理器的convert_workers大于1时改用进程池并行转换）；
+    - 解析后的文档保留在内存中，阶段3分类和合并直接使用，不再重新扫描、读取和解析文件；
+    - 文档ZIP在阶段3合并的同时在后台生成。
+    各阶段写出的文件与分阶段执行时一致。
+
+    report(stage=..., message=..., progress=..., log=...)用于上报进度，progress为整体进度。
+    profiler（StageProfiler）不为空时分别分析下载转换（download_convert）和合并（merge）两段。
+    """
+
+    # 各阶段在整体进度中的区间
+    STAGE_RANGES = {1: (0, 70), 2: (70, 80), 3: (80, 100)}
+
+    def __init__(self, api_url, workspace_root, processor_options=None, download_workers=5, report=None,
+                 profiler=None):
+        self.api_url = api_url
+        self.processor = ApiProcessor(base_dir=workspace_root, **(processor_options or {}))
+        # 处理器使用文档存储时，下载的MD文件同样写入存储
+        self.downloader = ApiDownloader(base_url=api_url, workspace_root=workspace_root,
+                                        max_workers=download_workers, store=self.processor.store)
+        self.parser = LlmsParser(api_url)
+        self.report = report or (lambda **kwargs: None)
+        self.profiler = profiler or StageProfiler(None)
+        self.llms_content = None
+
+    def _progress(self, stage, done, total, label):
+        start, end = self.STAGE_RANGES[stage]
+        if total:
+            self.report(message=f"{label} {done}/{total}",
+                        progress=start + (end - start) * done // total, log=False)
+
+    def fetch_index(self):
+        """下载llms.txt（调用方可据此判断结果缓存），返回文件内容"""
+        self.report(stage=1, message='下载llms.txt...', progress=2)
+        self.llms_content = self.downloader.download_llms_txt()
+        return self.llms_content
+
+    @STAGE_SECONDS.timed(stage='pipeline')
+    def run(self):
+        """执行全部阶段，返回 {'stage1': ..., 'stage2': ..., 'stage3': ...}"""
+        if self.llms_content is None:
+            self.fetch_index()
+
+        api_links = self.parser.parse_llms_content(self.llms_content)
+        if not api_links:
+            raise Exception("解析失败，未找到API文档链接")
+        self.parser.save_url_list(api_links, os.path.join(self.downloader.output_dir, 'url.txt'))
+        self.report(message=f'解析完成: {len(api_links)}个链接，开始下载并转换...', progress=5)
+
+        with self.profiler.stage('download_convert'):
+            stage1, stage2, documents = self._download_and_convert(api_links)
+        if not stage1['downloaded_files']:
+            raise Exception("阶段1没有下载到MD文件")
+
+        with self.profiler.stage('merge'), \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='docs-zip') as zip_executor:
+            # 纯文档复制后，ZIP在后台生成，同时开始阶段3合并
+            self.report(stage=2, message='整理纯文档...', progress=self.STAGE_RANGES[2][0])
+            docs_files = self.processor._list_docs_only_files()
+            self.processor._copy_docs_to_final(docs_files)
+            zip_future = zip_executor.submit(profiled(self.processor._create_docs_zip), docs_files)
+
+            self.report(stage=3, message='合并YAML文件...', progress=self.STAGE_RANGES[3][0])
+            self.processor.preload_documents(documents)
+            del documents
+            try:
+                result = self.processor.stage3_merge_final(
+                    progress_callback=lambda done, total: self._progress(3, done, total, '合并分类')
+                )
+            finally:
+                self.processor.preload_documents({})
+
+            stage2['docs_zip'] = zip_future.result()
+
+        # ZIP可能在阶段3重建索引之后才完成
+        self.processor.update_artifact_index()
+
+        if not result or 'merged_files' not in result:
+            raise Exception("阶段3处理失败")
+
+        return {
+            'stage1': stage1,
+            'stage2': stage2,
+            'stage3': {
+                'merged_files': result['merged_files'],
+                'final_file': result.get('final_file')
+            }
+        }
+
+    def _download_and_convert(self, api_links):
+        """下载MD文件，每个文件下载完成后立即交给转换线程，转换结果完成一个处理一个"""
+        md_dir = os.path.join(self.processor.stage2_dir, 'md')
+        yml_dir = os.path.join(self.processor.stage2_dir, 'yml')
+
+        # 内存预算模式下阶段3从文件读取，转换结果不附带YAML文本和解析结果
+        keep_documents = not self.processor.memory_budget
+        method = 'convert_md_content' if keep_documents else 'convert_md_summary'
+        documents = {}
+        downloaded = 0
+        valid = 0
+        filenames = []
+        pending = {}
+
+        workers = self.processor.convert_workers
+        if workers > 1:
+            log.info('并行转换', workers=workers)
+            converter = self.processor._process_pool(workers)
+            convert = self.processor._pool_task(method)
+        else:
+            converter = ThreadPoolExecutor(max_workers=1, thread_name_prefix='convert')
+            convert = profiled(getattr(self.processor, method))
+
+        def collect(future):
+            nonlocal valid
+            filename = pending.pop(future)
+            converted = future.result()
+            self.processor.record_conversion(converted)
+            if converted['success']:
+                valid += 1
+                if keep_documents:
+                    documents[converted['yml_filename']] = (converted['yaml_content'], converted['parsed'])
+            else:
+                log.sample('未转换为YAML', filename=filename, reason=converted['error'])
+
+        with converter:
+            downloads = self.downloader.iter_md_files(
+                api_links,
+                progress_callback=lambda done, total: self._progress(1, done, total, '下载并转换MD文件')
+            )
+            for item in downloads:
+                if not item['success']:
+                    continue
+                downloaded += 1
+                filenames.append(item['filename'])
+                future = converter.submit(convert, item['filename'], item.pop('content'), md_dir, yml_dir)
+                pending[future] = item['filename']
+                # 已完成的转换立即处理，结果不在future中滞留到下载结束
+                for done in [done for done in pending if done.done()]:
+                    collect(done)
+
+            for future in as_completed(list(pending)):
+                collect(future)
+
+        if filenames:
+            # 没有下载到文件时（抓取失败）保留原有索引
+            self.processor.prune_search_index(filenames)
+        log.info('下载并转换完成', downloaded=downloaded, valid=valid)
+        stage1 = {'downloaded_files': downloaded, 'api_links': len(api_links)}
+        stage2 = {'processed_files': downloaded, 'valid_files': valid}
+        return stage1, stage2, documents
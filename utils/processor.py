@@ -6,26 +6,111 @@ import re
 import yaml
 import json
 import shutil
-import zipfile
+import hashlib
+import time
+import functools
+import itertools
+import multiprocessing
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from .zipbuilder import DocsZipBuilder
+from .merger import SpecMerger
+from .emitter import StreamingSpecWriter
+from .formats import (validate_formats, write_spec, write_spec_stream, load_yaml,
+                      dumps_tagged_json, loads_tagged_json)
+from .shards import ShardWriter
+from .spill import SpillStore
+from .classifier import RuleClassifier
+from .artifacts import ArtifactIndex
+from .metrics import STAGE_SECONDS, DOCUMENTS, FAILURES, YAML_SECONDS
+from .log import get_logger
+
+log = get_logger('processor')
+
+# 文档ZIP的文件名模式：新一轮构建沿用旧的ZIP，由保留策略（zip_keep/zip_max_age）清理
+DOCS_ZIP_PATTERN = 'apifox_docs_*.zip'
+
+# 阶段2写入final目录的产物（纯文档md目录和文档ZIP），阶段3重新合并时只沿用这些
+STAGE2_OUTPUTS = ('md', DOCS_ZIP_PATTERN)
+
+# 进程池子进程中的处理器：由_init_worker在每个子进程启动时设置一次，任务只传方法名和普通参数
+_worker_processor = None
+
+
+def _init_worker(processor):
+    global _worker_processor
+    _worker_processor = processor
+
+
+def _call_worker(method, *args):
+    return getattr(_worker_processor, method)(*args)
+
 
 class ApiProcessor:
     """API文档处理器 - 三阶段处理流程"""
     
-    def __init__(self, base_dir='data'):
+    def __init__(self, base_dir='data', zip_compression_level=6, zip_store_only=False, zip_workers=4,
+                 merge_workers=1, classifier=None, output_formats=('yaml',), shard_mode=None,
+                 incremental=False, artifact_encodings=None, final_dir=None, zip_keep=3, zip_max_age=None,
+                 convert_workers=1, memory_budget=None, store=None, search_index=None):
+        # base_dir即工作目录根（默认data/，并发抓取时为data/jobs/<id>/）
         self.base_dir = base_dir
         self.stage1_dir = os.path.join(base_dir, '01')
         self.stage2_dir = os.path.join(base_dir, '02')
-        self.final_dir = os.path.join(base_dir, 'final')
+        # final_dir可指向构建目录，处理完成后再整体替换工作目录的final目录
+        self.final_dir = final_dir or os.path.join(base_dir, 'final')
+        
+        # 文档ZIP压缩配置
+        self.zip_compression_level = zip_compression_level
+        self.zip_store_only = zip_store_only
+        self.zip_workers = zip_workers
+        
+        # 文档ZIP保留策略：最多保留zip_keep个，超过zip_max_age秒的删除（最新的一个总是保留）
+        self.zip_keep = zip_keep
+        self.zip_max_age = zip_max_age
+        
+        # 阶段2并行转换的进程数（1为串行）
+        self.convert_workers = convert_workers
+        
+        # 阶段3并行合并的进程数（1为串行）
+        self.merge_workers = merge_workers
+        
+        # 阶段3内存预算（字节）：设置后合并中间结果超出预算的部分暂存到磁盘（None为不限制）
+        self.memory_budget = memory_budget
+        
+        # 阶段3分类器（规则表可通过配置文件自定义）
+        self.classifier = classifier or RuleClassifier()
+        
+        # 阶段3输出格式（始终包含yaml，可追加json/msgpack/cbor）
+        self.output_formats = validate_formats(output_formats)
+        
+        # 分片输出模式：None不分片，'tag'按tag分片，'operation'每个接口一个分片
+        self.shard_mode = shard_mode
+        
+        # 增量模式：阶段3只重新合并输入有变化的分类
+        self.incremental = incremental
+        self.manifest_path = os.path.join(self.final_dir, '.stage3_manifest.json')
+        # 分类缓存是内部中间结果，放在final目录之外（不随final发布和复制）
+        self.category_cache_dir = os.path.join(base_dir, '.stage3_cache')
+        
+        # 产物索引的预压缩格式（None为当前环境支持的全部格式）
+        self.artifact_encodings = artifact_encodings
+        
+        # 文档存储（ArtifactStore）：指定时阶段1/2的MD和YAML读写存储而不是 01/02 目录
+        self.store = store
+        
+        # 全文索引（SearchIndex）：指定时阶段2每转换一个文档就更新该文档的索引
+        self.search_index = search_index
+        
+        # 预先载入的YAML文档 {yml文件名: (YAML文本, 解析结果)}，阶段3优先使用而不再读取解析文件
+        self._preloaded = {}
         
         # 创建目录结构
         self._create_directories()
         
-        print(f"API处理器初始化完成")
-        print(f"阶段1目录: {self.stage1_dir}")
-        print(f"阶段2目录: {self.stage2_dir}")
-        print(f"最终目录: {self.final_dir}")
+        log.info('API处理器初始化完成', base_dir=self.base_dir)
     
     def _create_directories(self):
         """创建必要的目录结构"""
@@ -41,7 +126,7 @@ class ApiProcessor:
     
     def stage1_store_raw_files(self, source_dir):
         """阶段1：存储原始MD文件"""
-        print("\n=== 阶段1：存储原始MD文件 ===")
+        log.info('阶段1：存储原始MD文件', source_dir=source_dir)
         
         source_md_dir = os.path.join(source_dir, 'md')
         target_md_dir = os.path.join(self.stage1_dir, 'md')
@@ -61,23 +146,34 @@ class ApiProcessor:
             target_file = os.path.join(target_md_dir, filename)
             
             try:
-                shutil.copy2(source_file, target_file)
+                if self.store is not None:
+                    with open(source_file, 'r', encoding='utf-8') as f:
+                        self.store.put_raw(filename, f.read())
+                else:
+                    shutil.copy2(source_file, target_file)
                 copied_count += 1
             except Exception as e:
-                print(f"复制文件失败 {filename}: {str(e)}")
+                log.warning('复制文件失败', filename=filename, error=str(e))
         
-        print(f"阶段1完成: 复制了 {copied_count} 个MD文件")
+        log.info('阶段1完成', copied=copied_count)
         return copied_count
     
-    def stage2_clean_and_convert(self, progress_callback=None):
-        """阶段2：清洗MD文件并转换为YAML"""
-        print("\n=== 阶段2：清洗和转换 ===")
+    @STAGE_SECONDS.timed(stage='convert')
+    def stage2_clean_and_convert(self, progress_callback=None, workers=None):
+        """阶段2：清洗MD文件并转换为YAML
+        
+        workers大于1时在进程池中并行转换，结果和进度回调仍按文件顺序处理。
+        """
+        log.info('阶段2：清洗和转换')
         
         source_md_dir = os.path.join(self.stage1_dir, 'md')
         target_md_dir = os.path.join(self.stage2_dir, 'md')
         target_yml_dir = os.path.join(self.stage2_dir, 'yml')
         
-        md_files = [f for f in os.listdir(source_md_dir) if f.endswith('.md')]
+        if self.store is not None:
+            md_files = self.store.document_names()
+        else:
+            md_files = [f for f in os.listdir(source_md_dir) if f.endswith('.md')]
         
         if not md_files:
             raise Exception(f"阶段1目录中没有MD文件: {source_md_dir}")
@@ -85,18 +181,16 @@ class ApiProcessor:
         processed_count = 0
         valid_count = 0
         
-        for i, filename in enumerate(md_files):
-            source_file = os.path.join(source_md_dir, filename)
-            
+        workers = self.convert_workers if workers is None else workers
+        for i, (filename, result) in enumerate(
+                self._iter_conversions(md_files, source_md_dir, target_md_dir, target_yml_dir, workers)):
             try:
-                # 处理单个文件
-                result = self._process_single_md_file(source_file, target_md_dir, target_yml_dir)
-                
                 if result['success']:
                     valid_count += 1
-                    print(f"✓ [{i+1}/{len(md_files)}] {filename}")
+                    log.sample('转换进度', completed=i + 1, total=len(md_files), filename=filename)
                 else:
-                    print(f"✗ [{i+1}/{len(md_files)}] {filename} - {result['error']}")
+                    # 纯文档没有YAML，属于正常情况
+                    log.sample('未转换为YAML', filename=filename, reason=result['error'])
                 
                 processed_count += 1
                 
@@ -105,16 +199,20 @@ class ApiProcessor:
                     progress_callback(processed_count, len(md_files))
                     
             except Exception as e:
-                print(f"处理文件失败 {filename}: {str(e)}")
+                log.warning('处理文件失败', filename=filename, error=str(e))
+        
+        self.prune_search_index(md_files)
         
         # 复制Docs文档到final/md目录
-        self._copy_docs_to_final()
+        docs_files = self._list_docs_only_files()
+        self._copy_docs_to_final(docs_files)
         
-        # 生成文档ZIP文件
-        docs_zip_path = self._create_docs_zip()
+        # 生成文档ZIP文件（直接读取阶段1源文件）
+        docs_zip_path = self._create_docs_zip(docs_files)
         
-        print(f"阶段2完成: 处理了 {processed_count} 个文件，有效 {valid_count} 个")
-        print(f"文档ZIP文件: {docs_zip_path}")
+        self.update_artifact_index()
+        
+        log.info('阶段2完成', processed=processed_count, valid=valid_count, docs_zip=docs_zip_path)
         
         return {
             'processed': processed_count,
@@ -122,47 +220,196 @@ class ApiProcessor:
             'docs_zip': docs_zip_path
         }
     
+    def update_artifact_index(self):
+        """重建final目录的产物索引（ETag和预压缩版本），失败不影响处理结果"""
+        try:
+            index = ArtifactIndex(self.final_dir, encodings=self.artifact_encodings, store=self.store).rebuild()
+            log.info('产物索引已更新', artifacts=len(index['artifacts']))
+        except Exception as e:
+            log.error('更新产物索引失败', error=str(e))
+    
+    def _process_pool(self, workers):
+        """并行转换/合并的进程池，每个子进程启动时载入一次处理器，任务用_pool_task()提交
+        
+        使用文档存储时以spawn方式启动子进程：fork会把其他线程持有的SQLite锁状态带入子进程。
+        """
+        mp_context = multiprocessing.get_context('spawn') if self.store is not None else None
+        return ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                                   initializer=_init_worker, initargs=(self,))
+    
+    @staticmethod
+    def _pool_task(method):
+        """在_process_pool()的子进程中调用处理器方法的任务函数（提交时不再序列化处理器）"""
+        return functools.partial(_call_worker, method)
+    
+    def _iter_conversions(self, md_files, source_md_dir, target_md_dir, target_yml_dir, workers=1):
+        """按文件顺序产出转换结果 (文件名, 结果)"""
+        # 使用文档存储时直接以文档名作为来源
+        source_files = md_files if self.store is not None else \
+            [os.path.join(source_md_dir, filename) for filename in md_files]
+        
+        if workers <= 1 or len(md_files) <= 1:
+            for filename, source_file in zip(md_files, source_files):
+                result = self._process_single_md_file(source_file, target_md_dir, target_yml_dir)
+                self.record_conversion(result)
+                yield filename, result
+            return
+        
+        workers = min(workers, len(md_files))
+        log.info('并行转换', workers=workers)
+        
+        # 单个文件的转换很快，按块分发以减少进程间通信
+        chunksize = max(1, min(64, len(md_files) // (workers * 4)))
+        with self._process_pool(workers) as executor:
+            results = executor.map(self._pool_task('_process_single_md_file'), source_files,
+                                   itertools.repeat(target_md_dir), itertools.repeat(target_yml_dir),
+                                   chunksize=chunksize)
+            for filename, result in zip(md_files, results):
+                self.record_conversion(result)
+                yield filename, result
+    
     def _process_single_md_file(self, source_file, target_md_dir, target_yml_dir):
         """处理单个MD文件"""
         filename = os.path.basename(source_file)
         
         try:
             # 读取原始文件
-            with open(source_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
+            if self.store is not None:
+                content = self.store.read_raw(filename)
+            else:
+                with open(source_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+        except Exception as e:
+            return {'success': False, 'reason': 'read_error', 'error': str(e)}
+        
+        return self.convert_md_summary(filename, content, target_md_dir, target_yml_dir)
+    
+    def record_conversion(self, result):
+        """记录单个文档的转换指标（转换可能在进程池子进程中执行，指标统一由调用方所在进程记录）
+        
+        纯文档（没有YAML）属于正常情况，不计入失败数。
+        """
+        yaml_seconds = result.pop('yaml_seconds', None)
+        if yaml_seconds is not None:
+            YAML_SECONDS.observe(yaml_seconds, operation='parse')
+        if result['success']:
+            DOCUMENTS.inc(operation='converted')
+        elif result.get('reason') != 'no_yaml':
+            FAILURES.inc(stage='convert', reason=result.get('reason', 'error'))
+    
+    def convert_md_content(self, filename, content, target_md_dir=None, target_yml_dir=None):
+        """清洗单个MD文档并提取YAML，成功时结果中附带YAML文本和解析结果"""
+        result = self._convert_md_content(filename, content, target_md_dir, target_yml_dir)
+        cleaned_content = result.pop('cleaned_content', None)
+        if self.search_index is not None:
+            # 未转换为YAML的文档（纯文档）按原文索引
+            self._index_document(filename, content if cleaned_content is None else cleaned_content,
+                                 result.get('parsed'))
+        return result
+    
+    def convert_md_summary(self, filename, content, target_md_dir=None, target_yml_dir=None):
+        """同convert_md_content，但结果不附带YAML文本和解析结果（调用方不保留文档时使用）"""
+        result = self.convert_md_content(filename, content, target_md_dir, target_yml_dir)
+        result.pop('yaml_content', None)
+        result.pop('parsed', None)
+        return result
+    
+    def _convert_md_content(self, filename, content, target_md_dir=None, target_yml_dir=None):
+        target_md_dir = target_md_dir or os.path.join(self.stage2_dir, 'md')
+        target_yml_dir = target_yml_dir or os.path.join(self.stage2_dir, 'yml')
+        
+        try:
             # 提取YAML内容
             yaml_content = self._extract_yaml_from_md(content)
             
             if not yaml_content:
-                return {'success': False, 'error': '未找到YAML内容'}
+                return {'success': False, 'reason': 'no_yaml', 'error': '未找到YAML内容'}
             
-            # 验证YAML格式
+            # 验证YAML格式（解析耗时随结果返回，由record_conversion记录）
+            start = time.perf_counter()
             try:
                 parsed_yaml = yaml.safe_load(yaml_content)
-                if not parsed_yaml or 'paths' not in parsed_yaml:
-                    return {'success': False, 'error': 'YAML格式无效或缺少paths'}
             except yaml.YAMLError as e:
-                return {'success': False, 'error': f'YAML解析错误: {str(e)}'}
+                return {'success': False, 'reason': 'yaml_error', 'error': f'YAML解析错误: {str(e)}',
+                        'yaml_seconds': time.perf_counter() - start}
+            yaml_seconds = time.perf_counter() - start
+            if not parsed_yaml or 'paths' not in parsed_yaml:
+                return {'success': False, 'reason': 'missing_paths', 'error': 'YAML格式无效或缺少paths',
+                        'yaml_seconds': yaml_seconds}
             
             # 清洗MD内容
             cleaned_content = self._clean_md_content(content)
-            
-            # 保存清洗后的MD文件
-            target_md_file = os.path.join(target_md_dir, filename)
-            with open(target_md_file, 'w', encoding='utf-8') as f:
-                f.write(cleaned_content)
-            
-            # 保存YAML文件
             yml_filename = filename.replace('.md', '.yml')
-            target_yml_file = os.path.join(target_yml_dir, yml_filename)
-            with open(target_yml_file, 'w', encoding='utf-8') as f:
-                f.write(yaml_content)
             
-            return {'success': True, 'yaml_size': len(yaml_content)}
+            if self.store is not None:
+                self.store.put_converted(filename, cleaned_content, yml_filename, yaml_content)
+            else:
+                # 保存清洗后的MD文件
+                target_md_file = os.path.join(target_md_dir, filename)
+                with open(target_md_file, 'w', encoding='utf-8') as f:
+                    f.write(cleaned_content)
+                
+                # 保存YAML文件
+                target_yml_file = os.path.join(target_yml_dir, yml_filename)
+                with open(target_yml_file, 'w', encoding='utf-8') as f:
+                    f.write(yaml_content)
+            
+            return {
+                'success': True,
+                'yaml_seconds': yaml_seconds,
+                'yaml_size': len(yaml_content),
+                'yml_filename': yml_filename,
+                'yaml_content': yaml_content,
+                'parsed': parsed_yaml,
+                'cleaned_content': cleaned_content
+            }
             
         except Exception as e:
-            return {'success': False, 'error': str(e)}
+            return {'success': False, 'reason': 'error', 'error': str(e)}
+    
+    def _index_document(self, filename, content, spec):
+        """更新单个文档的全文索引，失败不影响转换结果"""
+        try:
+            self.search_index.index_document(filename, content, spec)
+        except Exception as e:
+            log.warning('更新全文索引失败', filename=filename, error=str(e))
+    
+    def prune_search_index(self, filenames):
+        """从全文索引中删除本轮抓取中已不存在的文档"""
+        if self.search_index is None:
+            return
+        try:
+            self.search_index.prune(filenames)
+        except Exception as e:
+            log.warning('清理全文索引失败', error=str(e))
+    
+    def preload_documents(self, documents):
+        """载入已解析的YAML文档 {yml文件名: (YAML文本, 解析结果)}，供阶段3直接使用"""
+        self._preloaded = dict(documents)
+    
+    def _read_yaml_file(self, yml_dir, filename):
+        """读取YAML文件，返回 (YAML文本, 解析结果)；解析结果只有预载入时才有，否则为None"""
+        preloaded = self._preloaded.get(filename)
+        if preloaded is not None:
+            return preloaded
+        if self.store is not None:
+            return self.store.read_yaml(filename), None
+        with open(os.path.join(yml_dir, filename), 'r', encoding='utf-8') as f:
+            return f.read(), None
+    
+    def _list_yaml_files(self, yml_dir):
+        """按文件名排序列出阶段2的YAML文件"""
+        if self.store is not None:
+            return self.store.yaml_names()
+        if not os.path.exists(yml_dir):
+            raise Exception(f"阶段2 YAML目录不存在: {yml_dir}")
+        return sorted(f for f in os.listdir(yml_dir) if f.endswith('.yml'))
+    
+    def __getstate__(self):
+        # 并行合并时处理器会被复制到子进程，预载入的文档不随之传递（子进程从文件读取）
+        state = self.__dict__.copy()
+        state['_preloaded'] = {}
+        return state
     
     def _extract_yaml_from_md(self, content):
         """从MD内容中提取YAML（参考convert_to_postman.py逻辑）"""
@@ -185,219 +432,552 @@ class ApiProcessor:
         
         return '\n'.join(cleaned_lines)
     
-    def stage3_merge_final(self, progress_callback=None):
-        """阶段3：最终合并（参考merge_all_directories_fixed.py）"""
-        print("\n=== 阶段3：最终合并 ===")
+    @STAGE_SECONDS.timed(stage='merge')
+    def stage3_merge_final(self, progress_callback=None, workers=None):
+        """阶段3：最终合并（参考merge_all_directories_fixed.py）
         
+        workers大于1时各分类在进程池中并行合并，结果和进度回调仍按分类顺序处理。
+        增量模式下只重新合并成员或输入摘要发生变化的分类，其余分类沿用上次的输出。
+        设置了memory_budget时，path归属、分类合并结果、统一文档的组件等中间数据
+        超出预算后暂存到磁盘，此时串行合并，且增量模式只在全部分类都未变化时沿用上次的结果。
+        """
+        log.info('阶段3：最终合并')
+        
+        unified_writer = None
+        spill = None
         try:
             yml_dir = os.path.join(self.stage2_dir, 'yml')
-            
-            if not os.path.exists(yml_dir):
-                raise Exception(f"阶段2 YAML目录不存在: {yml_dir}")
-            
-            yml_files = [f for f in os.listdir(yml_dir) if f.endswith('.yml')]
+            yml_files = self._list_yaml_files(yml_dir)
             
             if not yml_files:
                 raise Exception(f"阶段2目录中没有YAML文件: {yml_dir}")
             
-            print(f"找到 {len(yml_files)} 个YAML文件")
+            log.info('找到YAML文件', files=len(yml_files))
+            
+            if self.memory_budget:
+                spill = SpillStore(self.stage2_dir, self.memory_budget)
+                log.info('内存预算模式', memory_budget=self.memory_budget)
             
             # 按目录分类合并
-            categories = self._categorize_by_directory(yml_dir)
-            print(f"分类结果: {len(categories)} 个分类")
+            path_owners = spill.mapping() if spill else {}
+            manifest = self._load_manifest() if self.incremental else None
+            if self.incremental:
+                # 旧版本把分类缓存放在final目录内，不再使用
+                shutil.rmtree(os.path.join(self.final_dir, '.cache'), ignore_errors=True)
+            file_index = dict(manifest['files']) if manifest else ({} if self.incremental else None)
+            categories = self._categorize_by_directory(yml_dir, path_owners, file_index)
+            log.info('分类完成', categories=len(categories))
+            
+            unchanged = {}
+            if manifest is not None:
+                # 内存预算模式不保存分类缓存，只判断是否全部未变化
+                unchanged = self._unchanged_categories(manifest, categories, file_index,
+                                                       require_cache=spill is None)
+                removed = set(manifest['categories']) - set(categories)
+                self._remove_category_outputs(removed)
+                log.info('增量合并', changed=len(categories) - len(unchanged), unchanged=len(unchanged),
+                         removed=len(removed))
+                
+                previous = self._relocate_result(manifest['result']) if manifest.get('result') else None
+                if len(unchanged) == len(categories) and not removed and previous \
+                        and self._outputs_exist(previous['final_files'].values()):
+                    log.info('阶段3完成: 输入未变化，沿用上次的合并结果')
+                    self.update_artifact_index()
+                    if progress_callback:
+                        progress_callback(len(categories), len(categories))
+                    return previous
+                if spill is not None:
+                    unchanged = {}
+            
+            # 统一文档边合并边写出，跨分类共享的path在最后合并写出
+            if spill is not None:
+                shared_paths = spill.mapping()
+                for path, owners in path_owners.items():
+                    if len(owners) > 1:
+                        shared_paths[path] = True
+                path_owners.clear()
+            else:
+                shared_paths = {path for path, owners in path_owners.items() if len(owners) > 1}
+            del path_owners
+            unified_header = self._spec_header('API合集', '全部分类的API接口')
+            mapping_factory = spill.mapping if spill else None
+            shard_writer = None
+            if self.shard_mode:
+                shard_writer = ShardWriter(os.path.join(self.final_dir, 'shards'), self.shard_mode, unified_header,
+                                           mapping_factory=mapping_factory)
+            unified_writer = StreamingSpecWriter(
+                os.path.join(self.final_dir, 'apiall.yaml'),
+                unified_header,
+                deferred_paths=shared_paths,
+                formats=self.output_formats,
+                shard_writer=shard_writer,
+                mapping_factory=mapping_factory
+            )
             
             merged_count = 0
             success_count = 0
+            conflicts = {}
+            category_entries = {}
+            category_results = {}
+            
+            workers = self.merge_workers if workers is None else workers
+            if spill is not None and workers > 1:
+                # 磁盘暂存不能跨进程共享
+                log.info('内存预算模式下串行合并', workers=workers)
+                workers = 1
+            merges = self._iter_category_merges(categories, yml_dir, workers, unchanged, spill)
             
-            for category_name, file_list in categories.items():
+            for category_name, file_list, result, error in merges:
                 try:
-                    print(f"正在合并分类: {category_name} ({len(file_list)} 个文件)")
-                    result = self._merge_category_files(category_name, file_list, yml_dir)
+                    if error is not None:
+                        raise error
                     
                     if result and result.get('success', False):
+                        document = result.pop('document')
+                        unified_writer.add_document(document, source=category_name)
+                        if not result.get('cached'):
+                            DOCUMENTS.inc(len(file_list), operation='merged')
                         merged_count += 1
                         success_count += 1
-                        print(f"✓ 合并成功: {category_name} - {result.get('api_count', 0)} 个API")
+                        log.debug('分类未变化' if result.get('cached') else '分类合并成功',
+                                  category=category_name, apis=result.get('api_count', 0),
+                                  schemas=result.get('schema_count', 0),
+                                  deduplicated=result.get('deduplicated', 0))
+                        if result.get('conflicts'):
+                            conflicts[category_name] = result['conflicts']
+                        if self.store is not None:
+                            category_results[category_name] = result
+                        if file_index is not None:
+                            entry = self._category_entry(result, file_list, file_index)
+                            if not result.get('cached') and spill is None:
+                                self._save_category_cache(category_name, entry['files'], document)
+                            category_entries[category_name] = entry
+                        del document
                     else:
                         error_msg = result.get('error', '未知错误') if result else '返回结果为空'
-                        print(f"✗ 合并失败: {category_name} - {error_msg}")
+                        FAILURES.inc(stage='merge', reason='merge_error')
+                        log.warning('分类合并失败', category=category_name, error=error_msg)
                         
                     # 调用进度回调
                     if progress_callback:
                         progress_callback(merged_count, len(categories))
                         
                 except Exception as e:
-                    print(f"合并分类异常 {category_name}: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                    FAILURES.inc(stage='merge', reason='exception')
+                    log.exception('合并分类异常', category=category_name, error=str(e))
             
-            print(f"阶段3完成: 成功合并 {success_count}/{len(categories)} 个分类")
+            log.info('阶段3完成', merged=success_count, categories=len(categories))
+            
+            if success_count > 0:
+                unified = unified_writer.close()
+                if unified['conflicts']:
+                    conflicts['apiall'] = unified['conflicts']
+                log.info('统一文档', output_file=unified['output_file'], paths=unified['path_count'],
+                         operations=unified['operation_count'])
+                if unified['shards']:
+                    log.info('分片输出', shard_dir=unified['shards']['shard_dir'],
+                             shards=unified['shards']['shard_count'])
+            else:
+                unified_writer.abort()
+            
+            # 输出合并冲突报告
+            conflict_count = sum(len(items) for items in conflicts.values())
+            self._write_merge_report(conflicts)
             
             # 返回结果字典
             result = {
                 'merged_files': success_count,
                 'total_categories': len(categories),
-                'final_file': os.path.join(self.final_dir, 'apiall.yaml') if success_count > 0 else None
+                'conflicts': conflict_count,
+                'final_file': os.path.join(self.final_dir, 'apiall.yaml') if success_count > 0 else None,
+                'final_files': unified['output_files'] if success_count > 0 else {},
+                'shards': unified['shards'] if success_count > 0 else None
             }
             
-            print(f"返回结果: {result}")
+            if file_index is not None:
+                self._save_manifest(file_index, category_entries, result)
+            
+            if self.store is not None:
+                self.store.save_categories(categories, category_results)
+            
+            self.update_artifact_index()
+            
+            log.debug('阶段3结果', result=result)
             return result
             
         except Exception as e:
-            print(f"阶段3处理异常: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception('阶段3处理异常', error=str(e))
+            if unified_writer is not None:
+                unified_writer.abort()
             raise e
+        finally:
+            if spill is not None:
+                spill.close()
+    
+    def _iter_category_merges(self, categories, yml_dir, workers=1, unchanged=None, spill=None):
+        """按分类顺序产出合并结果 (分类名, 文件列表, 结果, 异常)
+        
+        unchanged为 {分类名: 清单记录}，其中的分类不重新合并，直接读取上次的合并结果。
+        传入spill（SpillStore）时串行合并，每个分类的合并结果存放在磁盘暂存中，
+        使用方处理完该分类后释放。
+        """
+        unchanged = unchanged or {}
+        items = list(categories.items())
+        to_merge = [name for name, _ in items if name not in unchanged]
+        
+        if workers <= 1 or len(to_merge) <= 1:
+            for category_name, file_list in items:
+                try:
+                    if category_name in unchanged:
+                        result = self._load_category_cache(category_name, unchanged[category_name])
+                    elif spill is not None:
+                        scope = spill.scope()
+                        log.debug('正在合并分类', category=category_name, files=len(file_list))
+                        try:
+                            result = self._merge_category_files(category_name, file_list, yml_dir,
+                                                                keep_document=True, mapping_factory=scope.mapping)
+                            yield category_name, file_list, result, None
+                        finally:
+                            scope.release()
+                        continue
+                    else:
+                        log.debug('正在合并分类', category=category_name, files=len(file_list))
+                        result = self._merge_category_files(category_name, file_list, yml_dir, keep_document=True)
+                    yield category_name, file_list, result, None
+                except Exception as e:
+                    yield category_name, file_list, None, e
+            return
+        
+        workers = min(workers, len(to_merge))
+        log.info('并行合并', workers=workers)
+        
+        # 提交窗口有上限，避免已完成但未消费的合并结果堆积在内存中
+        window = workers * 2
+        with self._process_pool(workers) as executor:
+            pending = deque()
+            iterator = iter(items)
+            
+            def submit_next():
+                for category_name, file_list in iterator:
+                    if category_name in unchanged:
+                        pending.append((category_name, file_list, None))
+                        continue
+                    log.debug('正在合并分类', category=category_name, files=len(file_list))
+                    future = executor.submit(self._pool_task('_merge_category_files'), category_name,
+                                             file_list, yml_dir, True)
+                    pending.append((category_name, file_list, future))
+                    return True
+                return False
+            
+            while len(pending) < window and submit_next():
+                pass
+            
+            while pending:
+                category_name, file_list, future = pending.popleft()
+                try:
+                    if future is None:
+                        result = self._load_category_cache(category_name, unchanged[category_name])
+                    else:
+                        result = future.result()
+                    yield category_name, file_list, result, None
+                except Exception as e:
+                    yield category_name, file_list, None, e
+                submit_next()
+    
+    # ------------------------------------------------------------------
+    # 增量合并：清单文件记录每个分类由哪些YAML文件（及其摘要）合并而来
+    # ------------------------------------------------------------------
+    
+    def _manifest_options(self):
+        """影响合并输出的选项，变化时需要全量重建"""
+        return {
+            'version': 1,
+            'formats': list(self.output_formats),
+            'shard_mode': self.shard_mode,
+            'rules': hashlib.sha1(json.dumps(
+                [self.classifier.rules, self.classifier.default],
+                sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+        }
+    
+    def _load_manifest(self):
+        """读取上次阶段3的清单，选项不一致或文件损坏时返回None（全量重建）"""
+        if not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning('读取增量清单失败，执行全量合并', error=str(e))
+            return None
+        
+        if manifest.get('options') != self._manifest_options():
+            log.info('合并选项已变化，执行全量合并')
+            return None
+        return manifest
+    
+    def _save_manifest(self, file_index, category_entries, result):
+        manifest = {
+            'options': self._manifest_options(),
+            'files': file_index,
+            'categories': category_entries,
+            'result': result
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _category_entry(self, result, file_list, file_index):
+        """生成清单中单个分类的记录"""
+        entry = {key: value for key, value in result.items() if key not in ('document', 'cached')}
+        entry['files'] = {filename: file_index[filename]['digest'] for filename in file_list}
+        return entry
+    
+    def _unchanged_categories(self, manifest, categories, file_index, require_cache=True):
+        """找出成员和输入摘要都没有变化、且输出文件（和分类缓存）仍然存在的分类，返回 {分类名: 清单记录}"""
+        unchanged = {}
+        for category_name, file_list in categories.items():
+            entry = manifest['categories'].get(category_name)
+            if not entry:
+                continue
+            members = {filename: file_index[filename]['digest'] for filename in file_list}
+            outputs = [os.path.join(self.final_dir, name) for name in entry.get('output_files', [])]
+            if entry.get('files') == members and self._outputs_exist(outputs) \
+                    and (not require_cache or os.path.exists(self._category_cache_path(category_name, members))):
+                unchanged[category_name] = entry
+        return unchanged
     
-    def _categorize_by_directory(self, yml_dir):
-        """按目录分类YAML文件（参考merge_by_directory_generate_fixed.py）"""
-        directory_mapping = self._get_directory_mapping()
+    def _relocate_result(self, result):
+        """把清单中记录的输出路径换到当前final目录下（final目录可能已被整体替换）"""
+        def relocate(path):
+            return os.path.join(self.final_dir, os.path.basename(path))
+        
+        result = dict(result)
+        if result.get('final_file'):
+            result['final_file'] = relocate(result['final_file'])
+        result['final_files'] = {fmt: relocate(path) for fmt, path in (result.get('final_files') or {}).items()}
+        if result.get('shards'):
+            result['shards'] = dict(result['shards'], shard_dir=relocate(result['shards']['shard_dir']))
+        return result
+    
+    def _outputs_exist(self, paths):
+        paths = list(paths)
+        return bool(paths) and all(os.path.exists(path) for path in paths)
+    
+    def _category_cache_prefix(self, category_name):
+        return hashlib.sha1(category_name.encode('utf-8')).hexdigest()
+    
+    def _category_cache_path(self, category_name, members):
+        """分类缓存路径：文件名包含成员摘要，成员或输入变化后旧缓存不会被误用"""
+        members_digest = hashlib.sha1(json.dumps(members, sort_keys=True).encode('utf-8')).hexdigest()
+        return os.path.join(self.category_cache_dir,
+                            f"{self._category_cache_prefix(category_name)}-{members_digest[:16]}.json")
+    
+    def _remove_category_cache(self, category_name, keep=None):
+        """删除分类的缓存文件（保留keep）"""
+        if not os.path.isdir(self.category_cache_dir):
+            return
+        prefix = f"{self._category_cache_prefix(category_name)}-"
+        for name in os.listdir(self.category_cache_dir):
+            path = os.path.join(self.category_cache_dir, name)
+            if name.startswith(prefix) and path != keep:
+                os.remove(path)
+    
+    def _save_category_cache(self, category_name, members, document):
+        """缓存分类合并结果（JSON），供下次增量合并时写入统一文档"""
+        try:
+            payload = dumps_tagged_json(document)
+        except TypeError as e:
+            log.warning('分类合并结果无法缓存', category=category_name, error=str(e))
+            self._remove_category_cache(category_name)
+            return
+        os.makedirs(self.category_cache_dir, exist_ok=True)
+        cache_path = self._category_cache_path(category_name, members)
+        with open(f"{cache_path}.tmp", 'wb') as f:
+            f.write(payload)
+        os.replace(f"{cache_path}.tmp", cache_path)
+        self._remove_category_cache(category_name, keep=cache_path)
+    
+    def _load_category_cache(self, category_name, manifest_entry):
+        """读取未变化分类的上次合并结果"""
+        with open(self._category_cache_path(category_name, manifest_entry['files']), 'rb') as f:
+            document = loads_tagged_json(f.read())
+        result = dict(manifest_entry)
+        result.pop('files', None)
+        result.update({'success': True, 'cached': True, 'document': document})
+        return result
+    
+    def _remove_category_outputs(self, category_names):
+        """删除已不存在的分类的输出文件"""
+        for category_name in category_names:
+            output_name = category_name.replace(' ', '_')
+            for fmt in self.output_formats:
+                ext = 'yml' if fmt == 'yaml' else fmt
+                path = os.path.join(self.final_dir, f"{output_name}.{ext}")
+                if os.path.exists(path):
+                    os.remove(path)
+            self._remove_category_cache(category_name)
+    
+    def _categorize_by_directory(self, yml_dir, path_owners=None, file_index=None):
+        """按目录分类YAML文件（参考merge_by_directory_generate_fixed.py）
+        
+        传入path_owners字典时，同时记录每个path出现在哪些分类中。
+        传入file_index（文件名 -> {digest, category, paths}）时，摘要未变化的文件直接沿用
+        上次的分类结果而不再解析YAML，结束时file_index更新为本次的结果。
+        """
         categories = {}
+        previous_index = dict(file_index) if file_index is not None else {}
+        if file_index is not None:
+            file_index.clear()
         
-        yml_files = [f for f in os.listdir(yml_dir) if f.endswith('.yml')]
+        yml_files = self._list_yaml_files(yml_dir)
         
         for filename in yml_files:
-            file_path = os.path.join(yml_dir, filename)
+            digest = None
             
             # 提取YAML内容进行分类
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    yaml_content = f.read()
+                yaml_content, parsed = self._read_yaml_file(yml_dir, filename)
                 
-                parsed = yaml.safe_load(yaml_content)
-                if not parsed or 'paths' not in parsed:
-                    continue
+                digest = hashlib.sha1(f"{filename}\0{yaml_content}".encode('utf-8')).hexdigest()
+                previous = previous_index.get(filename)
                 
-                # 根据内容特征进行分类
-                category = self._classify_api_content(parsed, filename)
+                if previous and previous['digest'] == digest:
+                    category, paths = previous['category'], previous['paths']
+                else:
+                    if parsed is None:
+                        parsed = load_yaml(yaml_content)
+                    if not parsed or 'paths' not in parsed:
+                        category, paths = None, []
+                    else:
+                        # 根据内容特征进行分类（同一文档的分类结果按摘要缓存）
+                        category = self._classify_api_content(parsed, filename, digest)
+                        paths = list(parsed['paths'] or {})
+                
+                if file_index is not None:
+                    file_index[filename] = {'digest': digest, 'category': category, 'paths': paths}
+                
+                if category is None:
+                    continue
                 
                 if category not in categories:
                     categories[category] = []
                 
                 categories[category].append(filename)
                 
+                if path_owners is not None:
+                    for path in paths:
+                        # 写回而不是原地修改，path_owners可以是磁盘映射
+                        owners = path_owners.get(path) or set()
+                        owners.add(category)
+                        path_owners[path] = owners
+                
             except Exception as e:
-                print(f"分类文件失败 {filename}: {str(e)}")
-                # 默认分类
-                if 'default' not in categories:
-                    categories['default'] = []
-                categories['default'].append(filename)
+                log.warning('分类文件失败', filename=filename, error=str(e))
+                # 归入分类器的默认分类（配置文件可自定义）
+                default = self.classifier.default
+                if default not in categories:
+                    categories[default] = []
+                categories[default].append(filename)
+                if file_index is not None:
+                    file_index[filename] = {'digest': digest, 'category': default, 'paths': []}
         
         return categories
     
-    def _classify_api_content(self, parsed_yaml, filename):
-        """根据API内容进行分类"""
-        # 简化的分类逻辑，可以根据需要扩展
-        paths = parsed_yaml.get('paths', {})
-        
-        # 根据路径特征分类
-        for path in paths.keys():
-            if '/chat' in path.lower():
-                return '聊天模型'
-            elif '/image' in path.lower() or '/vision' in path.lower():
-                return '图像处理'
-            elif '/audio' in path.lower() or '/speech' in path.lower():
-                return '音频处理'
-            elif '/embed' in path.lower():
-                return '向量嵌入'
-            elif '/model' in path.lower():
-                return '模型管理'
-            elif '/file' in path.lower():
-                return '文件处理'
-        
-        # 根据文件名分类
-        filename_lower = filename.lower()
-        if 'chat' in filename_lower:
-            return '聊天模型'
-        elif 'image' in filename_lower or 'vision' in filename_lower:
-            return '图像处理'
-        elif 'audio' in filename_lower or 'speech' in filename_lower:
-            return '音频处理'
-        elif 'embed' in filename_lower:
-            return '向量嵌入'
-        elif 'model' in filename_lower:
-            return '模型管理'
-        elif 'file' in filename_lower:
-            return '文件处理'
-        
-        return 'default'
+    def _classify_api_content(self, parsed_yaml, filename, digest=None):
+        """根据API内容进行分类（规则见utils/classifier.py）"""
+        paths = parsed_yaml.get('paths') or {}
+        return self.classifier.classify(paths.keys(), filename, digest)
     
     def _get_directory_mapping(self):
-        """获取目录映射关系（参考merge_by_directory_generate_fixed.py）"""
+        """获取目录映射关系（分类名 -> 文件名关键词）"""
+        return self.classifier.keyword_mapping()
+    
+    def _spec_header(self, title, description):
+        """生成OpenAPI文档头部"""
         return {
-            '聊天模型': [
-                '列出可用模型', '聊天接口', '聊天补全', 'Claude', 'Gemini', 'GPTs'
-            ],
-            '图像处理': [
-                '图片生成', '图片编辑', '图片分析', 'DALL-E', 'Midjourney'
-            ],
-            '音频处理': [
-                '语音合成', '语音识别', '音频转换', 'TTS', 'STT'
-            ],
-            '向量嵌入': [
-                '文本嵌入', '向量搜索', 'Embedding'
-            ],
-            '模型管理': [
-                '模型列表', '模型信息', '模型配置'
-            ],
-            '文件处理': [
-                '文件上传', '文件下载', '文件分析'
+            'openapi': '3.1.0',
+            'info': {
+                'title': title,
+                'description': description,
+                'version': '1.0.0'
+            },
+            'servers': [
+                {'url': 'https://api.gpt.ge', 'description': '生产环境'}
             ]
         }
     
-    def _merge_category_files(self, category_name, file_list, yml_dir):
-        """合并同一分类的文件"""
+    def _merge_category_files(self, category_name, file_list, yml_dir, keep_document=False, mapping_factory=None):
+        """合并同一分类的文件（keep_document=True时在结果中附带合并后的文档）
+        
+        传入mapping_factory时合并结果存放在其创建的映射中（内存预算模式），并逐条写出。
+        """
         try:
-            merged_yaml = {
-                'openapi': '3.1.0',
-                'info': {
-                    'title': f'{category_name} API',
-                    'description': f'{category_name}相关的API接口',
-                    'version': '1.0.0'
-                },
-                'servers': [
-                    {'url': 'https://api.gpt.ge', 'description': '生产环境'}
-                ],
-                'paths': {}
-            }
+            merged_yaml = self._spec_header(f'{category_name} API', f'{category_name}相关的API接口')
+            merged_yaml['paths'] = {}
             
-            # 合并所有文件的paths
+            # 合并所有文件的paths和components（结构相同的schema只保留一份）
+            merger = SpecMerger(mapping_factory=mapping_factory)
             for filename in file_list:
-                file_path = os.path.join(yml_dir, filename)
-                
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    yaml_content = f.read()
-                
-                parsed = yaml.safe_load(yaml_content)
+                yaml_content, parsed = self._read_yaml_file(yml_dir, filename)
+                if parsed is None:
+                    parsed = load_yaml(yaml_content)
                 if parsed and 'paths' in parsed:
-                    # 合并paths，避免重复
-                    for path, methods in parsed['paths'].items():
-                        if path not in merged_yaml['paths']:
-                            merged_yaml['paths'][path] = methods
-                        else:
-                            # 合并HTTP方法
-                            for method, details in methods.items():
-                                merged_yaml['paths'][path][method] = details
+                    merger.add_document(parsed, source=filename)
+            
+            merged_yaml = merger.build(merged_yaml)
             
             # 保存合并后的文件
-            output_filename = f"{category_name.replace(' ', '_')}.yml"
-            output_path = os.path.join(self.final_dir, output_filename)
+            output_name = category_name.replace(' ', '_')
+            output_filename = f"{output_name}.yml"
+            writer = write_spec_stream if mapping_factory else write_spec
+            output_files = [
+                os.path.basename(writer(merged_yaml, os.path.join(self.final_dir, output_name), fmt))
+                for fmt in self.output_formats
+            ]
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                yaml.dump(merged_yaml, f, default_flow_style=False, 
-                         allow_unicode=True, sort_keys=False)
+            summary = merger.summary()
+            if merger.conflicts:
+                log.info('合并冲突', category=category_name, conflicts=len(merger.conflicts))
             
-            return {
+            result = {
                 'success': True,
                 'output_file': output_filename,
-                'api_count': len(merged_yaml['paths'])
+                'output_files': output_files,
+                'api_count': len(merged_yaml['paths']),
+                'schema_count': len(merged_yaml.get('components', {}).get('schemas', {})),
+                'deduplicated': summary['deduplicated'],
+                'conflicts': merger.conflicts
             }
+            if keep_document:
+                result['document'] = merged_yaml
+            return result
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def _write_merge_report(self, conflicts):
+        """写入合并冲突报告（无冲突时删除旧报告）"""
+        report_path = os.path.join(self.final_dir, 'merge_report.json')
+        
+        if not conflicts:
+            if os.path.exists(report_path):
+                os.remove(report_path)
+            return None
+        
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({'conflicts': conflicts}, f, ensure_ascii=False, indent=2)
+        
+        log.info('合并冲突报告', report_path=report_path)
+        return report_path
+    
     def get_processing_stats(self):
         """获取处理统计信息"""
+        if self.store is not None:
+            stats = self.store.counts()
+            stats['stage1'].pop('md_bytes')
+            return stats
+        
         stats = {
             'stage1': {'md_files': 0},
             'stage2': {'md_files': 0, 'yml_files': 0},
@@ -425,15 +1005,15 @@ class ApiProcessor:
         
         return stats
     
-    def _copy_docs_to_final(self):
-        """复制纯文档MD文件到final/md目录（只复制无法转换为YAML的MD文件）"""
-        print("\n=== 复制纯文档MD文件到final/md目录 ===")
+    def _list_docs_only_files(self):
+        """列出阶段1中无法转换为YAML的纯文档MD文件，返回 [(文件名, 源路径)]
         
-        # 创建final/md目录
-        final_md_dir = os.path.join(self.final_dir, 'md')
-        os.makedirs(final_md_dir, exist_ok=True)
-        
-        copied_count = 0
+        使用文档存储时源路径为None，内容从存储中读取。
+        """
+        if self.store is not None:
+            docs_files = [(filename, None) for filename in self.store.document_names(converted=False)]
+            log.info('纯文档统计', docs_only=len(docs_files))
+            return docs_files
         
         # 获取已转换为YAML的文件列表
         stage2_yml_dir = os.path.join(self.stage2_dir, 'yml')
@@ -442,43 +1022,67 @@ class ApiProcessor:
             for yml_file in os.listdir(stage2_yml_dir):
                 if yml_file.endswith('.yml'):
                     # 从YAML文件名推导出对应的MD文件名
-                    md_filename = yml_file.replace('.yml', '.md')
-                    converted_files.add(md_filename)
-        
-        print(f"已转换为YAML的文件数量: {len(converted_files)}")
+                    converted_files.add(yml_file[:-len('.yml')] + '.md')
         
-        # 从stage1/md目录复制未转换的MD文件（纯文档）
         stage1_md_dir = os.path.join(self.stage1_dir, 'md')
-        if os.path.exists(stage1_md_dir):
-            for filename in os.listdir(stage1_md_dir):
-                if filename.endswith('.md'):
-                    # 只复制没有对应YAML文件的MD文件（纯文档）
-                    if filename not in converted_files:
-                        source_path = os.path.join(stage1_md_dir, filename)
-                        target_path = os.path.join(final_md_dir, filename)
-                        
-                        try:
-                            shutil.copy2(source_path, target_path)
-                            copied_count += 1
-                            print(f"复制纯文档: {filename}")
-                        except Exception as e:
-                            print(f"复制失败 {filename}: {str(e)}")
-                    else:
-                        print(f"跳过已转换文档: {filename}")
-        else:
-            print(f"警告: 阶段1 MD目录不存在 {stage1_md_dir}")
+        if not os.path.exists(stage1_md_dir):
+            log.warning('阶段1 MD目录不存在', directory=stage1_md_dir)
+            return []
         
-        print(f"纯文档复制完成: 共复制 {copied_count} 个纯文档文件到 {final_md_dir}")
-    
-    def _create_docs_zip(self):
-        """创建文档ZIP文件"""
-        print("\n=== 创建文档ZIP文件 ===")
+        docs_files = []
+        for filename in sorted(os.listdir(stage1_md_dir)):
+            # 只保留没有对应YAML文件的MD文件（纯文档）
+            if filename.endswith('.md') and filename not in converted_files:
+                docs_files.append((filename, os.path.join(stage1_md_dir, filename)))
         
+        log.info('纯文档统计', converted=len(converted_files), docs_only=len(docs_files))
+        return docs_files
+    
+    def _copy_docs_to_final(self, docs_files=None):
+        """复制纯文档MD文件到final/md目录（只复制无法转换为YAML的MD文件）"""
+        # 创建final/md目录
         final_md_dir = os.path.join(self.final_dir, 'md')
+        os.makedirs(final_md_dir, exist_ok=True)
         
-        if not os.path.exists(final_md_dir):
-            print(f"警告: 文档目录不存在 {final_md_dir}")
-            return None
+        if docs_files is None:
+            docs_files = self._list_docs_only_files()
+        
+        copied_count = 0
+        for filename, source_path in docs_files:
+            try:
+                if source_path is None:
+                    with open(os.path.join(final_md_dir, filename), 'w', encoding='utf-8') as f:
+                        f.write(self.store.read_raw(filename))
+                else:
+                    shutil.copy2(source_path, os.path.join(final_md_dir, filename))
+                copied_count += 1
+            except Exception as e:
+                log.warning('复制纯文档失败', filename=filename, error=str(e))
+        
+        log.info('纯文档复制完成', copied=copied_count, directory=final_md_dir)
+    
+    def build_docs_zip(self, docs_files=None, compression_level=None, store_only=None):
+        """构建纯文档ZIP（直接读取阶段1源文件，不经过final/md中转）"""
+        if docs_files is None:
+            docs_files = self._list_docs_only_files()
+        
+        builder = DocsZipBuilder(
+            compression_level=self.zip_compression_level if compression_level is None else compression_level,
+            store_only=self.zip_store_only if store_only is None else store_only,
+            max_workers=self.zip_workers
+        )
+        for filename, source_path in docs_files:
+            # 在ZIP中保持相对路径结构
+            if source_path is None:
+                builder.add_bytes(f"docs/{filename}", self.store.read_raw(filename).encode('utf-8'))
+            else:
+                builder.add_file(f"docs/{filename}", source_path)
+        
+        return builder
+    
+    def _create_docs_zip(self, docs_files=None):
+        """创建文档ZIP文件"""
+        builder = self.build_docs_zip(docs_files)
         
         # 生成ZIP文件名（包含时间戳）
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -486,22 +1090,40 @@ class ApiProcessor:
         zip_path = os.path.join(self.final_dir, zip_filename)
         
         try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # 只添加纯文档MD文件到ZIP
-                for filename in os.listdir(final_md_dir):
-                    if filename.endswith('.md'):
-                        file_path = os.path.join(final_md_dir, filename)
-                        # 在ZIP中保持相对路径结构
-                        arcname = os.path.join('docs', filename)
-                        zipf.write(file_path, arcname)
-                        print(f"添加纯文档到ZIP: {filename}")
-            
-            print(f"纯文档ZIP文件创建完成: {zip_path}")
+            size = builder.save(zip_path)
+            log.info('纯文档ZIP文件创建完成', zip_path=zip_path, files=len(builder), bytes=size)
+            self._prune_docs_zips()
             return zip_filename
             
         except Exception as e:
-            print(f"创建ZIP文件失败: {str(e)}")
+            FAILURES.inc(stage='zip', reason='error')
+            log.error('创建ZIP文件失败', error=str(e))
+            return None
+    
+    def _prune_docs_zips(self):
+        """按保留策略删除旧的文档ZIP（文件名带时间戳，最新的一个总是保留）"""
+        zip_files = sorted((name for name in os.listdir(self.final_dir)
+                            if name.startswith('apifox_docs_') and name.endswith('.zip')), reverse=True)
+        now = time.time()
+        removed = 0
+        for i, name in enumerate(zip_files[1:], 1):
+            path = os.path.join(self.final_dir, name)
+            try:
+                expired = self.zip_max_age is not None and now - os.path.getmtime(path) > self.zip_max_age
+                if i >= self.zip_keep or expired:
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                log.warning('删除旧文档ZIP失败', filename=name, error=str(e))
+        if removed:
+            log.info('已删除旧文档ZIP', removed=removed, kept=len(zip_files) - removed)
+        return removed
+    
+    def export_files(self):
+        """把文档存储中的内容导出为 01/md、02/md、02/yml 目录（未使用文档存储时不做任何事）"""
+        if self.store is None:
             return None
+        return self.store.export(self.stage1_dir, self.stage2_dir)
     
     def cleanup_intermediate_files(self):
         """清理中间文件"""
@@ -513,11 +1135,11 @@ class ApiProcessor:
             if os.path.exists(self.stage2_dir):
                 shutil.rmtree(self.stage2_dir)
             
-            print("中间文件清理完成")
+            log.info('中间文件清理完成')
             return True
             
         except Exception as e:
-            print(f"清理中间文件失败: {str(e)}")
+            log.error('清理中间文件失败', error=str(e))
             return False
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import io
+import re
+import time
+import pstats
+import cProfile
+import functools
+import threading
+import contextvars
+import tracemalloc
+from contextlib import contextmanager
+
+from .log import get_logger
+
+log = get_logger('profiling')
+
+PROFILE_MODES = ('cpu', 'memory')
+
+# 性能分析文件名：<阶段>.cpu.prof / .cpu.txt / .memory.txt / .memory.tracemalloc
+_PROFILE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+\.(cpu|memory)\.(prof|txt|tracemalloc)$')
+
+# tracemalloc由多个任务共用：第一个开始的任务启动，最后一个结束的任务停止
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+# 当前线程所在阶段的线程性能分析（_ThreadProfiles），由profiled()传给线程池中的任务
+_current_threads = contextvars.ContextVar('stage_thread_profiles', default=None)
+
+
+def parse_modes(value):
+    """解析性能分析开关：True/'1'/'all' 为全部，'cpu,memory' 或列表为指定项，空值为关闭"""
+    if value is None or value is False:
+        return ()
+    if value is True:
+        return PROFILE_MODES
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in ('', '0', 'false', 'off', 'none'):
+            return ()
+        if value in ('1', 'true', 'on', 'all'):
+            return PROFILE_MODES
+        value = value.split(',')
+    modes = []
+    for mode in value:
+        mode = str(mode).strip().lower()
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"不支持的性能分析类型: {mode}（可选: {', '.join(PROFILE_MODES)}）")
+        if mode not in modes:
+            modes.append(mode)
+    return tuple(modes)
+
+
+def profiled(func):
+    """包装提交到线程池的任务，使其计入当前阶段的CPU分析（没有进行中的CPU分析时原样返回）
+
+    只用于线程池，包装后的函数不能传给进程池。
+    """
+    threads = _current_threads.get()
+    if threads is None:
+        return func
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        # 任务中再提交的任务同样计入该阶段
+        token = _current_threads.set(threads)
+        try:
+            with threads.profile():
+                return func(*args, **kwargs)
+        finally:
+            _current_threads.reset(token)
+    return run
+
+
+class _ThreadProfiles:
+    """一个阶段内各线程的cProfile - 每个线程一个，只在该线程中启用和停用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 线程ID -> [cProfile, 正在执行的任务数]
+        self._profiles = {}
+        self._closed = False
+
+    @contextmanager
+    def profile(self):
+        ident = threading.get_ident()
+        with self._lock:
+            entry = None
+            if not self._closed:
+                entry = self._profiles.setdefault(ident, [cProfile.Profile(), 0])
+                entry[1] += 1
+                if entry[1] == 1:
+                    entry[0].enable()
+        try:
+            yield
+        finally:
+            if entry is not None:
+                with self._lock:
+                    entry[1] -= 1
+                    if entry[1] == 0:
+                        entry[0].disable()
+
+    def close(self):
+        """结束统计，返回已停用的cProfile（阶段结束后仍在执行的任务不计入）"""
+        with self._lock:
+            self._closed = True
+            return [profile for profile, running in self._profiles.values() if running == 0]
+
+
+def is_profile_name(filename):
+    return bool(_PROFILE_NAME_PATTERN.match(filename))
+
+
+def list_profiles(output_dir):
+    """列出目录中的性能分析文件"""
+    if not output_dir or not os.path.isdir(output_dir):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(output_dir)):
+        if not is_profile_name(name):
+            continue
+        stat = os.stat(os.path.join(output_dir, name))
+        profiles.append({
+            'filename': name,
+            'size': stat.st_size,
+            'modified': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stat.st_mtime))
+        })
+    return profiles
+
+
+class StageProfiler:
+    """按阶段的性能分析 - modes为空时不做任何事
+
+    cpu: cProfile统计进入阶段的线程，以及阶段内通过profiled()提交到线程池的任务，结果合并写出；
+         其他任务的线程和子进程（并行转换/合并）中的调用不在统计范围内。
+    memory: tracemalloc记录阶段内的内存分配，写出峰值、分配最多的代码行和可离线比较的快照。
+    """
+
+    def __init__(self, output_dir, modes=(), top=50, memory_frames=5):
+        self.output_dir = output_dir
+        self.modes = tuple(modes) if output_dir else ()
+        self.top = top
+        self.memory_frames = memory_frames
+
+    @property
+    def enabled(self):
+        return bool(self.modes)
+
+    @contextmanager
+    def stage(self, name):
+        """分析代码块，结束时（包括异常退出）写出 <output_dir>/<name>.*"""
+        if not self.modes:
+            yield
+            return
+
+        cpu = 'cpu' in self.modes
+        memory = 'memory' in self.modes
+        start = time.perf_counter()
+
+        if memory:
+            self._start_tracemalloc()
+        if cpu:
+            profile = cProfile.Profile()
+            threads = _ThreadProfiles()
+            token = _current_threads.set(threads)
+            profile.enable()
+
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if cpu:
+                profile.disable()
+                _current_threads.reset(token)
+                profiles = [profile] + threads.close()
+            snapshot = peak = None
+            if memory:
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                self._stop_tracemalloc()
+
+            try:
+                os.makedirs(self.output_dir, exist_ok=True)
+                if cpu:
+                    self._write_cpu(name, profiles, elapsed)
+                if memory:
+                    self._write_memory(name, snapshot, peak, elapsed)
+                log.info('性能分析已写出', stage=name, modes=','.join(self.modes), output_dir=self.output_dir)
+            except Exception as e:
+                log.error('写出性能分析失败', stage=name, error=str(e))
+
+    def _start_tracemalloc(self):
+        global _tracemalloc_users
+        with _tracemalloc_lock:
+            if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(self.memory_frames)
+            else:
+                tracemalloc.reset_peak()
+            _tracemalloc_users += 1
+
+    @staticmethod
+    def _stop_tracemalloc():
+        global _tracemalloc_users
+        with _tracemalloc_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0:
+                tracemalloc.stop()
+
+    def _write_cpu(self, name, profiles, elapsed):
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+
+        stats.dump_stats(os.path.join(self.output_dir, f'{name}.cpu.prof'))
+
+        text = io.StringIO()
+        text.write(f"阶段: {name}\n耗时: {elapsed:.3f}s\n线程数: {len(profiles)}\n\n")
+        stats.stream = text
+        stats.sort_stats('cumulative').print_stats(self.top)
+        stats.sort_stats('tottime').print_stats(self.top)
+        with open(os.path.join(self.output_dir, f'{name}.cpu.txt'), 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+
+    def _write_memory(self, name, snapshot, peak, elapsed):
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ])
+        snapshot.dump(os.path.join(self.output_dir, f'{name}.memory.tracemalloc'))
+
+        stats = snapshot.statistics('lineno')
+        lines = [
+            f"阶段: {name}",
+            f"耗时: {elapsed:.3f}s",
+            f"内存峰值: {peak / 1024 / 1024:.1f}MB",
+            f"阶段结束时仍占用: {sum(stat.size for stat in stats) / 1024 / 1024:.1f}MB",
+            '',
+            f"占用最多的{self.top}处代码:",
+        ]
+        lines.extend(str(stat) for stat in stats[:self.top])
+        with open(os.path.join(self.output_dir, f'{name}.memory.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from urllib.parse import urlsplit
+
+# 不进入缓存的文件：增量合并的内部状态和未完成的临时文件
+_IGNORE_PATTERNS = shutil.ignore_patterns('.cache', '.stage3_manifest.json', '.lock', '*.tmp')
+
+
+def normalize_base_url(url):
+    """规范化站点URL：协议和域名小写，去掉默认端口、查询参数、末尾斜杠和llms.txt"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip('/')
+    if path.endswith('/llms.txt'):
+        path = path[:-len('/llms.txt')]
+    return f"{scheme}://{host}{path}"
+
+
+def _tree_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ResultCache:
+    """抓取结果缓存 - 按站点URL和llms.txt摘要缓存最终产物
+
+    每个缓存项是一个目录: <cache_dir>/<key>/{meta.json, final/}。
+    写入时先在临时目录中完成再改名，过期（ttl秒）或超出数量/大小上限时按最近访问时间淘汰。
+    """
+
+    def __init__(self, cache_dir, ttl=86400, max_entries=50, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(url, llms_content, variant=''):
+        """计算缓存键：规范化URL + llms.txt摘要 + 输出配置"""
+        llms_digest = hashlib.sha256(llms_content.encode('utf-8')).hexdigest()
+        key_source = '\0'.join([normalize_base_url(url), llms_digest, variant])
+        return hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, entry_dir, meta):
+        meta_path = os.path.join(entry_dir, 'meta.json')
+        tmp_path = f"{meta_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, meta_path)
+
+    def _expired(self, meta, now=None):
+        return self.ttl is not None and (now or time.time()) - meta['created_at'] > self.ttl
+
+    def get(self, key):
+        """返回未过期的缓存项元数据，并刷新最近访问时间"""
+        with self._lock:
+            meta = self._read_meta(key)
+            if meta is None:
+                return None
+            if self._expired(meta):
+                self._remove(key)
+                return None
+
+            meta['last_access'] = time.time()
+            meta['hits'] = meta.get('hits', 0) + 1
+            try:
+                self._write_meta(self._entry_dir(key), meta)
+            except FileNotFoundError:
+                # 缓存目录可能被多个进程共用，其他进程刚淘汰了该缓存项
+                return None
+            return meta
+
+    def restore(self, key, target_dir):
+        """把缓存的产物复制到目标目录，未命中时返回None"""
+        meta = self.get(key)
+        if meta is None:
+            return None
+
+        try:
+            shutil.copytree(os.path.join(self._entry_dir(key), 'final'), target_dir,
+                            dirs_exist_ok=True)
+        except (FileNotFoundError, shutil.Error):
+            # 复制过程中缓存项被（其他进程）淘汰，目标目录中可能只有部分文件，由调用方删除
+            return None
+        return meta
+
+    def put(self, key, source_dir, meta=None):
+        """把目录中的最终产物写入缓存"""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = os.path.join(self.cache_dir, f".tmp-{key}-{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        try:
+            shutil.copytree(source_dir, os.path.join(tmp_dir, 'final'), ignore=_IGNORE_PATTERNS)
+            now = time.time()
+            meta = dict(meta or {}, key=key, created_at=now, last_access=now, hits=0,
+                        size=_tree_size(tmp_dir))
+            self._write_meta(tmp_dir, meta)
+
+            with self._lock:
+                self._remove(key)
+                try:
+                    os.replace(tmp_dir, entry_dir)
+                except OSError:
+                    if not os.path.isdir(entry_dir):
+                        raise
+                    # 其他进程同时写入了同一缓存项，保留先写入的
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.evict()
+        return meta
+
+    def _remove(self, key):
+        """删除缓存项；线程锁只在进程内有效，其他进程可能同时删除同一项，不存在时忽略"""
+        entry_dir = self._entry_dir(key)
+        # 先改名再删除，避免其他进程读到删除了一半的缓存项
+        trash_dir = f"{entry_dir}.trash-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.replace(entry_dir, trash_dir)
+        except FileNotFoundError:
+            return
+        shutil.rmtree(trash_dir, ignore_errors=True)
+
+    def entries(self):
+        metas = []
+        for key in os.listdir(self.cache_dir):
+            if key.startswith('.') or '.trash-' in key:
+                continue
+            meta = self._read_meta(key)
+            if meta is not None:
+                metas.append(meta)
+        return metas
+
+    def evict(self):
+        """淘汰过期缓存项，再按最近访问时间淘汰到数量和大小上限以内"""
+        with self._lock:
+            now = time.time()
+            metas = []
+            for meta in self.entries():
+                if self._expired(meta, now):
+                    self._remove(meta['key'])
+                else:
+                    metas.append(meta)
+
+            metas.sort(key=lambda meta: meta.get('last_access', 0))
+            total = sum(meta.get('size', 0) for meta in metas)
+            evicted = 0
+            while metas and (len(metas) > self.max_entries or total > self.max_bytes):
+                meta = metas.pop(0)
+                self._remove(meta['key'])
+                total -= meta.get('size', 0)
+                evicted += 1
+            return evicted
+
+    def clear(self):
+        with self._lock:
+            for meta in self.entries():
+                self._remove(meta['key'])
+
+    def stats(self):
+        metas = self.entries()
+        return {
+            'entries': len(metas),
+            'size': sum(meta.get('size', 0) for meta in metas),
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+            'items': [{key: meta.get(key) for key in ('key', 'url', 'created_at', 'last_access', 'hits', 'size')}
+                      for meta in metas]
+        }
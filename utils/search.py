@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import time
+import hashlib
+import sqlite3
+
+from .store import SQLiteDatabase
+from .shards import HTTP_METHODS
+from .log import get_logger
+
+log = get_logger('search')
+
+SEARCH_FILE = 'search.db'
+SEARCH_KINDS = ('operation', 'document')
+
+# trigram分词按字符切分，中文不需要分词器也能检索（SQLite 3.34起支持），更早的版本退回unicode61
+_TOKENIZER = 'trigram' if sqlite3.sqlite_version_info >= (3, 34, 0) else 'unicode61'
+# trigram不能检索少于3个字符的词，这类词改为在原文中查找
+_MIN_MATCH_LENGTH = 3 if _TOKENIZER == 'trigram' else 1
+
+_MARK = ('<mark>', '</mark>')
+_EXCERPT_CHARS = 60
+
+_SCHEMA = [
+    # 文档（清洗后的MD，纯文档为原文），全文表以文档表为外部内容，由触发器同步
+    '''CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        digest TEXT NOT NULL,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )''',
+    f'''CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+        title, content, content='documents', content_rowid='id', tokenize='{_TOKENIZER}'
+    )''',
+    '''CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+        INSERT INTO documents_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+        INSERT INTO documents_fts (documents_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END''',
+    # 文档中YAML定义的接口
+    '''CREATE TABLE IF NOT EXISTS operations (
+        id INTEGER PRIMARY KEY,
+        document TEXT NOT NULL,
+        method TEXT NOT NULL,
+        path TEXT NOT NULL,
+        operation_id TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        description TEXT NOT NULL,
+        parameters TEXT NOT NULL,
+        tags TEXT NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_operations_document ON operations (document)',
+    f'''CREATE VIRTUAL TABLE IF NOT EXISTS operations_fts USING fts5(
+        method, path, operation_id, summary, description, parameters, tags,
+        content='operations', content_rowid='id', tokenize='{_TOKENIZER}'
+    )''',
+    '''CREATE TRIGGER IF NOT EXISTS operations_ai AFTER INSERT ON operations BEGIN
+        INSERT INTO operations_fts (rowid, method, path, operation_id, summary, description, parameters, tags)
+        VALUES (new.id, new.method, new.path, new.operation_id, new.summary, new.description, new.parameters, new.tags);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS operations_ad AFTER DELETE ON operations BEGIN
+        INSERT INTO operations_fts (operations_fts, rowid, method, path, operation_id, summary, description,
+                                    parameters, tags)
+        VALUES ('delete', old.id, old.method, old.path, old.operation_id, old.summary, old.description, old.parameters, old.tags);
+    END''',
+]
+
+# 各列的相关度权重：path和operationId命中最重要
+_OPERATION_WEIGHTS = '1.0, 8.0, 6.0, 4.0, 1.0, 2.0, 2.0'
+_DOCUMENT_WEIGHTS = '4.0, 1.0'
+
+_OPERATION_TEXT = "lower(o.method || ' ' || o.path || ' ' || o.operation_id || ' ' || o.summary || ' ' || o.description " \
+                  "|| ' ' || o.parameters || ' ' || o.tags)"
+_DOCUMENT_TEXT = "lower(d.title || ' ' || d.content)"
+
+
+def _check_fts5():
+    try:
+        conn = sqlite3.connect(':memory:')
+        try:
+            conn.execute('CREATE VIRTUAL TABLE t USING fts5(c)')
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+# 当前SQLite是否编译了FTS5（未编译时不建立全文索引）
+FTS5_AVAILABLE = _check_fts5()
+
+
+def _title(content):
+    """文档标题：第一个Markdown标题"""
+    match = re.search(r'^#{1,6}\s+(.+?)\s*#*$', content, re.MULTILINE)
+    return match.group(1) if match else ''
+
+
+def _parameter_text(operation, shared_parameters):
+    """参数和请求体字段的名称、位置和说明"""
+    parts = []
+    for parameter in list(shared_parameters) + list(operation.get('parameters') or []):
+        if not isinstance(parameter, dict):
+            continue
+        if '$ref' in parameter:
+            parts.append(str(parameter['$ref']).rsplit('/', 1)[-1])
+            continue
+        parts.extend(str(parameter[key]) for key in ('name', 'in', 'description') if parameter.get(key))
+
+    body = operation.get('requestBody')
+    content = body.get('content') if isinstance(body, dict) else None
+    for media in (content or {}).values():
+        schema = media.get('schema') if isinstance(media, dict) else None
+        properties = schema.get('properties') if isinstance(schema, dict) else None
+        for name, prop in (properties or {}).items():
+            parts.append(str(name))
+            if isinstance(prop, dict) and prop.get('description'):
+                parts.append(str(prop['description']))
+    return ' '.join(parts)
+
+
+def extract_operations(spec):
+    """从OpenAPI文档中提取接口 (method, path, operationId, summary, description, 参数文本, tags)"""
+    paths = spec.get('paths') if isinstance(spec, dict) else None
+    operations = []
+    for path, methods in (paths or {}).items():
+        if not isinstance(methods, dict):
+            continue
+        shared_parameters = methods.get('parameters') or []
+        for method, operation in methods.items():
+            if method.lower() not in HTTP_METHODS or not isinstance(operation, dict):
+                continue
+            operations.append((
+                method.upper(), str(path), str(operation.get('operationId') or ''),
+                str(operation.get('summary') or ''), str(operation.get('description') or ''),
+                _parameter_text(operation, shared_parameters),
+                ' '.join(str(tag) for tag in operation.get('tags') or [])
+            ))
+    return operations
+
+
+def _split_terms(terms):
+    """拆分为 (全文匹配的词, 需要在原文中查找的短词)"""
+    return ([term for term in terms if len(term) >= _MIN_MATCH_LENGTH],
+            [term for term in terms if len(term) < _MIN_MATCH_LENGTH])
+
+
+def _match_expression(terms):
+    """每个词作为短语（转义双引号），全部匹配"""
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _excerpt(text, terms):
+    """原文中第一个命中词附近的片段（未使用全文匹配时代替snippet）"""
+    lowered = text.lower()
+    positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    if not positions:
+        return text[:_EXCERPT_CHARS * 2]
+    start = max(0, min(positions) - _EXCERPT_CHARS)
+    end = min(len(text), min(positions) + _EXCERPT_CHARS)
+    excerpt = text[start:end]
+    for term in terms:
+        excerpt = re.sub(re.escape(term), lambda m: f"{_MARK[0]}{m.group(0)}{_MARK[1]}", excerpt,
+                         flags=re.IGNORECASE)
+    return ('…' if start else '') + excerpt + ('…' if end < len(text) else '')
+
+
+class SearchIndex(SQLiteDatabase):
+    """工作目录的全文索引（SQLite FTS5）- 覆盖清洗后的MD、接口的path、summary和参数
+
+    阶段2每转换一个文档就更新该文档的索引（内容摘要未变时跳过），抓取结束后用prune()
+    删除已不存在的文档。检索是索引查询，不再读取final目录中的YAML文件。
+    """
+
+    def __init__(self, db_path):
+        super().__init__(db_path, _SCHEMA)
+
+    def index_document(self, name, content, spec=None):
+        """更新单个文档及其接口的索引，内容未变化时返回False"""
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        row = self._connect().execute('SELECT digest FROM documents WHERE name = ?', (name,)).fetchone()
+        if row is not None and row[0] == digest:
+            return False
+
+        statements = [
+            ('DELETE FROM operations WHERE document = ?', (name,)),
+            ('DELETE FROM documents WHERE name = ?', (name,)),
+            ('INSERT INTO documents (name, digest, title, content, updated_at) VALUES (?, ?, ?, ?, ?)',
+             (name, digest, _title(content), content, time.time())),
+        ]
+        statements.extend((
+            'INSERT INTO operations (document, method, path, operation_id, summary, description, parameters, tags) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (name,) + operation
+        ) for operation in extract_operations(spec))
+        self._transaction(statements)
+        return True
+
+    def prune(self, names):
+        """删除不在names中的文档（本轮抓取中已不存在），返回删除数量"""
+        names = set(names)
+        stale = [name for (name,) in self._connect().execute('SELECT name FROM documents') if name not in names]
+        statements = []
+        for name in stale:
+            statements.append(('DELETE FROM operations WHERE document = ?', (name,)))
+            statements.append(('DELETE FROM documents WHERE name = ?', (name,)))
+        if statements:
+            self._transaction(statements)
+            log.info('全文索引已删除过期文档', removed=len(stale))
+        return len(stale)
+
+    def counts(self):
+        conn = self._connect()
+        return {
+            'documents': conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0],
+            'operations': conn.execute('SELECT COUNT(*) FROM operations').fetchone()[0]
+        }
+
+    def search(self, query, kind=None, limit=20):
+        """检索接口和文档：query按空白拆分为多个词，全部命中才返回，结果按相关度排序
+
+        kind为operation/document时只检索一类，返回 {'operations': [...], 'documents': [...]}。
+        """
+        terms = list(dict.fromkeys(term.lower() for term in query.split()))
+        results = {}
+        if not terms:
+            return results
+        if kind in (None, 'operation'):
+            results['operations'] = self._search_operations(terms, limit)
+        if kind in (None, 'document'):
+            results['documents'] = self._search_documents(terms, limit)
+        return results
+
+    def _search_operations(self, terms, limit):
+        match_terms, scan_terms = _split_terms(terms)
+        columns = 'o.document, o.method, o.path, o.operation_id, o.summary'
+        params = []
+        if match_terms:
+            sql = (f"SELECT {columns}, bm25(operations_fts, {_OPERATION_WEIGHTS}) AS score "
+                   "FROM operations_fts JOIN operations o ON o.id = operations_fts.rowid "
+                   "WHERE operations_fts MATCH ?")
+            params.append(_match_expression(match_terms))
+            order = 'score'
+        else:
+            # 只有短词时按行号扫描，找够limit条即停止
+            sql = f"SELECT {columns}, NULL AS score FROM operations o WHERE 1"
+            order = 'o.id'
+        sql += ''.join(f" AND instr({_OPERATION_TEXT}, ?) > 0" for _ in scan_terms)
+        rows = self._connect().execute(f'{sql} ORDER BY {order} LIMIT ?', params + scan_terms + [limit])
+        return [{
+            'document': document,
+            'method': method,
+            'path': path,
+            'operation_id': operation_id or None,
+            'summary': summary,
+            'score': None if score is None else round(-score, 3)
+        } for document, method, path, operation_id, summary, score in rows]
+
+    def _search_documents(self, terms, limit):
+        match_terms, scan_terms = _split_terms(terms)
+        params = []
+        if match_terms:
+            sql = (f"SELECT d.name, d.title, snippet(documents_fts, 1, '{_MARK[0]}', '{_MARK[1]}', '…', 64), "
+                   f"bm25(documents_fts, {_DOCUMENT_WEIGHTS}) AS score "
+                   "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+                   "WHERE documents_fts MATCH ?")
+            params.append(_match_expression(match_terms))
+            order = 'score'
+        else:
+            sql = "SELECT d.name, d.title, d.content, NULL AS score FROM documents d WHERE 1"
+            order = 'd.id'
+        sql += ''.join(f" AND instr({_DOCUMENT_TEXT}, ?) > 0" for _ in scan_terms)
+        rows = self._connect().execute(f'{sql} ORDER BY {order} LIMIT ?', params + scan_terms + [limit])
+        return [{
+            'name': name,
+            'title': title,
+            'snippet': text if score is not None else _excerpt(text, terms),
+            'score': None if score is None else round(-score, 3)
+        } for name, title, text, score in rows]
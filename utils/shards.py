@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import shutil
+import hashlib
+
+from .merger import collect_refs
+from .formats import dumps_json
+
+SHARD_MODES = ('tag', 'operation')
+HTTP_METHODS = {'get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace'}
+
+_REF_PREFIX = '#/components/'
+
+
+def shard_id_for(name, key=None):
+    """生成文件名安全且唯一的分片ID（key决定唯一性，默认为name本身）"""
+    digest = hashlib.sha1((key or name).encode('utf-8')).hexdigest()[:8]
+    safe_name = re.sub(r'[^\w\-]', '_', name).strip('_')[:60] or 'shard'
+    return f"{safe_name}_{digest}"
+
+
+def referenced_components(obj, components):
+    """收集对象直接或间接引用到的components子集"""
+    subset = {}
+    pending = list(collect_refs(obj))
+    seen = set()
+
+    while pending:
+        ref = pending.pop()
+        if ref in seen or not ref.startswith(_REF_PREFIX):
+            continue
+        seen.add(ref)
+
+        parts = ref[len(_REF_PREFIX):].split('/', 1)
+        if len(parts) != 2:
+            continue
+        section, name = parts
+        item = components.get(section, {}).get(name)
+        if item is None:
+            continue
+
+        subset.setdefault(section, {})[name] = item
+        pending.extend(collect_refs(item))
+
+    return subset
+
+
+class ShardWriter:
+    """分片输出 - 按tag或按operation把统一文档拆成多个小文件，并生成索引
+
+    operation模式下每个接口收到即写出；tag模式需要等全部接口到齐，
+    在close()时按tag写出（mapping_factory指定时各tag的接口暂存在其创建的映射中）。
+    索引文件index.json记录operationId和path到分片的映射。
+    """
+
+    def __init__(self, shard_dir, mode, header, mapping_factory=None):
+        if mode not in SHARD_MODES:
+            raise ValueError(f"不支持的分片模式: {mode}（可选: {', '.join(SHARD_MODES)}）")
+
+        self.shard_dir = shard_dir
+        self.mode = mode
+        self.header = header
+        self.index = {
+            'mode': mode,
+            'shards': {},
+            'operations': {},
+            'paths': {}
+        }
+
+        self._new_mapping = mapping_factory or dict
+        self._tags = {}
+        self._build_dir = f"{shard_dir}.tmp"
+        shutil.rmtree(self._build_dir, ignore_errors=True)
+        os.makedirs(self._build_dir)
+
+    def write_path(self, path, methods, components):
+        """接收统一文档中的一个path"""
+        if not isinstance(methods, dict):
+            return
+
+        for method, operation in methods.items():
+            if method.lower() not in HTTP_METHODS or not isinstance(operation, dict):
+                continue
+
+            if self.mode == 'operation':
+                name = operation.get('operationId') or f"{method}_{path}"
+                shard_id = shard_id_for(name, key=f"{method} {path}")
+                self._write_shard(shard_id, {path: {method: operation}}, components)
+                self._index_operation(shard_id, path, method, operation)
+            else:
+                tags = operation.get('tags') or ['default']
+                tag = str(tags[0])
+                tag_paths = self._tags.get(tag)
+                if tag_paths is None:
+                    tag_paths = self._tags[tag] = self._new_mapping()
+                tag_methods = tag_paths.get(path) or {}
+                tag_methods[method] = operation
+                tag_paths[path] = tag_methods
+
+    def _index_operation(self, shard_id, path, method, operation):
+        operation_id = operation.get('operationId')
+        if operation_id:
+            self.index['operations'][operation_id] = shard_id
+        self.index['paths'].setdefault(path, {})[method] = shard_id
+
+    def _write_shard(self, shard_id, paths, components):
+        document = dict(self.header)
+        document['paths'] = paths
+        subset = referenced_components(paths, components)
+        if subset:
+            document['components'] = subset
+
+        filename = f"{shard_id}.json"
+        with open(os.path.join(self._build_dir, filename), 'wb') as f:
+            f.write(dumps_json(document))
+
+        self.index['shards'][shard_id] = {
+            'file': filename,
+            'operations': sum(len(methods) for methods in paths.values())
+        }
+
+    def close(self, components):
+        """写出tag分片和索引，并替换旧的分片目录"""
+        try:
+            for tag, tag_paths in self._tags.items():
+                # 每次只载入一个tag的接口
+                paths = dict(tag_paths.items())
+                shard_id = shard_id_for(tag)
+                self._write_shard(shard_id, paths, components)
+                self.index['shards'][shard_id]['tag'] = tag
+                for path, methods in paths.items():
+                    for method, operation in methods.items():
+                        self._index_operation(shard_id, path, method, operation)
+            self._tags = {}
+
+            with open(os.path.join(self._build_dir, 'index.json'), 'wb') as f:
+                f.write(dumps_json(self.index))
+        except Exception:
+            self.abort()
+            raise
+
+        shutil.rmtree(self.shard_dir, ignore_errors=True)
+        os.replace(self._build_dir, self.shard_dir)
+
+        return {
+            'shard_dir': self.shard_dir,
+            'shard_count': len(self.index['shards']),
+            'operation_count': sum(len(methods) for methods in self.index['paths'].values())
+        }
+
+    def abort(self):
+        """放弃本次分片输出"""
+        shutil.rmtree(self._build_dir, ignore_errors=True)
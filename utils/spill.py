@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import pickle
+import sqlite3
+import tempfile
+import itertools
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from .log import get_logger
+
+log = get_logger('spill')
+
+# 顺序读取时每次从数据库取出的条数
+_PAGE_SIZE = 256
+
+
+def _encode_key(key):
+    # 键为字符串或字符串元组，编码为JSON文本以便在SQLite中比较
+    return json.dumps(key, ensure_ascii=False)
+
+
+def _decode_key(text):
+    key = json.loads(text)
+    return tuple(key) if isinstance(key, list) else key
+
+
+class SpillStore:
+    """磁盘键值存储（SQLite）- 内存中只保留不超过memory_budget字节的最近使用的值
+
+    值以pickle序列化后缓存，超出预算时最久未使用的值写入数据库（写回式缓存）。
+    各映射（SpillDict）共享同一份预算，取出的值是副本，修改后需要重新赋值。
+    数据库为临时文件，close()时删除。
+    """
+
+    def __init__(self, directory=None, memory_budget=64 * 1024 * 1024):
+        self.memory_budget = memory_budget
+        fd, self.path = tempfile.mkstemp(prefix='spill-', suffix='.db', dir=directory)
+        os.close(fd)
+
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        # 临时数据，不需要日志和同步；SQLite页缓存占预算的1/8
+        self._conn.execute('PRAGMA journal_mode=OFF')
+        self._conn.execute('PRAGMA synchronous=OFF')
+        self._conn.execute(f'PRAGMA cache_size=-{max(1024, memory_budget // 8 // 1024)}')
+        self._conn.execute('''CREATE TABLE items (
+            ns INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            value BLOB NOT NULL,
+            PRIMARY KEY (ns, key)
+        )''')
+        self._conn.execute('CREATE INDEX idx_items_order ON items (ns, seq)')
+
+        self._cache = OrderedDict()   # (ns, 键文本) -> [值的pickle, 未写入数据库, 顺序号]
+        self._cache_bytes = 0
+        self._namespaces = itertools.count(1)
+        self._seq = itertools.count(1)
+        self.spilled = 0
+
+    def mapping(self):
+        """新建一个映射"""
+        return SpillDict(self, next(self._namespaces))
+
+    def scope(self):
+        """新建一组映射，用完后一起释放（如单个分类的合并过程）"""
+        return SpillScope(self)
+
+    # ------------------------------------------------------------------
+    # 缓存
+    # ------------------------------------------------------------------
+
+    def _cache_put(self, cache_key, blob, dirty, seq):
+        previous = self._cache.pop(cache_key, None)
+        if previous is not None:
+            self._cache_bytes -= len(previous[0])
+            # 覆盖尚未写入的值时，新值同样需要写入；顺序号保持首次插入时的值
+            dirty = dirty or previous[1]
+            seq = previous[2]
+        self._cache[cache_key] = [blob, dirty, seq]
+        self._cache_bytes += len(blob)
+        if self._cache_bytes > self.memory_budget:
+            self._evict()
+
+    def _evict(self):
+        """淘汰最久未使用的值，直到缓存降到预算的3/4"""
+        target = self.memory_budget * 3 // 4
+        rows = []
+        while self._cache and self._cache_bytes > target:
+            (ns, key), (blob, dirty, seq) = self._cache.popitem(last=False)
+            self._cache_bytes -= len(blob)
+            if dirty:
+                rows.append((ns, key, seq, blob))
+        self._write(rows)
+
+    def _write(self, rows):
+        if not rows:
+            return
+        # 已存在的键保留原来的顺序号
+        self._conn.executemany(
+            'INSERT INTO items (ns, key, seq, value) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value',
+            rows
+        )
+        self.spilled += len(rows)
+
+    def _flush(self, ns=None):
+        """把缓存中尚未写入的值写入数据库（遍历和计数前调用）"""
+        rows = []
+        for (item_ns, key), entry in self._cache.items():
+            if entry[1] and (ns is None or item_ns == ns):
+                rows.append((item_ns, key, entry[2], entry[0]))
+                entry[1] = False
+        self._write(rows)
+
+    # ------------------------------------------------------------------
+    # 供SpillDict调用
+    # ------------------------------------------------------------------
+
+    def _get(self, ns, key):
+        cache_key = (ns, _encode_key(key))
+        entry = self._cache.get(cache_key)
+        if entry is not None:
+            self._cache.move_to_end(cache_key)
+            return pickle.loads(entry[0])
+
+        row = self._conn.execute('SELECT value, seq FROM items WHERE ns = ? AND key = ?', cache_key).fetchone()
+        if row is None:
+            raise KeyError(key)
+        self._cache_put(cache_key, row[0], False, row[1])
+        return pickle.loads(row[0])
+
+    def _set(self, ns, key, value):
+        # 顺序号在首次插入时分配；键已在数据库中时写入会保留原顺序号（与dict的插入顺序一致）
+        self._cache_put((ns, _encode_key(key)), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), True,
+                        next(self._seq))
+
+    def _delete(self, ns, key):
+        cache_key = (ns, _encode_key(key))
+        entry = self._cache.pop(cache_key, None)
+        if entry is not None:
+            self._cache_bytes -= len(entry[0])
+        deleted = self._conn.execute('DELETE FROM items WHERE ns = ? AND key = ?', cache_key).rowcount
+        if entry is None and not deleted:
+            raise KeyError(key)
+
+    def _contains(self, ns, key):
+        cache_key = (ns, _encode_key(key))
+        if cache_key in self._cache:
+            return True
+        return self._conn.execute('SELECT 1 FROM items WHERE ns = ? AND key = ?', cache_key).fetchone() is not None
+
+    def _count(self, ns):
+        self._flush(ns)
+        return self._conn.execute('SELECT COUNT(*) FROM items WHERE ns = ?', (ns,)).fetchone()[0]
+
+    def _items(self, ns):
+        """按首次插入的顺序分页读取，读取过程中可以继续写入其他映射"""
+        self._flush(ns)
+        last_seq = 0
+        while True:
+            rows = self._conn.execute(
+                'SELECT key, value, seq FROM items WHERE ns = ? AND seq > ? ORDER BY seq LIMIT ?',
+                (ns, last_seq, _PAGE_SIZE)
+            ).fetchall()
+            for key, value, seq in rows:
+                cache_key = (ns, key)
+                entry = self._cache.get(cache_key)
+                # 读取期间被修改过的值以缓存为准
+                yield _decode_key(key), pickle.loads(entry[0] if entry is not None else value)
+                last_seq = seq
+            if len(rows) < _PAGE_SIZE:
+                return
+
+    def _clear(self, namespaces):
+        namespaces = set(namespaces)
+        for cache_key in [cache_key for cache_key in self._cache if cache_key[0] in namespaces]:
+            self._cache_bytes -= len(self._cache.pop(cache_key)[0])
+        self._conn.executemany('DELETE FROM items WHERE ns = ?', [(ns,) for ns in namespaces])
+
+    def close(self):
+        if self._conn is None:
+            return
+        log.info('磁盘暂存已关闭', spilled=self.spilled, memory_budget=self.memory_budget)
+        self._conn.close()
+        self._conn = None
+        self._cache.clear()
+        for suffix in ('', '-journal'):
+            try:
+                os.remove(self.path + suffix)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class SpillScope:
+    """一组一起释放的映射"""
+
+    def __init__(self, store):
+        self.store = store
+        self._namespaces = []
+
+    def mapping(self):
+        mapping = self.store.mapping()
+        self._namespaces.append(mapping.ns)
+        return mapping
+
+    def release(self):
+        if self._namespaces:
+            self.store._clear(self._namespaces)
+            self._namespaces = []
+
+
+class SpillDict(MutableMapping):
+    """存放在SpillStore中的字典，按插入顺序遍历
+
+    取出的值是副本：修改嵌套的字典或集合后需要重新赋值（d[key] = value）才会保存。
+    """
+
+    def __init__(self, store, ns):
+        self.store = store
+        self.ns = ns
+
+    def __getitem__(self, key):
+        return self.store._get(self.ns, key)
+
+    def get(self, key, default=None):
+        try:
+            return self.store._get(self.ns, key)
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        self.store._set(self.ns, key, value)
+
+    def __delitem__(self, key):
+        self.store._delete(self.ns, key)
+
+    def __contains__(self, key):
+        return self.store._contains(self.ns, key)
+
+    def __len__(self):
+        return self.store._count(self.ns)
+
+    def __iter__(self):
+        for key, _ in self.store._items(self.ns):
+            yield key
+
+    def items(self):
+        return self.store._items(self.ns)
+
+    def values(self):
+        for _, value in self.store._items(self.ns):
+            yield value
+
+    def clear(self):
+        self.store._clear([self.ns])
+
+    def __bool__(self):
+        if any(cache_key[0] == self.ns for cache_key in self.store._cache):
+            return True
+        return self.store._conn.execute(
+            'SELECT 1 FROM items WHERE ns = ? LIMIT 1', (self.ns,)).fetchone() is not None
+
+    def __repr__(self):
+        return f'<SpillDict ns={self.ns}>'
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+from .log import get_logger
+
+log = get_logger('store')
+
+STORE_FILE = 'store.db'
+STORAGE_BACKENDS = ('files', 'sqlite')
+
+_SCHEMA = [
+    # 阶段1原始MD和阶段2清洗后的MD（converted=1表示已提取出YAML，其余为纯文档）
+    '''CREATE TABLE IF NOT EXISTS documents (
+        name TEXT PRIMARY KEY,
+        url TEXT,
+        raw TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        cleaned TEXT,
+        converted INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_documents_converted ON documents (converted, name)',
+    # 阶段2提取的YAML，阶段3分类后记录所属分类
+    '''CREATE TABLE IF NOT EXISTS yaml (
+        name TEXT PRIMARY KEY,
+        document TEXT NOT NULL,
+        content TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        category TEXT
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_yaml_document ON yaml (document)',
+    'CREATE INDEX IF NOT EXISTS idx_yaml_category ON yaml (category, name)',
+    # 阶段3各分类的合并结果
+    '''CREATE TABLE IF NOT EXISTS categories (
+        name TEXT PRIMARY KEY,
+        files INTEGER NOT NULL,
+        api_count INTEGER NOT NULL,
+        schema_count INTEGER NOT NULL,
+        output_files TEXT NOT NULL
+    )''',
+    # 最近一次构建的final目录产物（与产物索引同步）
+    '''CREATE TABLE IF NOT EXISTS artifacts (
+        name TEXT PRIMARY KEY,
+        ext TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        etag TEXT NOT NULL,
+        mimetype TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_artifacts_ext ON artifacts (ext)',
+]
+
+
+class SQLiteDatabase:
+    """工作目录中的SQLite数据库 - 每个线程（和进程）使用独立连接，开启WAL以支持多进程写入"""
+
+    def __init__(self, db_path, schema):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        for statement in schema:
+            conn.execute(statement)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        # 子进程（fork）不能沿用父进程的连接
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def __getstate__(self):
+        # 并行转换/合并时随处理器传给子进程，子进程自行打开连接
+        return {'db_path': self.db_path}
+
+    def __setstate__(self, state):
+        self.db_path = state['db_path']
+        self._local = threading.local()
+
+    def _transaction(self, statements):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for sql, params in statements:
+                conn.execute(sql, params)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+class ArtifactStore(SQLiteDatabase):
+    """工作目录的文档存储（SQLite）- 代替 01/md、02/md、02/yml 目录树
+
+    原始MD、清洗后的MD、YAML、分类和产物各占一张表，列出、计数和查找都是索引查询，
+    不再反复扫描目录中的大量小文件。需要文件时用export()导出为原来的目录结构。
+    """
+
+    def __init__(self, db_path):
+        super().__init__(db_path, _SCHEMA)
+
+    # ------------------------------------------------------------------
+    # 阶段1 / 阶段2：文档
+    # ------------------------------------------------------------------
+
+    def put_raw(self, name, content, url=None):
+        """保存下载的原始MD（覆盖同名文档及其转换结果）"""
+        self._transaction([
+            ('DELETE FROM yaml WHERE document = ?', (name,)),
+            ('INSERT OR REPLACE INTO documents (name, url, raw, size, cleaned, converted, updated_at) '
+             'VALUES (?, ?, ?, ?, NULL, 0, ?)', (name, url, content, len(content.encode('utf-8')), time.time())),
+        ])
+
+    def put_converted(self, name, cleaned, yml_name, yaml_content):
+        """保存清洗后的MD和提取的YAML"""
+        digest = hashlib.sha1(yaml_content.encode('utf-8')).hexdigest()
+        self._transaction([
+            ('UPDATE documents SET cleaned = ?, converted = 1, updated_at = ? WHERE name = ?',
+             (cleaned, time.time(), name)),
+            ('INSERT OR REPLACE INTO yaml (name, document, content, digest, category) VALUES (?, ?, ?, ?, NULL)',
+             (yml_name, name, yaml_content, digest)),
+        ])
+
+    def document_names(self, converted=None):
+        """按文件名排序列出文档，converted为True/False时只列出已转换的/纯文档"""
+        if converted is None:
+            rows = self._connect().execute('SELECT name FROM documents ORDER BY name').fetchall()
+        else:
+            rows = self._connect().execute(
+                'SELECT name FROM documents WHERE converted = ? ORDER BY name', (int(converted),)).fetchall()
+        return [row[0] for row in rows]
+
+    def read_raw(self, name):
+        row = self._connect().execute('SELECT raw FROM documents WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    # ------------------------------------------------------------------
+    # 阶段3：YAML和分类
+    # ------------------------------------------------------------------
+
+    def yaml_names(self):
+        return [row[0] for row in self._connect().execute('SELECT name FROM yaml ORDER BY name')]
+
+    def read_yaml(self, name):
+        row = self._connect().execute('SELECT content FROM yaml WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def save_categories(self, categories, results=None):
+        """记录分类结果：categories为 {分类名: [YAML文件名]}，results为 {分类名: 合并结果}"""
+        results = results or {}
+        statements = [('UPDATE yaml SET category = NULL', ()), ('DELETE FROM categories', ())]
+        for category, file_list in categories.items():
+            result = results.get(category) or {}
+            statements.extend(('UPDATE yaml SET category = ? WHERE name = ?', (category, name))
+                              for name in file_list)
+            statements.append((
+                'INSERT INTO categories (name, files, api_count, schema_count, output_files) VALUES (?, ?, ?, ?, ?)',
+                (category, len(file_list), result.get('api_count', 0), result.get('schema_count', 0),
+                 json.dumps(result.get('output_files', []), ensure_ascii=False))
+            ))
+        self._transaction(statements)
+
+    def list_categories(self):
+        rows = self._connect().execute(
+            'SELECT name, files, api_count, schema_count, output_files FROM categories ORDER BY name').fetchall()
+        return [{'name': name, 'files': files, 'api_count': api_count, 'schema_count': schema_count,
+                 'output_files': json.loads(output_files)}
+                for name, files, api_count, schema_count, output_files in rows]
+
+    # ------------------------------------------------------------------
+    # 产物
+    # ------------------------------------------------------------------
+
+    def replace_artifacts(self, entries):
+        """用产物索引的记录替换产物表"""
+        now = time.time()
+        statements = [('DELETE FROM artifacts', ())]
+        statements.extend((
+            'INSERT INTO artifacts (name, ext, size, etag, mimetype, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (entry['name'], os.path.splitext(entry['name'])[1], entry['size'], entry['etag'], entry['mimetype'], now)
+        ) for entry in entries)
+        self._transaction(statements)
+
+    def count_artifacts(self, ext):
+        return self._connect().execute('SELECT COUNT(*) FROM artifacts WHERE ext = ?', (ext,)).fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # 统计、清理和导出
+    # ------------------------------------------------------------------
+
+    def counts(self):
+        """各阶段的文档数量（与按目录统计的字段一致，另附原始MD的总字节数）"""
+        conn = self._connect()
+        documents = {converted: (count, size) for converted, count, size in conn.execute(
+            'SELECT converted, COUNT(*), SUM(size) FROM documents GROUP BY converted')}
+        return {
+            'stage1': {'md_files': sum(count for count, _ in documents.values()),
+                       'md_bytes': sum(size for _, size in documents.values())},
+            'stage2': {'md_files': documents.get(1, (0, 0))[0],
+                       'yml_files': conn.execute('SELECT COUNT(*) FROM yaml').fetchone()[0]},
+            'final': {'yml_files': self.count_artifacts('.yml')}
+        }
+
+    def clear_stages(self):
+        """开始新一轮抓取：清空文档、YAML和分类（产物表描述的final目录保留到被替换为止）"""
+        self._transaction([('DELETE FROM yaml', ()), ('DELETE FROM documents', ()), ('DELETE FROM categories', ())])
+        # 把WAL中的内容写回数据库并截断，避免WAL文件随抓取次数增长
+        self._connect().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def export(self, stage1_dir, stage2_dir):
+        """导出为原来的目录结构：<stage1_dir>/md、<stage2_dir>/md、<stage2_dir>/yml，返回各类文件数"""
+        targets = {
+            'stage1_md': os.path.join(stage1_dir, 'md'),
+            'stage2_md': os.path.join(stage2_dir, 'md'),
+            'stage2_yml': os.path.join(stage2_dir, 'yml')
+        }
+        for directory in targets.values():
+            os.makedirs(directory, exist_ok=True)
+
+        exported = dict.fromkeys(targets, 0)
+        conn = self._connect()
+        for name, raw, cleaned in conn.execute('SELECT name, raw, cleaned FROM documents'):
+            _write_text(os.path.join(targets['stage1_md'], name), raw)
+            exported['stage1_md'] += 1
+            if cleaned is not None:
+                _write_text(os.path.join(targets['stage2_md'], name), cleaned)
+                exported['stage2_md'] += 1
+        for name, content in conn.execute('SELECT name, content FROM yaml'):
+            _write_text(os.path.join(targets['stage2_yml'], name), content)
+            exported['stage2_yml'] += 1
+
+        log.info('文档存储已导出', **exported)
+        return exported
+
+
+def _write_text(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
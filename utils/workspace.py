@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import time
+import uuid
+import errno
+import queue
+import ctypes
+import shutil
+import fnmatch
+import threading
+from datetime import datetime
+
+from .log import get_logger
+from .store import ArtifactStore, STORE_FILE
+from .search import SearchIndex, SEARCH_FILE
+
+# 可选依赖：fcntl（多进程部署时的文件锁，Windows下不可用）
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 可选：Linux renameat2(RENAME_EXCHANGE)，原子交换两个目录（glibc 2.28+，其他平台不可用）
+try:
+    _renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    _renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+except (OSError, AttributeError, TypeError):
+    _renameat2 = None
+
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+DEFAULT_WORKSPACE = 'default'
+
+_WORKSPACE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+TRASH_DIR = '.trash'
+
+log = get_logger('workspace')
+
+# 后台删除：待删除的目录先改名移入回收目录（立即完成），再由后台线程逐个删除
+_deletions = queue.Queue()
+_deleter = None
+_deleter_lock = threading.Lock()
+
+
+def _delete_worker():
+    while True:
+        path = _deletions.get()
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.lexists(path):
+                os.remove(path)
+        except OSError as e:
+            log.warning('后台删除失败', path=path, error=str(e))
+        finally:
+            _deletions.task_done()
+
+
+def _schedule_delete(path):
+    global _deleter
+    with _deleter_lock:
+        if _deleter is None or not _deleter.is_alive():
+            _deleter = threading.Thread(target=_delete_worker, name='workspace-deleter', daemon=True)
+            _deleter.start()
+    _deletions.put(path)
+
+
+def _move_to_trash(path, trash_dir):
+    os.makedirs(trash_dir, exist_ok=True)
+    target = os.path.join(trash_dir, f"{os.path.basename(path)}-{uuid.uuid4().hex[:8]}")
+    os.replace(path, target)
+    return target
+
+
+def discard(path, trash_dir):
+    """把文件或目录移入回收目录（同一文件系统内改名），由后台线程删除；不存在时返回False"""
+    if not os.path.lexists(path):
+        return False
+    _schedule_delete(_move_to_trash(path, trash_dir))
+    return True
+
+
+def exchange(path_a, path_b):
+    """原子交换两个路径；当前平台或文件系统不支持时返回False"""
+    if _renameat2 is None:
+        return False
+    if _renameat2(_AT_FDCWD, os.fsencode(path_a), _AT_FDCWD, os.fsencode(path_b), _RENAME_EXCHANGE) == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+        return False
+    raise OSError(error, os.strerror(error), path_a, None, path_b)
+
+
+def sweep_trash(trash_dir):
+    """删除回收目录中遗留的内容（上次进程退出时尚未删除完的目录）"""
+    if not os.path.isdir(trash_dir):
+        return 0
+    names = os.listdir(trash_dir)
+    for name in names:
+        _schedule_delete(os.path.join(trash_dir, name))
+    return len(names)
+
+
+def wait_for_deletions():
+    """等待后台删除全部完成（命令行等短时进程退出前调用）"""
+    _deletions.join()
+
+
+class WorkspaceLock:
+    """工作目录锁 - 进程内用线程锁，多进程之间再加文件锁"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, 'a')
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            except Exception:
+                self._release_file()
+                self._lock.release()
+                raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._release_file()
+        self._lock.release()
+
+    def _release_file(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def try_acquire(self):
+        """不等待地获取锁，成功返回True（成功后由调用方调用release()）"""
+        if not self._lock.acquire(blocking=False):
+            return False
+        if fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, 'a')
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._release_file()
+                self._lock.release()
+                return False
+        return True
+
+    def release(self):
+        self.__exit__(None, None, None)
+
+    def locked(self):
+        return self._lock.locked()
+
+
+class Workspace:
+    """任务工作目录 - 每次抓取独立的 01/02/final 目录和任务状态
+
+    新一轮抓取的最终产物写入构建目录 .build/final，完成后通过改名整体替换final目录，
+    抓取过程中final目录始终保留上一轮的完整结果。旧目录移入 .trash 后在后台删除。
+    使用SQLite存储（open_store()）时，阶段1/2的文档存放在 store.db 中而不是 01/02 目录。
+    全文索引（open_search_index()）位于 search.db，按文档增量更新，清理时不清空。
+    """
+
+    def __init__(self, workspace_id, root, state=None):
+        self.id = workspace_id
+        self.root = root
+        self.stage1_dir = os.path.join(root, '01')
+        self.stage2_dir = os.path.join(root, '02')
+        self.final_dir = os.path.join(root, 'final')
+        self.build_dir = os.path.join(root, '.build')
+        self.build_final_dir = os.path.join(self.build_dir, 'final')
+        self.trash_dir = os.path.join(root, TRASH_DIR)
+        self.profile_dir = os.path.join(root, 'profiles')
+        self.store_path = os.path.join(root, STORE_FILE)
+        self.search_path = os.path.join(root, SEARCH_FILE)
+        self._store = None
+        self._search_index = None
+        self._store_lock = threading.Lock()
+        self.state = state
+        self.created_at = datetime.now().isoformat(timespec='seconds')
+        # 同一工作目录内的阶段任务串行执行（包括不同服务进程之间）
+        self.lock = WorkspaceLock(os.path.join(root, '.lock'))
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def open_store(self):
+        """工作目录的文档存储（首次调用时创建数据库）"""
+        with self._store_lock:
+            if self._store is None:
+                self._store = ArtifactStore(self.store_path)
+            return self._store
+
+    def open_search_index(self):
+        """工作目录的全文索引（首次调用时创建数据库）"""
+        with self._store_lock:
+            if self._search_index is None:
+                self._search_index = SearchIndex(self.search_path)
+            return self._search_index
+
+    def ensure_dirs(self):
+        for directory in [os.path.join(self.stage1_dir, 'md'),
+                          os.path.join(self.stage2_dir, 'md'),
+                          os.path.join(self.stage2_dir, 'yml'),
+                          os.path.join(self.final_dir, 'md')]:
+            os.makedirs(directory, exist_ok=True)
+
+    def clean(self, keep_final=False):
+        """开始新一轮抓取：旧的中间目录、构建目录和性能分析在后台删除，final目录保留到新结果替换它为止
+
+        keep_final=True时立即以当前final目录为基础（不含纯文档md目录）创建构建目录，供增量合并使用；
+        否则不创建构建目录，由各阶段按需调用ensure_build。
+        """
+        for directory in [self.stage1_dir, self.stage2_dir, self.build_dir, self.profile_dir]:
+            discard(directory, self.trash_dir)
+        if os.path.exists(self.store_path):
+            # 数据库可能有其他连接，清空表而不是删除文件
+            self.open_store().clear_stages()
+        if keep_final:
+            self.ensure_build(skip=('md',))
+
+    def ensure_build(self, seed=True, skip=(), only=None):
+        """准备构建目录（已存在时直接使用），seed=True时复制当前final目录的内容
+
+        skip为不复制的名称模式；only不为None时，final目录下只复制名称匹配这些模式的条目。
+        """
+        if os.path.isdir(self.build_final_dir):
+            return self.build_final_dir
+
+        os.makedirs(self.build_dir, exist_ok=True)
+        tmp_dir = f"{self.build_final_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if seed and os.path.isdir(self.final_dir):
+            skipped = shutil.ignore_patterns('*.tmp', *skip)
+
+            def ignore(directory, names):
+                ignored = skipped(directory, names)
+                if only is not None and os.path.samefile(directory, self.final_dir):
+                    ignored.update(name for name in names
+                                   if not any(fnmatch.fnmatch(name, pattern) for pattern in only))
+                return ignored
+
+            shutil.copytree(self.final_dir, tmp_dir, ignore=ignore)
+        else:
+            os.makedirs(tmp_dir)
+        os.replace(tmp_dir, self.build_final_dir)
+        return self.build_final_dir
+
+    def commit_build(self, source_dir=None):
+        """用构建目录（或指定的source_dir）替换final目录，旧的final在后台删除
+
+        优先原子交换两个目录（任何时刻final都存在）；不支持时先把旧final移开再改名，
+        改名失败则把旧final移回。
+        """
+        source_dir = source_dir or self.build_final_dir
+        if not os.path.isdir(source_dir):
+            return False
+        if os.path.isdir(self.final_dir) and exchange(source_dir, self.final_dir):
+            # 交换后source_dir中是旧的final
+            discard(source_dir, self.trash_dir)
+        else:
+            previous = _move_to_trash(self.final_dir, self.trash_dir) if os.path.lexists(self.final_dir) else None
+            try:
+                os.replace(source_dir, self.final_dir)
+            except OSError:
+                if previous is not None:
+                    os.replace(previous, self.final_dir)
+                raise
+            if previous is not None:
+                _schedule_delete(previous)
+        discard(self.build_dir, self.trash_dir)
+        return True
+
+    def last_modified(self):
+        """工作目录最近一次变化的时间（用于回收长期未使用的工作目录）"""
+        times = []
+        for path in [self.root, self.stage1_dir, self.final_dir, self.build_dir]:
+            try:
+                times.append(os.path.getmtime(path))
+            except OSError:
+                pass
+        return max(times) if times else 0
+
+    def to_dict(self):
+        return {
+            'workspace_id': self.id,
+            'root': self.root,
+            'created_at': self.created_at,
+            'status': self.state.current() if self.state is not None else None
+        }
+
+
+class WorkspaceManager:
+    """工作目录管理 - 默认工作目录沿用data/，新建的工作目录位于data/jobs/<id>/
+
+    max_age（秒）不为None时，超过该时间未变化的工作目录（默认工作目录除外）在新建工作目录时
+    顺带回收，回收检查最多每gc_interval秒进行一次。
+    """
+
+    def __init__(self, data_dir='data', state_factory=None, max_age=None, gc_interval=600):
+        self.data_dir = data_dir
+        self.jobs_dir = os.path.join(data_dir, 'jobs')
+        self.trash_dir = os.path.join(self.jobs_dir, TRASH_DIR)
+        self.state_factory = state_factory
+        self.max_age = max_age
+        self.gc_interval = gc_interval
+        self._collected_at = 0
+        self._workspaces = {}
+        self._lock = threading.Lock()
+
+        self._workspaces[DEFAULT_WORKSPACE] = self._new(DEFAULT_WORKSPACE, data_dir)
+
+        # 上次进程退出时未删除完的目录
+        sweep_trash(self.trash_dir)
+        sweep_trash(self.default.trash_dir)
+
+    def _new(self, workspace_id, root):
+        state = self.state_factory(workspace_id) if self.state_factory else None
+        return Workspace(workspace_id, root, state)
+
+    @property
+    def default(self):
+        return self._workspaces[DEFAULT_WORKSPACE]
+
+    def create(self):
+        """新建工作目录"""
+        workspace_id = uuid.uuid4().hex[:12]
+        workspace = self._new(workspace_id, os.path.join(self.jobs_dir, workspace_id))
+        workspace.ensure_dirs()
+        with self._lock:
+            self._workspaces[workspace_id] = workspace
+
+        if self.max_age is not None and time.time() - self._collected_at >= self.gc_interval:
+            self._collected_at = time.time()
+            threading.Thread(target=self.collect, name='workspace-gc', daemon=True).start()
+        return workspace
+
+    def get(self, workspace_id=None):
+        """按ID获取工作目录，不存在时返回None（磁盘上已有的目录在重启后按需载入）"""
+        workspace_id = workspace_id or DEFAULT_WORKSPACE
+        if not _WORKSPACE_ID_PATTERN.match(workspace_id):
+            return None
+
+        with self._lock:
+            workspace = self._workspaces.get(workspace_id)
+            if workspace is None:
+                root = os.path.join(self.jobs_dir, workspace_id)
+                if not os.path.isdir(root):
+                    return None
+                workspace = self._new(workspace_id, root)
+                self._workspaces[workspace_id] = workspace
+            return workspace
+
+    def list(self):
+        with self._lock:
+            return list(self._workspaces.values())
+
+    def remove(self, workspace_id):
+        """删除工作目录及其全部文件（默认工作目录不可删除）"""
+        if workspace_id == DEFAULT_WORKSPACE:
+            raise ValueError("默认工作目录不可删除")
+
+        with self._lock:
+            workspace = self._workspaces.pop(workspace_id, None)
+        if workspace is None:
+            return False
+
+        with workspace.lock:
+            discard(workspace.root, self.trash_dir)
+        return True
+
+    def collect(self, max_age=None):
+        """回收超过max_age秒未变化、且没有任务在执行的工作目录，返回回收数量"""
+        max_age = self.max_age if max_age is None else max_age
+        if max_age is None or not os.path.isdir(self.jobs_dir):
+            return 0
+
+        now = time.time()
+        removed = 0
+        for workspace_id in os.listdir(self.jobs_dir):
+            if workspace_id == DEFAULT_WORKSPACE or not _WORKSPACE_ID_PATTERN.match(workspace_id):
+                continue
+            workspace = self.get(workspace_id)
+            if workspace is None or now - workspace.last_modified() < max_age:
+                continue
+            if not workspace.lock.try_acquire():
+                continue
+            try:
+                with self._lock:
+                    self._workspaces.pop(workspace_id, None)
+                discard(workspace.root, self.trash_dir)
+                removed += 1
+            except OSError as e:
+                log.warning('回收工作目录失败', workspace=workspace_id, error=str(e))
+            finally:
+                workspace.lock.release()
+
+        if removed:
+            log.info('已回收过期工作目录', removed=removed)
+        return removed
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import zlib
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiling import profiled
+
+# ZIP格式常量
+_LOCAL_HEADER_SIG = 0x04034b50
+_CENTRAL_HEADER_SIG = 0x02014b50
+_END_RECORD_SIG = 0x06054b50
+_ZIP64_END_RECORD_SIG = 0x06064b50
+_ZIP64_LOCATOR_SIG = 0x07064b50
+
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+_FLAG_UTF8 = 0x0800
+_VERSION = 20
+_VERSION_ZIP64 = 45
+_MAX_UINT32 = 0xFFFFFFFF
+_MAX_UINT16 = 0xFFFF
+
+
+class DocsZipBuilder:
+    """文档ZIP构建器 - 多线程并行压缩，支持直接流式输出"""
+
+    def __init__(self, compression_level=6, store_only=False, max_workers=4, chunk_size=64 * 1024):
+        if not store_only and not 0 <= compression_level <= 9:
+            raise ValueError(f"压缩级别必须在0-9之间: {compression_level}")
+
+        self.compression_level = compression_level
+        self.store_only = store_only or compression_level == 0
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = chunk_size
+        self._entries = []
+
+    def add_file(self, arcname, file_path):
+        """添加磁盘文件（压缩时才读取，不做中间复制）"""
+        self._entries.append((arcname, file_path, None))
+
+    def add_bytes(self, arcname, data, mtime=None):
+        """添加内存中的内容"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._entries.append((arcname, None, (data, mtime)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _compress_entry(self, entry):
+        """读取并压缩单个条目（在工作线程中执行，zlib会释放GIL）"""
+        arcname, file_path, payload = entry
+
+        if file_path is not None:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            mtime = os.path.getmtime(file_path)
+        else:
+            data, mtime = payload
+
+        crc = zlib.crc32(data) & _MAX_UINT32
+        method = _METHOD_STORED
+        body = data
+
+        if not self.store_only and data:
+            compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+            compressed = compressor.compress(data) + compressor.flush()
+            # 压缩后没有变小的内容直接存储
+            if len(compressed) < len(data):
+                method = _METHOD_DEFLATED
+                body = compressed
+
+        if len(data) > _MAX_UINT32 or len(body) > _MAX_UINT32:
+            raise ValueError(f"单个文件超过4GB，不支持: {arcname}")
+
+        return {
+            'name': arcname.replace(os.sep, '/').encode('utf-8'),
+            'method': method,
+            'crc': crc,
+            'size': len(data),
+            'body': body,
+            'dos_time': self._dos_datetime(mtime)
+        }
+
+    def _iter_compressed(self):
+        """按添加顺序产出压缩结果，并行窗口有上限以控制内存"""
+        if self.max_workers == 1:
+            for entry in self._entries:
+                yield self._compress_entry(entry)
+            return
+
+        window = self.max_workers * 2
+        compress = profiled(self._compress_entry)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            entries = iter(self._entries)
+
+            for entry in entries:
+                pending.append(executor.submit(compress, entry))
+                if len(pending) >= window:
+                    break
+
+            while pending:
+                result = pending.popleft().result()
+                for entry in entries:
+                    pending.append(executor.submit(compress, entry))
+                    break
+                yield result
+
+    def iter_chunks(self):
+        """生成ZIP文件的字节流，可直接作为HTTP响应体"""
+        central_records = []
+        offset = 0
+
+        for item in self._iter_compressed():
+            if offset > _MAX_UINT32:
+                raise ValueError("ZIP文件超过4GB，不支持")
+
+            dos_time, dos_date = item['dos_time']
+            header = struct.pack(
+                '<IHHHHHIIIHH',
+                _LOCAL_HEADER_SIG, _VERSION, _FLAG_UTF8, item['method'],
+                dos_time, dos_date, item['crc'], len(item['body']), item['size'],
+                len(item['name']), 0
+            ) + item['name']
+
+            central_records.append(struct.pack(
+                '<IHHHHHHIIIHHHHHII',
+                _CENTRAL_HEADER_SIG, (3 << 8) | _VERSION, _VERSION, _FLAG_UTF8, item['method'],
+                dos_time, dos_date, item['crc'], len(item['body']), item['size'],
+                len(item['name']), 0, 0, 0, 0, (0o100644 << 16), offset
+            ) + item['name'])
+
+            yield header
+            body = item['body']
+            for start in range(0, len(body), self.chunk_size):
+                yield body[start:start + self.chunk_size]
+            offset += len(header) + len(body)
+
+        central_dir = b''.join(central_records)
+        yield central_dir
+        yield self._end_records(len(central_records), len(central_dir), offset)
+
+    def _end_records(self, count, central_size, central_offset):
+        """生成中央目录结束记录（条目数超过65535时追加ZIP64记录）"""
+        records = b''
+        if count > _MAX_UINT16 or central_offset > _MAX_UINT32:
+            zip64_offset = central_offset + central_size
+            records += struct.pack(
+                '<IQHHIIQQQQ',
+                _ZIP64_END_RECORD_SIG, 44, _VERSION_ZIP64, _VERSION_ZIP64,
+                0, 0, count, count, central_size, central_offset
+            )
+            records += struct.pack('<IIQI', _ZIP64_LOCATOR_SIG, 0, zip64_offset, 1)
+            count = _MAX_UINT16
+            central_offset = _MAX_UINT32
+
+        records += struct.pack(
+            '<IHHHHIIH',
+            _END_RECORD_SIG, 0, 0, count, count, central_size, central_offset, 0
+        )
+        return records
+
+    def write_to(self, fileobj):
+        """把ZIP写入文件对象，返回写入字节数"""
+        written = 0
+        for chunk in self.iter_chunks():
+            fileobj.write(chunk)
+            written += len(chunk)
+        return written
+
+    def save(self, zip_path):
+        """保存ZIP到磁盘（先写临时文件再改名，避免下载到半成品）"""
+        tmp_path = f"{zip_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            written = self.write_to(f)
+        os.replace(tmp_path, zip_path)
+        return written
+
+    @staticmethod
+    def _dos_datetime(timestamp):
+        """转换为ZIP使用的DOS时间格式"""
+        t = time.localtime(timestamp if timestamp is not None else time.time())
+        year = max(t.tm_year, 1980)
+        dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+        dos_date = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+        return dos_time, dos_date